@@ -0,0 +1,58 @@
+import sys
+import argparse
+import logging
+from time import time
+from typing import List
+
+from creatures.app.batch import BatchRunner, DEFAULT_MAX_FRAMES, DEFAULT_RETRIES
+
+DEFAULT_OUTPUT = 'batch_results.jsonl'
+
+
+def seed_range(value: str) -> range:
+  try:
+    first, _, last = value.partition('-')
+    first, last = int(first), int(last) if last else int(first)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"expected FIRST-LAST, such as 1-100, got '{value}'")
+  if last < first:
+    raise argparse.ArgumentTypeError(f"the last seed must not be lower than the first, got '{value}'")
+  return range(first, last + 1)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description='Run a scenario headless with many seeds, in parallel.')
+  parser.add_argument('filename', help='Scenario YAML file.')
+  parser.add_argument('-s', '--seeds', type=seed_range, required=True, metavar='FIRST-LAST',
+                      help='Inclusive range of seeds to run, such as 1-100.')
+  parser.add_argument('-w', '--workers', type=int, default=None, help='Number of worker processes. Defaults to one per CPU.')
+  parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                      help=f"JSON lines results file, one line per run (default: {DEFAULT_OUTPUT}). Use - for stdout.")
+  parser.add_argument('--frames', type=int, default=DEFAULT_MAX_FRAMES,
+                      help=f"Maximum steps per run, if creatures are still alive (default: {DEFAULT_MAX_FRAMES}).")
+  parser.add_argument('--fixed-dt', type=float, default=None, metavar='MS',
+                      help="Step size in milliseconds. Defaults to the scenario's fixed_dt.")
+  parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                      help=f"Times a run is retried after its worker process crashed (default: {DEFAULT_RETRIES}).")
+  return parser.parse_args(argv)
+
+
+def main():
+  logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+  args = parse_args(sys.argv[1:])
+
+  runner = BatchRunner(args.filename, workers=args.workers, max_frames=args.frames, fixed_dt=args.fixed_dt, retries=args.retries)
+  start = time()
+  if args.output == '-':
+    results = runner.run_all(args.seeds, sys.stdout)
+  else:
+    with open(args.output, 'w') as output:
+      results = runner.run_all(args.seeds, output)
+
+  failed = [r for r in results if r['status'] != 'ok']
+  print(f"{len(results)} runs in {time() - start:.2f}s, {len(failed)} failed.", file=sys.stderr)
+  sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,5 @@
+"""
+Benchmark suites. Run them from the repository root:
+
+  python -m benchmarks.scaling --help
+"""
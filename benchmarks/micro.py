@@ -0,0 +1,276 @@
+"""
+Micro-benchmarks of the calls in the inner loops of the simulation: vector arithmetic, entity component
+lookups, distances and sensor scans.
+
+Each benchmark times one call many times and reports nanoseconds per call, best and median of several
+repetitions. The 'call overhead' row is the cost of calling an empty function the same way: subtract it to
+get the cost of the call itself.
+
+Allocations are counted with tracemalloc:
+
+- 'allocs/op' is the number of memory blocks an op leaves allocated, its result included, counted while the
+  results of many calls are kept alive. Temporaries freed before the call returns are not counted.
+- 'peak B/op' is the most memory a single call holds at once, temporaries included.
+
+Small floats and ints come from free lists and are not always counted.
+
+  python -m benchmarks.micro
+  python -m benchmarks.micro -k Vector -o micro.json
+  python -m benchmarks.micro --baseline micro.json
+"""
+import argparse
+import json
+import logging
+import math
+import sys
+import timeit
+import tracemalloc
+from statistics import median
+from typing import Any, Callable, Dict, List, Tuple
+
+from creatures.app.batch import format_table
+from creatures.app.io import Loader
+from creatures.app.sensor import RadialSensor
+from creatures.core.component import MetaDataComponent, MovementComponent
+from creatures.core.entity import Entity
+from creatures.core.primitives import Vector
+from creatures.core.spatial import entities_in_radius, in_radius
+
+FORMAT_VERSION = 1
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_THRESHOLD = 0.1
+CALIBRATION_TIME = 0.01
+ALLOCATION_CALLS = 1000
+SCAN_POPULATION = 1000
+SCAN_RADII = (10, 30)
+
+Op = Callable[[], Any]
+Result = Dict[str, Any]
+
+
+def _entity(position: Vector) -> Entity:
+  entity = Entity(None, 'creature')
+  entity.properties = {'name': 'ze', 'speed': 1.2, 'size': 3}
+  entity.add_component(MovementComponent(position))
+  entity.add_component(MetaDataComponent('ze', 'creature'))
+  return entity
+
+
+def _scan_fixture(radius: float) -> Tuple[RadialSensor, List[Entity], Vector]:
+  side = math.sqrt(SCAN_POPULATION * 400)
+  scenario = {'frame': {'world': {
+    'width': side, 'height': side, 'random_seed': 1,
+    'generators': [{'type': 'Resource', 'quantity': SCAN_POPULATION, 'id_prefix': 'res_', 'template': {'properties': {'size': 1}}}],
+  }}}
+  world = Loader.from_dict(scenario).load().world
+  position = Vector(side / 2, side / 2)
+  return RadialSensor(radius), world.spatial_index.candidates(position, radius), position
+
+
+def benchmarks() -> Dict[str, Op]:
+  """
+  Build the benchmarked calls.
+
+  Returns:
+    Dict[str, Op]: Each call as a function without arguments, by name.
+  """
+  a, b = Vector(3.0, 4.0), Vector(3.1, 4.2)
+  entity, other = _entity(Vector(10.0, 20.0)), _entity(Vector(13.0, 24.0))
+  properties = entity.properties
+  ops: Dict[str, Op] = {
+    'call overhead': lambda: None,
+    'Vector()': lambda: Vector(3.0, 4.0),
+    'Vector.x': lambda: a.x,
+    'Vector + Vector': lambda: a + b,
+    'Vector - Vector': lambda: a - b,
+    'Vector * float': lambda: a * 2.0,
+    'Vector / float': lambda: a / 2.0,
+    'Vector.size()': lambda: a.size(),
+    'Vector.unit()': lambda: a.unit(),
+    'Vector == Vector': lambda: a == b,
+    'Entity.distance(Entity)': lambda: entity.distance(other),
+    'Entity.distance(Vector)': lambda: entity.distance(b),
+    'in_radius(Vector, Vector)': lambda: in_radius(a, b, 5.0),
+    'entities_in_radius(Entity, Entity)': lambda: entities_in_radius(entity, other, 5.0),
+    'Entity.get_component(type)': lambda: entity.get_component(MovementComponent),
+    'Entity.get_component(name)': lambda: entity.get_component('MovementComponent'),
+    'Entity.movement': lambda: entity.movement,
+    'Entity.metadata': lambda: entity.metadata,
+    "properties.get('speed')": lambda: properties.get('speed'),
+  }
+  for radius in SCAN_RADII:
+    sensor, candidates, position = _scan_fixture(radius)
+    ops[f"RadialSensor.scan(r={radius}, {len(candidates)} candidates)"] = lambda s=sensor, c=candidates, p=position: s.scan(c, p)
+  return ops
+
+
+def time_op(op: Op, repeat: int, min_time: float) -> Tuple[float, float]:
+  """
+  Time a call.
+
+  Args:
+    op (Op): The call.
+    repeat (int): The number of timed repetitions.
+    min_time (float): The least time each repetition takes, in seconds.
+
+  Returns:
+    Tuple[float, float]: The best and median time per call, in nanoseconds.
+  """
+  timer = timeit.Timer(op)
+  number, elapsed = 1, timer.timeit(1)
+  while elapsed < CALIBRATION_TIME:
+    number *= 10
+    elapsed = timer.timeit(number)
+  number = max(1, math.ceil(number * min_time / elapsed))
+  times = [t / number * 1e9 for t in timer.repeat(repeat, number)]
+  return min(times), median(times)
+
+
+def count_allocations(op: Op, calls: int = ALLOCATION_CALLS) -> Tuple[float, float]:
+  """
+  Count the memory an op allocates with tracemalloc.
+
+  Args:
+    op (Op): The call.
+    calls (int): The number of calls whose results are kept alive.
+
+  Returns:
+    Tuple[float, float]: The blocks left allocated per call, and the peak bytes of a single call.
+  """
+  blocks, peak = _allocations(op, calls)
+  # Measuring allocates a little by itself: take off what measuring an empty call finds.
+  empty_blocks, empty_peak = _allocations(_noop, calls)
+  return max(0.0, blocks - empty_blocks), max(0, peak - empty_peak)
+
+
+def _noop() -> None:
+  pass
+
+
+def _allocations(op: Op, calls: int) -> Tuple[float, int]:
+  op()
+  results: List[Any] = [None] * calls
+  tracemalloc.start()
+  try:
+    before = tracemalloc.take_snapshot()
+    for i in range(calls):
+      results[i] = op()
+    after = tracemalloc.take_snapshot()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    del results
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    op()
+    _, peak = tracemalloc.get_traced_memory()
+  finally:
+    tracemalloc.stop()
+  return blocks / calls, peak - current
+
+
+def run(ops: Dict[str, Op], repeat: int, min_time: float, progress=None) -> List[Result]:
+  """
+  Time every op and count its allocations.
+
+  Args:
+    ops (Dict[str, Op]): The calls, by name.
+    repeat (int): The number of timed repetitions.
+    min_time (float): The least time each repetition takes, in seconds.
+    progress (TextIO): Where to report each benchmark, if anywhere.
+
+  Returns:
+    List[Result]: One result per op.
+  """
+  results = []
+  for name, op in ops.items():
+    if progress:
+      progress.write(f"{name}...\n")
+      progress.flush()
+    best, typical = time_op(op, repeat, min_time)
+    blocks, peak = count_allocations(op)
+    results.append({'name': name, 'ns_per_op': best, 'median_ns_per_op': typical, 'allocs_per_op': blocks, 'peak_bytes_per_op': peak})
+  return results
+
+
+def compare(results: List[Result], baseline: List[Result], threshold: float) -> List[Dict[str, Any]]:
+  """
+  Compare the best times per op against a baseline.
+
+  Args:
+    results (List[Result]): The current results.
+    baseline (List[Result]): The baseline results. Ops are matched by name.
+    threshold (float): The relative slowdown tolerated, such as 0.1 for 10%.
+
+  Returns:
+    List[Dict[str, Any]]: One row per current op, with both times, their ratio, and whether the op regressed.
+  """
+  before = {result['name']: result for result in baseline}
+  rows = []
+  for result in results:
+    old = before.get(result['name'])
+    row = {'name': result['name'], 'baseline_ns': None, 'ns': result['ns_per_op'], 'ratio': None,
+           'baseline_allocs': None, 'allocs': result['allocs_per_op'], 'regressed': False}
+    if old is not None and old['ns_per_op'] > 0:
+      row.update(baseline_ns=old['ns_per_op'], ratio=result['ns_per_op'] / old['ns_per_op'], baseline_allocs=old['allocs_per_op'])
+      row['regressed'] = row['ratio'] > 1 + threshold
+    rows.append(row)
+  return rows
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.micro',
+                                   description='Time the calls in the inner loops of the simulation, and count their allocations.')
+  parser.add_argument('-k', '--filter', default=None, metavar='TEXT', help='Only run the benchmarks whose name contains TEXT.')
+  parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f"Timed repetitions per benchmark (default: {DEFAULT_REPEAT}).")
+  parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, metavar='SECONDS',
+                      help=f"Least time per repetition (default: {DEFAULT_MIN_TIME}).")
+  parser.add_argument('-o', '--output', default=None, metavar='FILE', help='Write the results to FILE as JSON.')
+  parser.add_argument('--baseline', default=None, metavar='FILE',
+                      help='Compare against the results in FILE, and exit with status 1 if a benchmark regressed.')
+  parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help=f"Relative slowdown counted as a regression (default: {DEFAULT_THRESHOLD}).")
+  args = parser.parse_args(argv)
+  if args.repeat < 1 or args.min_time <= 0:
+    parser.error('--repeat and --min-time must be positive')
+  return args
+
+
+def main():
+  logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+  logging.disable(logging.INFO)
+  args = parse_args(sys.argv[1:])
+
+  baseline = None
+  if args.baseline:
+    try:
+      with open(args.baseline) as fd:
+        baseline = json.load(fd)
+    except (OSError, ValueError) as e:
+      print(f"Cannot read the baseline: {e}")
+      exit(1)
+
+  ops = {name: op for name, op in benchmarks().items() if not args.filter or args.filter in name}
+  results = run(ops, args.repeat, args.min_time, progress=sys.stderr)
+  print(format_table([
+    {'name': r['name'], 'ns/op': r['ns_per_op'], 'median ns/op': r['median_ns_per_op'],
+     'allocs/op': r['allocs_per_op'], 'peak B/op': r['peak_bytes_per_op']}
+    for r in results
+  ]))
+
+  if args.output:
+    with open(args.output, 'w') as fd:
+      json.dump({'version': FORMAT_VERSION, 'python': sys.version, 'results': results}, fd, indent=2)
+
+  if baseline is not None:
+    rows = compare(results, baseline.get('results', []), args.threshold)
+    print(f"\nAgainst {args.baseline} (threshold {args.threshold:.0%}):")
+    print(format_table(rows))
+    regressed = [row['name'] for row in rows if row['regressed']]
+    if regressed:
+      print(f"{len(regressed)} regressed: {', '.join(regressed)}")
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,366 @@
+"""
+Scaling benchmark.
+
+Runs generated scenarios at growing populations, with several creature/resource mixes and sensor radii, and
+reports how the frame time grows with the number of entities. The world grows with the population, so
+density, and with it the number of entities each sensor sees, stays the same: a linear simulation has a
+scaling exponent of 1.
+
+Each case runs in a fresh process, steps a few warmup frames, then times up to `--frames` frames (fewer if
+it takes longer than `--max-seconds`). Results are written as JSON, and can be compared against an older
+result file: a case regresses when its median frame time grew by more than the threshold.
+
+  python -m benchmarks.scaling -o results.json
+  python -m benchmarks.scaling --sizes 100,1000 --baseline results.json --threshold 0.1
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean, median
+from time import perf_counter
+from typing import Any, Dict, List, Sequence
+
+from creatures.app.batch import format_table
+from creatures.app.io import Loader
+from creatures.core.util import SystemTimings, percentile
+
+FORMAT_VERSION = 1
+SIZES = (100, 1000, 10000, 100000)
+# Share of creatures in the population. The rest are resources.
+MIXES = {'creatures': 0.9, 'balanced': 0.5, 'resources': 0.1}
+SENSOR_RADII = (10, 30)
+AREA_PER_ENTITY = 400
+DEFAULT_SEED = 1
+DEFAULT_WARMUP = 3
+DEFAULT_FRAMES = 50
+MIN_FRAMES = 5
+DEFAULT_MAX_SECONDS = 20.0
+DEFAULT_FIXED_DT = 16.0
+DEFAULT_THRESHOLD = 0.1
+
+Result = Dict[str, Any]
+
+
+class Case(object):
+  """
+  One benchmark scenario: a population size, a creature/resource mix and a sensor radius.
+
+  Attributes:
+    size (int): The number of entities.
+    mix (str): The name of the mix, a key of MIXES.
+    sensor_radius (float): The sensor radius of every creature.
+    name (str): A unique name, such as 'n1000-balanced-r10'.
+    creatures (int): The number of creatures.
+    resources (int): The number of resources.
+
+  Methods:
+    scenario(seed): Build the scenario content.
+  """
+  def __init__(self, size: int, mix: str, sensor_radius: float) -> None:
+    """
+    Initialize a Case object.
+
+    Args:
+      size (int): The number of entities.
+      mix (str): The name of the mix, a key of MIXES.
+      sensor_radius (float): The sensor radius of every creature.
+    """
+    self.size: int = size
+    self.mix: str = mix
+    self.sensor_radius: float = sensor_radius
+    self.name: str = f"n{size}-{mix}-r{sensor_radius:g}"
+    self.creatures: int = max(1, round(size * MIXES[mix]))
+    self.resources: int = size - self.creatures
+
+  def scenario(self, seed: int) -> Dict[str, Any]:
+    """
+    Build the scenario content, as `Loader.from_dict()` takes it.
+
+    Args:
+      seed (int): The random seed.
+
+    Returns:
+      dict: The scenario.
+    """
+    side = math.sqrt(self.size * AREA_PER_ENTITY)
+    return {'frame': {'world': {
+      'width': side,
+      'height': side,
+      'random_seed': seed,
+      'generators': [
+        {
+          'type': 'creature',
+          'quantity': self.creatures,
+          'id_prefix': 'creature_',
+          'template': {
+            'position': 'Somewhere',
+            'properties': {
+              'name': 'random(ze,maria,ablinio,apolo,matraca,max,astolfo,rubens)',
+              'speed': 'random(0.5,1.8)',
+              'grab_radius': 'random(3.0,7)',
+              'size': 'random(2,5)',
+              'diet': 'random(carnivore,herbivore)',
+            },
+            'desire': 'Wander',
+            'brain': None,
+            'sensors': [{'radius': self.sensor_radius}],
+          },
+        },
+        {
+          'type': 'Resource',
+          'quantity': self.resources,
+          'id_prefix': 'res_',
+          'template': {'properties': {'size': 'random(1,3)'}},
+        },
+      ],
+    }}}
+
+  def __str__(self) -> str:
+    return self.name
+
+
+def cases(sizes: Sequence[int] = SIZES, mixes: Sequence[str] = tuple(MIXES), radii: Sequence[float] = SENSOR_RADII) -> List[Case]:
+  """
+  Get every combination of sizes, mixes and sensor radii, smallest sizes first.
+
+  Args:
+    sizes (Sequence[int]): The population sizes.
+    mixes (Sequence[str]): The mix names, keys of MIXES.
+    radii (Sequence[float]): The sensor radii.
+
+  Returns:
+    List[Case]: The cases.
+  """
+  return [Case(size, mix, radius) for size in sorted(sizes) for mix in mixes for radius in radii]
+
+
+def run_case(case: Case, seed: int, warmup: int, frames: int, max_seconds: float, fixed_dt: float) -> Result:
+  """
+  Load a case and time its frames. Meant to run in a fresh worker process.
+
+  Args:
+    case (Case): The case.
+    seed (int): The random seed.
+    warmup (int): Frames run before timing.
+    frames (int): The most frames timed.
+    max_seconds (float): Stop timing after this long, once MIN_FRAMES frames were timed.
+    fixed_dt (float): Step size in milliseconds.
+
+  Returns:
+    Result: The case, load time, frame time statistics in milliseconds and per-system timings.
+  """
+  logging.disable(logging.INFO)
+  start = perf_counter()
+  world = Loader.from_dict(case.scenario(seed), random_seed=seed, name=case.name).load().world
+  load_seconds = perf_counter() - start
+
+  frame_times: List[float] = []
+  try:
+    for _ in range(warmup):
+      world.step(fixed_dt)
+    world.stats.system_timings = SystemTimings(frames)
+
+    start = perf_counter()
+    while len(frame_times) < frames:
+      step_start = perf_counter()
+      world.step(fixed_dt)
+      frame_times.append((perf_counter() - step_start) * 1000)
+      if len(frame_times) >= MIN_FRAMES and perf_counter() - start > max_seconds:
+        break
+  finally:
+    world.shutdown()
+
+  ordered = sorted(frame_times)
+  return {
+    'name': case.name,
+    'size': case.size,
+    'mix': case.mix,
+    'creatures': case.creatures,
+    'resources': case.resources,
+    'sensor_radius': case.sensor_radius,
+    'load_seconds': load_seconds,
+    'frames': len(frame_times),
+    'median_ms': median(ordered),
+    'p95_ms': percentile(ordered, 95),
+    'mean_ms': mean(ordered),
+    'max_ms': ordered[-1],
+    'final_population': world.stats.population,
+    'systems': world.stats.system_timings.summary(),
+  }
+
+
+def fit_exponents(results: Sequence[Result]) -> Dict[str, float]:
+  """
+  Fit `frame time = a * size ** k` to the median frame times of each mix and sensor radius, by least squares
+  on the logarithms.
+
+  Args:
+    results (Sequence[Result]): The case results.
+
+  Returns:
+    Dict[str, float]: The exponent k of each series with at least two sizes, keyed as 'balanced-r10'.
+  """
+  series: Dict[str, List[Result]] = {}
+  for result in results:
+    series.setdefault(f"{result['mix']}-r{result['sensor_radius']:g}", []).append(result)
+
+  exponents = {}
+  for name, points in series.items():
+    xs = [math.log(p['size']) for p in points]
+    ys = [math.log(p['median_ms']) for p in points if p['median_ms'] > 0]
+    if len(set(xs)) < 2 or len(ys) != len(xs):
+      continue
+    x_mean, y_mean = mean(xs), mean(ys)
+    exponents[name] = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+  return exponents
+
+
+def compare(results: Sequence[Result], baseline: Sequence[Result], threshold: float) -> List[Dict[str, Any]]:
+  """
+  Compare median frame times against a baseline.
+
+  Args:
+    results (Sequence[Result]): The current case results.
+    baseline (Sequence[Result]): The baseline case results. Cases are matched by name.
+    threshold (float): The relative slowdown tolerated, such as 0.1 for 10%.
+
+  Returns:
+    List[Dict[str, Any]]: One row per current case, with the baseline and current medians, their ratio, and
+      whether the case regressed. Cases missing from the baseline have no ratio.
+  """
+  before = {result['name']: result for result in baseline}
+  rows = []
+  for result in results:
+    old = before.get(result['name'])
+    row = {'name': result['name'], 'baseline_ms': None, 'median_ms': result['median_ms'], 'ratio': None, 'regressed': False}
+    if old is not None and old['median_ms'] > 0:
+      row['baseline_ms'] = old['median_ms']
+      row['ratio'] = result['median_ms'] / old['median_ms']
+      row['regressed'] = row['ratio'] > 1 + threshold
+    rows.append(row)
+  return rows
+
+
+def environment() -> Dict[str, Any]:
+  return {
+    'python': platform.python_version(),
+    'implementation': platform.python_implementation(),
+    'platform': platform.platform(),
+    'machine': platform.machine(),
+    'cpus': os.cpu_count(),
+  }
+
+
+def _int_list(value: str) -> List[int]:
+  try:
+    return [int(v) for v in value.split(',') if v]
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"expected comma separated integers, got '{value}'")
+
+
+def _float_list(value: str) -> List[float]:
+  try:
+    return [float(v) for v in value.split(',') if v]
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"expected comma separated numbers, got '{value}'")
+
+
+def _mix_list(value: str) -> List[str]:
+  mixes = [v for v in value.split(',') if v]
+  unknown = [m for m in mixes if m not in MIXES]
+  if unknown:
+    raise argparse.ArgumentTypeError(f"unknown mixes {unknown}, options are {list(MIXES)}")
+  return mixes
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.scaling',
+                                   description='Time generated scenarios at growing populations and fit how frame times scale.')
+  parser.add_argument('--sizes', type=_int_list, default=list(SIZES), metavar='N,N,...',
+                      help=f"Population sizes (default: {','.join(map(str, SIZES))}).")
+  parser.add_argument('--mixes', type=_mix_list, default=list(MIXES), metavar='MIX,MIX,...',
+                      help=f"Creature/resource mixes, among {', '.join(f'{k} ({v * 100:.0f}%% creatures)' for k, v in MIXES.items())}.")
+  parser.add_argument('--radii', type=_float_list, default=list(SENSOR_RADII), metavar='R,R,...',
+                      help=f"Sensor radii (default: {','.join(map(str, SENSOR_RADII))}).")
+  parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"Random seed (default: {DEFAULT_SEED}).")
+  parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help=f"Untimed frames per case (default: {DEFAULT_WARMUP}).")
+  parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help=f"Most timed frames per case (default: {DEFAULT_FRAMES}).")
+  parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                      help=f"Stop timing a case after this long, once {MIN_FRAMES} frames were timed (default: {DEFAULT_MAX_SECONDS}).")
+  parser.add_argument('--fixed-dt', type=float, default=DEFAULT_FIXED_DT, metavar='MS',
+                      help=f"Step size in milliseconds (default: {DEFAULT_FIXED_DT}).")
+  parser.add_argument('-o', '--output', default=None, metavar='FILE', help='Write the results to FILE as JSON.')
+  parser.add_argument('--baseline', default=None, metavar='FILE',
+                      help='Compare against the results in FILE, and exit with status 1 if a case regressed.')
+  parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help=f"Relative median slowdown counted as a regression (default: {DEFAULT_THRESHOLD}).")
+  parser.add_argument('--systems', action='store_true', help='Print the per-system breakdown of every case.')
+  args = parser.parse_args(argv)
+  if min(args.sizes, default=0) < 1 or args.frames < 1 or args.warmup < 0:
+    parser.error('sizes and --frames must be positive, and --warmup must not be negative')
+  return args
+
+
+def main():
+  logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+  args = parse_args(sys.argv[1:])
+
+  baseline = None
+  if args.baseline:
+    try:
+      with open(args.baseline) as fd:
+        baseline = json.load(fd)
+    except (OSError, ValueError) as e:
+      print(f"Cannot read the baseline: {e}")
+      exit(1)
+
+  results: List[Result] = []
+  selected = cases(args.sizes, args.mixes, args.radii)
+  # One fresh process per case, one at a time: cases do not share caches, heap or cores.
+  with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+    for index, case in enumerate(selected):
+      print(f"[{index + 1}/{len(selected)}] {case}...", end=' ', file=sys.stderr, flush=True)
+      result = executor.submit(run_case, case, args.seed, args.warmup, args.frames, args.max_seconds, args.fixed_dt).result()
+      print(f"median {result['median_ms']:.2f}ms over {result['frames']} frames", file=sys.stderr)
+      results.append(result)
+
+  columns = ('name', 'creatures', 'resources', 'frames', 'median_ms', 'p95_ms', 'max_ms', 'load_seconds')
+  print(format_table([{c: r[c] for c in columns} for r in results]))
+  if args.systems:
+    for result in results:
+      print(f"\n{result['name']}")
+      print(format_table([{'system': name, **values} for name, values in result['systems'].items()]))
+
+  exponents = fit_exponents(results)
+  if exponents:
+    print('\nScaling exponents of the median frame time (1 is linear):')
+    print(format_table([{'series': name, 'exponent': k} for name, k in exponents.items()]))
+
+  report = {
+    'version': FORMAT_VERSION,
+    'environment': environment(),
+    'settings': {k: getattr(args, k) for k in ('sizes', 'mixes', 'radii', 'seed', 'warmup', 'frames', 'max_seconds', 'fixed_dt')},
+    'cases': results,
+    'exponents': exponents,
+  }
+  if args.output:
+    with open(args.output, 'w') as fd:
+      json.dump(report, fd, indent=2)
+
+  if baseline is not None:
+    rows = compare(results, baseline.get('cases', []), args.threshold)
+    print(f"\nAgainst {args.baseline} (threshold {args.threshold:.0%}):")
+    print(format_table(rows))
+    regressed = [row['name'] for row in rows if row['regressed']]
+    if regressed:
+      print(f"{len(regressed)} regressed: {', '.join(regressed)}")
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
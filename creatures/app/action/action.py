@@ -1,6 +1,6 @@
 from typing import Any, Dict, List
 from creatures.core.component import Component
-from creatures.core.component.component import EnergyComponent
+from creatures.core.component.component import EnergyComponent, MovementComponent
 from creatures.core.entity import Entity
 from creatures.core.primitives import Vector
 from creatures.core.system import System
@@ -51,7 +51,7 @@ class Grab(Action):
     if self.target:
       energy_component = self.entity.get_component(EnergyComponent)
       energy_component.current = min(100, energy_component.current + 50)
-      self.target.remove = True
+      self.target.mark_remove()
   
   def to_dict(self) -> Dict[str, Any]:
     return {
@@ -71,6 +71,10 @@ class ActionComponent(Component):
 
 
 class ActionSystem(System):
+  component_types = (ActionComponent,)
+  reads = ()
+  writes = (ActionComponent, EnergyComponent, MovementComponent)
+
   def __init__(self, world: World) -> None:
     super().__init__(world)
   
@@ -83,7 +87,7 @@ class ActionSystem(System):
         if energy_component:
           if energy_component.current >= action_component.action.energy_cost:
             action_component.action.run()
-            energy_component.current -= action_component.action.energy_cost * self.world.dt
+            energy_component.current -= action_component.action.energy_cost * self.dt
           else:
             action_component.action = None
         else:
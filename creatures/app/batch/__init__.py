@@ -0,0 +1,2 @@
+from .batch_runner import BatchRunner, run_seed, run_world, DEFAULT_MAX_FRAMES, DEFAULT_RETRIES
+from .sweep import Sweep, SweepException, run_variant, summarize, format_table, write_csv
\ No newline at end of file
@@ -0,0 +1,217 @@
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from time import time
+from typing import Any, Callable, Dict, Iterable, List, Set, TextIO, Tuple
+
+from creatures.app.io import Loader
+from creatures.app.creatures.creature import Creature
+from creatures.core.world import World
+
+DEFAULT_MAX_FRAMES = 10000
+DEFAULT_RETRIES = 1
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_CRASHED = 'crashed'
+
+Result = Dict[str, Any]
+
+# Set in each worker process: the queue workers announce the seeds they start on.
+_started_seeds = None
+
+
+def run_world(world: World, max_frames: int = DEFAULT_MAX_FRAMES, fixed_dt: float = None) -> int:
+  """
+  Run a world headless in fixed steps until no creatures are left, or for at most `max_frames` steps.
+
+  Args:
+    world (World): The world to run.
+    max_frames (int): The maximum number of steps (default is DEFAULT_MAX_FRAMES).
+    fixed_dt (float): Step size in milliseconds. Defaults to the world's `fixed_dt`.
+
+  Returns:
+    int: The number of steps run.
+  """
+  frames = 0
+  while frames < max_frames and world.stats.population_of(Creature.__name__):
+    world.step(fixed_dt)
+    frames += 1
+  return frames
+
+
+def run_seed(filename: str, seed: int, max_frames: int = DEFAULT_MAX_FRAMES, fixed_dt: float = None) -> Result:
+  """
+  Load a scenario with a seed and run it headless. Meant to run in a worker process.
+
+  Args:
+    filename (str): The scenario file.
+    seed (int): The random seed.
+    max_frames (int): The maximum number of steps (default is DEFAULT_MAX_FRAMES).
+    fixed_dt (float): Step size in milliseconds. Defaults to the scenario's `fixed_dt`.
+
+  Returns:
+    Result: The seed, the number of steps, load and run times in seconds and the final world stats.
+  """
+  logging.disable(logging.INFO)
+  load_start = time()
+  world = Loader(filename, random_seed=seed).load().world
+  run_start = time()
+  try:
+    frames = run_world(world, max_frames, fixed_dt)
+  finally:
+    world.shutdown()
+  run_end = time()
+
+  return {
+    'seed': seed,
+    'status': STATUS_OK,
+    'frames': frames,
+    'load_time': run_start - load_start,
+    'run_time': run_end - run_start,
+    'stats': world.stats.to_dict(),
+  }
+
+
+def _init_worker(started) -> None:
+  global _started_seeds
+  _started_seeds = started
+
+
+def _run_started(run: Callable[..., Result], filename: str, seed: int, max_frames: int, fixed_dt: float) -> Result:
+  _started_seeds.put(seed)
+  return run(filename, seed, max_frames, fixed_dt)
+
+
+def _read_started(started, seeds: Set[int]) -> None:
+  for seed in iter(started.get, None):
+    seeds.add(seed)
+
+
+class BatchRunner(object):
+  """
+  Runs a scenario with many seeds on a pool of worker processes and streams the results as JSON lines.
+
+  Results are written in the order runs finish, one line per seed, and flushed right away, so a partial
+  results file is usable if the batch is interrupted. A run that raises is recorded with status 'error'.
+  If a worker process dies, the pool breaks and every queued run fails with it. The runs that had not
+  started yet go to a new pool. The runs that had started are retried one at a time, each in a new worker,
+  up to `retries` times, then recorded with status 'crashed'.
+
+  Attributes:
+    filename (str): The scenario file.
+    workers (int | None): Number of worker processes. None uses one per CPU.
+    max_frames (int): The maximum number of steps per run.
+    fixed_dt (float | None): Step size in milliseconds. None uses the scenario's.
+    retries (int): How many times a run is retried after its worker crashed.
+    run (Callable[..., Result]): The function running one seed, called as `run(filename, seed, max_frames, fixed_dt)`.
+
+  Methods:
+    run_all(seeds, output): Run every seed and write the results.
+  """
+  def __init__(self,
+               filename: str,
+               workers: int = None,
+               max_frames: int = DEFAULT_MAX_FRAMES,
+               fixed_dt: float = None,
+               retries: int = DEFAULT_RETRIES,
+               run: Callable[..., Result] = run_seed) -> None:
+    """
+    Initialize a BatchRunner object.
+
+    Args:
+      filename (str): The scenario file.
+      workers (int): Number of worker processes. Defaults to one per CPU.
+      max_frames (int): The maximum number of steps per run (default is DEFAULT_MAX_FRAMES).
+      fixed_dt (float): Step size in milliseconds. Defaults to the scenario's `fixed_dt`.
+      retries (int): How many times a run is retried after its worker crashed (default is DEFAULT_RETRIES).
+      run (Callable): The function running one seed. Must be picklable (default is `run_seed`).
+    """
+    self.log = logging.getLogger(self.__class__.__name__)
+    self.filename: str = filename
+    self.workers: int | None = workers
+    self.max_frames: int = max_frames
+    self.fixed_dt: float | None = fixed_dt
+    self.retries: int = retries
+    self.run: Callable[..., Result] = run
+
+  def run_all(self, seeds: Iterable[int], output: TextIO) -> List[Result]:
+    """
+    Run every seed and write one JSON line per finished run to `output`.
+
+    Args:
+      seeds (Iterable[int]): The seeds to run.
+      output (TextIO): Where to write the results.
+
+    Returns:
+      List[Result]: The results, in the order runs finished.
+    """
+    results: List[Result] = []
+    queued = list(seeds)
+    suspects: List[int] = []
+    while queued:
+      crashed, started = self._run_pool(queued, self.workers, output, results)
+      # A broken pool fails every queued run, not only the one that crashed it. Only the runs in a worker at
+      # the time can be to blame: the others run again at full width. If no run had started, the pool broke
+      # on its own and all of them are suspects, so the loop always ends.
+      isolated = [seed for seed in crashed if seed in started]
+      queued = [seed for seed in crashed if seed not in started]
+      if not isolated:
+        isolated, queued = queued, []
+      suspects.extend(isolated)
+
+    # Retry the suspects one by one, each in its own worker, so a seed that keeps crashing cannot take
+    # other runs down with it.
+    for seed in sorted(suspects):
+      for _ in range(self.retries):
+        self.log.warning(f"Worker crashed while running seed {seed}, retrying.")
+        crashed, _ = self._run_pool([seed], 1, output, results)
+        if not crashed:
+          break
+      else:
+        self._write({'seed': seed, 'status': STATUS_CRASHED, 'attempts': self.retries + 1}, output, results)
+
+    return results
+
+  def _run_pool(self, seeds: List[int], workers: int | None, output: TextIO,
+                results: List[Result]) -> Tuple[List[int], Set[int]]:
+    # Returns the seeds whose run failed with the pool, and the seeds a worker started.
+    crashed: List[int] = []
+    started = multiprocessing.SimpleQueue()
+    started_seeds: Set[int] = set()
+    # Read the started seeds while the workers run: once the pipe is full, they would block announcing more.
+    reader = threading.Thread(target=_read_started, args=(started, started_seeds), name='started-seeds', daemon=True)
+    reader.start()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(started,))
+    try:
+      pending: Dict[Future, int] = {
+        executor.submit(_run_started, self.run, self.filename, seed, self.max_frames, self.fixed_dt): seed
+        for seed in seeds
+      }
+      while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          seed = pending.pop(future)
+          try:
+            result = future.result()
+          except BrokenProcessPool:
+            crashed.append(seed)
+            continue
+          except Exception as e:
+            result = {'seed': seed, 'status': STATUS_ERROR, 'error': repr(e)}
+          self._write(result, output, results)
+    finally:
+      executor.shutdown(wait=True, cancel_futures=True)
+      started.put(None)
+      reader.join()
+      started.close()
+
+    return sorted(crashed), started_seeds
+
+  def _write(self, result: Result, output: TextIO, results: List[Result]) -> None:
+    output.write(json.dumps(result) + '\n')
+    output.flush()
+    results.append(result)
@@ -0,0 +1,341 @@
+import copy
+import csv
+import itertools
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import mean
+from time import time
+from typing import Any, Dict, Iterator, List, Sequence, TextIO, Tuple
+import yaml
+
+from creatures.app.io import Loader
+from creatures.core.util import percentile
+
+DEFAULT_SWEEP_FRAMES = 600
+
+Path = List[str | int]
+Variant = Dict[str, Any]
+Result = Dict[str, Any]
+
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[(\d+|\*)\]")
+
+
+class SweepException(Exception):
+  def __init__(self, msg: str, *args: object) -> None:
+    super().__init__(*args)
+    self.msg = msg
+
+  def __str__(self) -> str:
+    return f"Sweep exception: {self.msg}"
+
+
+def parse_path(path: str) -> Path:
+  """
+  Split a scenario path such as `frame.world.generators[0].quantity` into keys and list indexes.
+  `[*]` stands for every item of a list.
+
+  Args:
+    path (str): The dotted path.
+
+  Returns:
+    Path: The keys (str) and indexes (int, or '*').
+  """
+  tokens: Path = []
+  position = 0
+  for match in _PATH_TOKEN.finditer(path):
+    separator = path[position:match.start()]
+    if separator not in ('', '.'):
+      raise SweepException(f"Invalid path '{path}'")
+    key, index = match.groups()
+    tokens.append(key if key is not None else (index if index == '*' else int(index)))
+    position = match.end()
+
+  if not tokens or position != len(path):
+    raise SweepException(f"Invalid path '{path}'")
+  return tokens
+
+
+def set_path(content: Any, path: Path, value: Any, name: str = '') -> None:
+  """
+  Set a value inside a parsed scenario. Every step of the path must exist, except the last key.
+
+  Args:
+    content (Any): The scenario dictionary.
+    path (Path): The path, from `parse_path()`.
+    value (Any): The value to set.
+    name (str): The path as written, for error messages.
+  """
+  token, rest = path[0], path[1:]
+  if token == '*':
+    if not isinstance(content, list):
+      raise SweepException(f"'{name}': [*] used on something that is not a list")
+    for index in range(len(content)):
+      set_path(content, [index] + rest, value, name)
+    return
+
+  if isinstance(token, int):
+    if not isinstance(content, list) or token >= len(content):
+      raise SweepException(f"'{name}': index [{token}] does not exist")
+  elif not isinstance(content, dict) or (rest and token not in content):
+    raise SweepException(f"'{name}': key '{token}' does not exist")
+
+  if rest:
+    set_path(content[token], rest, value, name)
+  else:
+    content[token] = value
+
+
+def parameter_values(name: str, spec: Any) -> List[Any]:
+  """
+  Expand the values of one swept parameter: a list, a single value, or an inclusive range given
+  as `{from: <first>, to: <last>, step: <step>}`.
+
+  Args:
+    name (str): The parameter path, for error messages.
+    spec (Any): The value specification.
+
+  Returns:
+    List[Any]: The values.
+  """
+  if isinstance(spec, list):
+    return spec
+  if not isinstance(spec, dict):
+    return [spec]
+
+  try:
+    first, last, step = spec['from'], spec['to'], spec.get('step', 1)
+  except KeyError as e:
+    raise SweepException(f"'{name}': a range needs 'from' and 'to', missing {e}")
+  if step <= 0 or last < first:
+    raise SweepException(f"'{name}': invalid range {spec}")
+
+  count = int(round((last - first) / step, 9)) + 1
+  return [first + i * step for i in range(count)]
+
+
+class Sweep(object):
+  """
+  A parameter sweep: a base scenario, the scenario values to vary, and how to run each variant.
+
+  The spec is a dictionary, usually loaded from YAML:
+
+    scenario: scenarios/generator_random.yml
+    seeds: [1, 2, 3]        # Optional, defaults to [1].
+    frames: 600             # Optional, steps per run.
+    fixed_dt: 16            # Optional, step size in milliseconds.
+    budget_ms: 16           # Optional, frame time budget reported in the table.
+    parameters:
+      frame.world.generators[0].quantity: [5, 50, 500]
+      frame.world.generators[0].template.sensors[0].radius: {from: 10, to: 50, step: 10}
+
+  Every combination of parameter values is a variant, built in memory from the base scenario.
+
+  Attributes:
+    scenario (str): The base scenario file.
+    content (dict): The parsed base scenario.
+    parameters (Dict[str, List[Any]]): The values of each swept path.
+    seeds (List[int]): The seeds every variant runs with.
+    frames (int): Steps per run.
+    fixed_dt (float | None): Step size in milliseconds. None uses the scenario's.
+    budget_ms (float | None): Frame time budget, in milliseconds.
+
+  Methods:
+    variants(): Get the parameter values of each variant.
+    build(variant): Build the scenario of a variant.
+    run(workers, progress): Run every variant with every seed.
+  """
+  def __init__(self, spec: Dict[str, Any]) -> None:
+    """
+    Initialize a Sweep object.
+
+    Args:
+      spec (dict): The sweep specification.
+    """
+    if 'scenario' not in spec:
+      raise SweepException("A sweep needs a 'scenario'")
+    self.log = logging.getLogger(self.__class__.__name__)
+    self.scenario: str = spec['scenario']
+    with open(self.scenario) as fd:
+      self.content: Dict[str, Any] = yaml.safe_load(fd)
+    self.parameters: Dict[str, List[Any]] = {name: parameter_values(name, values) for name, values in spec.get('parameters', {}).items()}
+    self._paths: Dict[str, Path] = {name: parse_path(name) for name in self.parameters}
+    self.seeds: List[int] = list(spec.get('seeds', [1]))
+    self.frames: int = int(spec.get('frames', DEFAULT_SWEEP_FRAMES))
+    self.fixed_dt: float | None = spec.get('fixed_dt')
+    self.budget_ms: float | None = spec.get('budget_ms')
+
+    # Fail on a bad path now rather than in every worker.
+    for variant in itertools.islice(self.variants(), 1):
+      self.build(variant)
+
+  def variants(self) -> Iterator[Variant]:
+    """
+    Get the parameter values of each variant: the cartesian product of all parameter values.
+
+    Returns:
+      Iterator[Variant]: Each variant, as a path to value dictionary.
+    """
+    names = list(self.parameters)
+    for values in itertools.product(*(self.parameters[n] for n in names)):
+      yield dict(zip(names, values))
+
+  def build(self, variant: Variant) -> Dict[str, Any]:
+    """
+    Build the scenario of a variant, without touching the base scenario.
+
+    Args:
+      variant (Variant): The parameter values.
+
+    Returns:
+      dict: The scenario content.
+    """
+    content = copy.deepcopy(self.content)
+    for name, value in variant.items():
+      set_path(content, self._paths[name], value, name)
+    return content
+
+  def run(self, workers: int = None, progress: TextIO = None) -> List[Result]:
+    """
+    Run every variant with every seed on a pool of worker processes.
+
+    Args:
+      workers (int): Number of worker processes. Defaults to one per CPU.
+      progress (TextIO): Where to report each finished run, if anywhere.
+
+    Returns:
+      List[Result]: One result per run, ordered by variant then seed.
+    """
+    jobs: List[Tuple[int, Variant, int]] = [
+      (index, variant, seed) for index, variant in enumerate(self.variants()) for seed in self.seeds
+    ]
+    results: Dict[Tuple[int, int], Result] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      futures = {
+        executor.submit(run_variant, self.build(variant), seed, self.frames, self.fixed_dt): (index, variant, seed)
+        for index, variant, seed in jobs
+      }
+      for future in as_completed(futures):
+        index, variant, seed = futures[future]
+        try:
+          result = future.result()
+        except Exception as e:
+          result = {'error': repr(e)}
+        result = {'variant': index, **variant, 'seed': seed, **result}
+        results[(index, seed)] = result
+        if progress:
+          progress.write(f"[{len(results)}/{len(jobs)}] {_describe(result)}\n")
+          progress.flush()
+
+    return [results[(index, seed)] for index, _, seed in jobs]
+
+
+def run_variant(content: Dict[str, Any], seed: int, frames: int, fixed_dt: float = None) -> Result:
+  """
+  Load a scenario from memory and run it headless for a number of steps. Meant to run in a worker process.
+
+  Args:
+    content (dict): The scenario content.
+    seed (int): The random seed.
+    frames (int): The number of steps.
+    fixed_dt (float): Step size in milliseconds. Defaults to the scenario's `fixed_dt`.
+
+  Returns:
+    Result: Wall-clock frame times in milliseconds and the final population.
+  """
+  logging.disable(logging.INFO)
+  world = Loader.from_dict(content, random_seed=seed).load().world
+  initial_population = world.stats.population or len(world.entities())
+  frame_times: List[float] = []
+  start = time()
+  try:
+    for _ in range(frames):
+      world.step(fixed_dt)
+      frame_times.append(world.stats.internal_dt)
+  finally:
+    world.shutdown()
+  run_time = time() - start
+
+  frame_times.sort()
+  return {
+    'initial_population': initial_population,
+    'final_population': world.stats.population,
+    'removed_count': world.stats.removed_count,
+    'mean_frame_ms': mean(frame_times) if frame_times else 0.0,
+    'p95_frame_ms': percentile(frame_times, 95),
+    'max_frame_ms': frame_times[-1] if frame_times else 0.0,
+    'run_time': run_time,
+  }
+
+
+def summarize(sweep: Sweep, results: Sequence[Result]) -> List[Dict[str, Any]]:
+  """
+  Aggregate the runs of each variant into one row: the mean over seeds of every metric, the worst
+  p95 frame time, and whether it exceeds the sweep's budget.
+
+  Args:
+    sweep (Sweep): The sweep.
+    results (Sequence[Result]): The results of `Sweep.run()`.
+
+  Returns:
+    List[Dict[str, Any]]: One row per variant.
+  """
+  rows: List[Dict[str, Any]] = []
+  by_variant: Dict[int, List[Result]] = {}
+  for result in results:
+    by_variant.setdefault(result['variant'], []).append(result)
+
+  for index, variant in enumerate(sweep.variants()):
+    runs = [r for r in by_variant.get(index, []) if 'error' not in r]
+    row: Dict[str, Any] = {'variant': index, **variant, 'runs': len(runs), 'errors': len(by_variant.get(index, [])) - len(runs)}
+    if runs:
+      for metric in ('initial_population', 'final_population', 'removed_count', 'mean_frame_ms', 'p95_frame_ms'):
+        row[metric] = mean(r[metric] for r in runs)
+      row['worst_p95_frame_ms'] = max(r['p95_frame_ms'] for r in runs)
+      row['max_frame_ms'] = max(r['max_frame_ms'] for r in runs)
+      if sweep.budget_ms is not None:
+        row['over_budget'] = row['p95_frame_ms'] > sweep.budget_ms
+    rows.append(row)
+  return rows
+
+
+def write_csv(rows: Sequence[Dict[str, Any]], output: TextIO) -> None:
+  """
+  Write table rows as CSV.
+
+  Args:
+    rows (Sequence[Dict[str, Any]]): The rows.
+    output (TextIO): Where to write.
+  """
+  columns = list(dict.fromkeys(column for row in rows for column in row))
+  writer = csv.DictWriter(output, fieldnames=columns)
+  writer.writeheader()
+  writer.writerows(rows)
+
+
+def format_table(rows: Sequence[Dict[str, Any]]) -> str:
+  """
+  Format table rows as aligned text columns.
+
+  Args:
+    rows (Sequence[Dict[str, Any]]): The rows.
+
+  Returns:
+    str: The table.
+  """
+  columns = list(dict.fromkeys(column for row in rows for column in row))
+  cells = [[_format(row.get(column, '')) for column in columns] for row in rows]
+  widths = [max([len(c)] + [len(line[i]) for line in cells]) for i, c in enumerate(columns)]
+  lines = ['  '.join(c.rjust(w) for c, w in zip(columns, widths))]
+  lines.extend('  '.join(c.rjust(w) for c, w in zip(line, widths)) for line in cells)
+  return '\n'.join(lines)
+
+
+def _format(value: Any) -> str:
+  return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def _describe(result: Result) -> str:
+  if 'error' in result:
+    return f"variant {result['variant']} seed {result['seed']}: {result['error']}"
+  return f"variant {result['variant']} seed {result['seed']}: p95 {result['p95_frame_ms']:.2f}ms, {result['run_time']:.2f}s"
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Dict, Set, Iterable, List
 from creatures.core.component.component import Component
 from creatures.core.entity import Entity
+from creatures.core.spatial import entity_distance_squared, k_nearest
 from .reasoners.diet import DietReasoner
 from .reasoners.diet import HerbivoreDietReasoner
 
@@ -10,6 +11,12 @@ if TYPE_CHECKING:
   from creatures.app.creatures.creature import Creature
 
 
+def _by_id(entity: Entity) -> str:
+  # Detected entities are kept in a set, whose order changes from run to run. Sorting by id keeps
+  # decisions reproducible, including in a world restored from a snapshot.
+  return entity.id
+
+
 class BrainComponent(Component):
   def __init__(
     self,
@@ -35,6 +42,9 @@ class BrainComponent(Component):
   def is_predator(self, entity: Entity) -> bool:
     return self.creature.is_herbivore and entity.type.lower() == 'creature'
 
+  def _by_distance(self, entity: Entity) -> tuple:
+    return (entity_distance_squared(self.creature.entity, entity), entity.id)
+
   @property
   def hungry(self) -> bool:
     return self.creature.energy.current < self.hunger_threshold
@@ -45,11 +55,20 @@ class BrainComponent(Component):
 
   @property
   def detected_edibles(self) -> Iterable[Entity]:
-    return sorted(list(filter(self.is_edible, self.detected)), key=self.creature.distance)
+    return sorted(filter(self.is_edible, self.detected), key=self._by_distance)
+
+  def nearest_edibles(self, k: int = 1) -> List[Entity]:
+    # Keeps only the k nearest while scanning, instead of sorting every detected edible.
+    return k_nearest(self.creature.movement.position, self.detected, k, self.is_edible)
+
+  @property
+  def nearest_edible(self) -> Entity | None:
+    nearest = self.nearest_edibles(1)
+    return nearest[0] if nearest else None
 
   @property
   def detected_predators(self) -> Iterable[Entity]:
-    return list(filter(self.is_predator, self.detected))
+    return sorted(filter(self.is_predator, self.detected), key=_by_id)
 
   @property
   def detected_in_grab_range(self) -> Iterable[Entity]:
@@ -57,4 +76,5 @@ class BrainComponent(Component):
 
   @property
   def food_in_grab_range(self) -> List[Entity]:
-    return sorted(list(filter(self.creature.in_grab_range, self.detected_edibles)), key=self.creature.distance)
+    # detected_edibles are sorted by distance already.
+    return list(filter(self.creature.in_grab_range, self.detected_edibles))
@@ -1,63 +1,87 @@
 import logging
-from typing import List, Set
+from typing import Dict, List, Sequence, Set, Tuple
 
+from creatures.app.action import ActionComponent
 from creatures.app.brain.brain_component import BrainComponent
 from creatures.app.creatures.creature import Creature
 from creatures.app.desire import Wander
 from creatures.app.desire.MoveTo import MoveTo
 from creatures.app.desire.desire_abstract import DesireComponent, Desire
 from creatures.app.desire import Grab, MoveAway
+from creatures.core.component.component import EnergyComponent, MetaDataComponent, MovementComponent
 from creatures.core.entity import Entity
+from creatures.core.spatial import k_nearest
 from creatures.app.location.location import Location
 from creatures.app.sensor.sensor_component import SensorComponent
-from creatures.core.system import System
+from creatures.core.system import ParallelSystem, DEFAULT_CHUNK_SIZE
 from creatures.core.world import World
 
+Decision = Tuple[BrainComponent, Dict[str, float], Desire | None, bool]
 
-class BrainSystem(System):
-  def __init__(self, world: World) -> None:
-    super().__init__(world)
+
+class BrainSystem(ParallelSystem):
+  component_types = (BrainComponent,)
+  reads = (SensorComponent, EnergyComponent, MovementComponent, MetaDataComponent, ActionComponent)
+  writes = (BrainComponent, DesireComponent)
+
+  def __init__(self, world: World, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    super().__init__(world, workers=workers, chunk_size=chunk_size)
     self.log = logging.getLogger(self.__class__.__name__)
     self.world = world
-  
-  def update(self, entities: List[Entity]):
+
+  def process_chunk(self, entities: Sequence[Entity]) -> List[Decision]:
+    decisions: List[Decision] = []
     for entity in entities:
       brain_component: BrainComponent = entity.get_component(BrainComponent)
       if brain_component:
+        decisions.append(self.decide(brain_component))
+    return decisions
+
+  def merge(self, results: List[List[Decision]]):
+    for decisions in results:
+      for brain_component, input_neurons, desire, satisfied in decisions:
+        brain_component.input_neurons = input_neurons
+        if desire is None:
+          continue
+
         creature = brain_component.creature
-        brain_component.input_neurons = {
-          'hunger': 1 - creature.energy.ratio,
-          'detected_entity': 1.0 if creature.detected else 0.0,
-          'detected_food': 1.0 if brain_component.detected_edibles else 0.0,
-          'detected_predator': 1.0 if brain_component.detected_predators else 0.0,
-          'entity_in_grab_range': 1.0 if brain_component.detected_in_grab_range else 0.0,
-          'food_in_grab_range': 1.0 if brain_component.food_in_grab_range else 0.0
-        }
-
-        default_desire = Wander(creature.entity, world=self.world)
-        desire_candidates: List[Desire] = []
-        hunger = brain_component.input_neurons['hunger'] > brain_component.hunger_threshold
-        detected_food = brain_component.input_neurons['detected_food']
-        detected_predator = brain_component.input_neurons['detected_predator']
-        entity_in_grab_range = brain_component.input_neurons['entity_in_grab_range']
-        food_in_grab_range = brain_component.input_neurons['food_in_grab_range']
-
-        if creature.desire.__class__.__name__ != default_desire.__class__.__name__:
-          if creature.desire.satisfied():
-            self.log.info(f"Creature {creature.metadata.name} satisfied its desire to {str(creature.desire).lower()}.")
-            creature.desire = default_desire
-            self.log.info(f"Creature {creature.metadata.name} decided to {str(creature.desire).lower()}.")
-        else:
-          if hunger and (food_in_grab_range or detected_food):
-            food_in_grab_range = brain_component.food_in_grab_range
-            target = food_in_grab_range[0] if food_in_grab_range else brain_component.detected_edibles[0]
-            desire_candidates.append(Grab(creature.entity, target, self.world))
-          if detected_predator:
-            desire_candidates.append(MoveAway(creature.entity, brain_component.detected_predators))
-
-        if desire_candidates:
-          creature.desire = desire_candidates[0]
-          self.log.info(f"Creature {creature.metadata.name} decided to {str(creature.desire).lower()}.")
+        if satisfied:
+          self.log.info(f"Creature {creature.metadata.name} satisfied its desire to {str(creature.desire).lower()}.")
+        creature.desire = desire
+        self.log.info(f"Creature {creature.metadata.name} decided to {str(creature.desire).lower()}.")
+
+  def decide(self, brain_component: BrainComponent) -> Decision:
+    # Only reads: the new input neurons and desire (None keeps the current one) are applied by merge().
+    creature = brain_component.creature
+    # Grab range is a radius: some food is in range exactly when the nearest food is.
+    nearest_edible = brain_component.nearest_edible
+    predators = brain_component.detected_predators
+    input_neurons = {
+      'hunger': 1 - creature.energy.ratio,
+      'detected_entity': 1.0 if creature.detected else 0.0,
+      'detected_food': 1.0 if nearest_edible is not None else 0.0,
+      'detected_predator': 1.0 if predators else 0.0,
+      'entity_in_grab_range': 1.0 if any(map(creature.in_grab_range, brain_component.detected)) else 0.0,
+      'food_in_grab_range': 1.0 if nearest_edible is not None and creature.in_grab_range(nearest_edible) else 0.0
+    }
+
+    default_desire = Wander(creature.entity, world=self.world)
+    desire_candidates: List[Desire] = []
+    hunger = input_neurons['hunger'] > brain_component.hunger_threshold
+    detected_food = input_neurons['detected_food']
+    detected_predator = input_neurons['detected_predator']
+    food_in_grab_range = input_neurons['food_in_grab_range']
+
+    if creature.desire.__class__.__name__ != default_desire.__class__.__name__:
+      if creature.desire.satisfied():
+        return brain_component, input_neurons, default_desire, True
+    else:
+      if hunger and (food_in_grab_range or detected_food):
+        desire_candidates.append(Grab(creature.entity, nearest_edible, self.world))
+      if detected_predator:
+        desire_candidates.append(MoveAway(creature.entity, predators))
+
+    return brain_component, input_neurons, desire_candidates[0] if desire_candidates else None, False
 
   def wander(self, creature: Creature):
     creature.desire = Wander(None, world=self.world) # TODO: Movement System should restrict bounds, not Desire.
@@ -71,13 +95,7 @@ class BrainSystem(System):
       return self.nearest_edible(brain, detected_entities)
 
   def nearest_edible(self, brain: BrainComponent, detected_entities: Set[Entity]) -> Entity | None:
-      edibles = sorted(
-        list(
-          filter(
-            lambda e: brain.is_edible(e), detected_entities)
-          ),
-        key=lambda x: x.distance(brain.creature.entity)
-      )
+      edibles = k_nearest(brain.creature.movement.position, detected_entities, 1, brain.is_edible)
       return edibles[0] if edibles else None
 
 class Consciousness(object):
@@ -5,6 +5,7 @@ from creatures.app.desire import MoveTo, StayStill, Wander
 from creatures.app.desire.desire_abstract import Desire, DesireComponent
 from creatures.core.entity import Entity
 from creatures.core.primitives import Vector
+from creatures.core.spatial import entities_in_radius
 from creatures.app.sensor.sensor import RadialSensor, Sensor
 from creatures.app.sensor.sensor_component import SensorComponent
 from creatures.app.brain.reasoners.diet import HerbivoreDietReasoner, CarnivoreDietReasoner
@@ -57,7 +58,7 @@ class Creature(object):
     return self.entity.distance(entity)
 
   def in_grab_range(self, entity: Entity) -> bool:
-    return self.distance(entity) <= self.grab_radius
+    return entities_in_radius(self.entity, entity, self.grab_radius)
 
   @property
   def desire(self) -> Desire:
@@ -5,6 +5,7 @@ from creatures.app.desire.MoveTo import MoveTo
 from creatures.app.action import ActionComponent
 from creatures.app.desire.desire_abstract import Desire
 from creatures.core.entity import Entity
+from creatures.core.spatial import entities_in_radius
 from creatures.app.location import Location
 from creatures.core.world import World
 
@@ -23,7 +24,7 @@ class Grab(Desire):
     if self.satisfied():
       return
 
-    target_in_grab_range: bool = self.entity.distance(self.resource) <= self.grab_radius
+    target_in_grab_range: bool = entities_in_radius(self.entity, self.resource, self.grab_radius)
     if target_in_grab_range:
       self.action_component.action = app.action.Grab(self.entity, self.resource)
       self._satisfied = True
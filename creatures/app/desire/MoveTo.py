@@ -20,7 +20,7 @@ class MoveTo(Desire):
     
     if not action_component:
       action_component = ActionComponent()
-      self.entity.add_component(action_component)
+      self._add_component(action_component, world)
     
     action_component.action = Move(self.entity, direction)
 
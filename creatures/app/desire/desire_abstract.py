@@ -22,6 +22,14 @@ class Desire(object):
   
   @abstractmethod
   def to_dict(self): pass
+
+  def _add_component(self, component: Component, world=None) -> None:
+    # In a world, the component is added through its command buffer, at the next sync point.
+    world = world if world is not None else self.entity.world
+    if world is not None:
+      world.commands.add_component(self.entity, component)
+    else:
+      self.entity.add_component(component)
   
   @property
   def entity(self):
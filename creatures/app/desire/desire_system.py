@@ -1,11 +1,18 @@
 
 from typing import List
 from .desire_abstract import DesireComponent
+from creatures.app.action.action import ActionComponent
+from creatures.core.component import MovementComponent
 from creatures.core.entity import Entity
+from creatures.core import random_generator
 from creatures.core.system import System
 
 
 class DesireSystem(System):
+  component_types = (DesireComponent,)
+  reads = (DesireComponent, MovementComponent)
+  writes = (ActionComponent, random_generator.RESOURCE)
+
   def __init__(self, world) -> None:
     super().__init__(world)
 
@@ -20,7 +20,7 @@ class MoveAway(Desire):
     action_component = self.entity.get_component(ActionComponent)
     if not action_component:
       action_component = ActionComponent()
-      self.entity.add_component(action_component)
+      self._add_component(action_component, world)
 
     action_component.action = Move(self.entity, direction)
 
@@ -1,13 +1,16 @@
 import logging
 from typing import List
 from creatures.core.entity import Entity
-from creatures.core.primitives import Vector
 from creatures.core.system import System
 from creatures.core.component.component import EnergyComponent
 from creatures.core.world import World
 
 
 class EnergySystem(System):
+  component_types = (EnergyComponent,)
+  reads = ()
+  writes = (EnergyComponent,)
+
   def __init__(self, world: World) -> None:
     super().__init__(world)
     self.log = logging.getLogger(EnergySystem.__name__)
@@ -16,10 +19,9 @@ class EnergySystem(System):
     for entity in entities:
       energy_component: EnergyComponent = entity.get_component(EnergyComponent)
       if energy_component:
-        energy_component.current -= energy_component.rate * self.world.dt
+        energy_component.current -= energy_component.rate * self.dt
         energy_component.current = max(0.0, energy_component.current)
-        self.log.debug(f"{entity.name}: {energy_component.current} | {energy_component.rate} * {self.world.dt} = {energy_component.rate * self.world.dt}")
+        self.log.debug(f"{entity.name}: {energy_component.current} | {energy_component.rate} * {self.dt} = {energy_component.rate * self.dt}")
 
         if energy_component.current <= 0:
-          entity.movement.velocity = Vector(0,0)
           entity.mark_remove()
@@ -1,4 +1,6 @@
-from typing import Any, Callable, Dict, List, Type
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Tuple, Type
+import copy
 import time
 import yaml
 import logging
@@ -8,19 +10,24 @@ from creatures.app.desire import Grab, MoveTo, StayStill, Wander
 from creatures.core.component.component import EnergyComponent, MetaDataComponent, MovementComponent
 
 from creatures.core.entity import Entity
-from creatures.app.location import Location, Somewhere
+from creatures.app.location import EntityPosition, Location, Somewhere
 from creatures.core.primitives import Vector
 from creatures.app.sensor.sensor import RadialSensor, Sensor
 from creatures.app.sensor.sensor_component import SensorComponent
 from creatures.app.desire.desire_abstract import Desire, DesireComponent
-from creatures.core.world import Frame, World, DEFAULT_TIME_RESOLUTION
+from creatures.core.world import Frame, World, SystemScheduler, DEFAULT_WORKERS, DEFAULT_TIME_RESOLUTION, DEFAULT_MAX_CATCH_UP, MOVEMENT_BACKEND_OBJECT, MOVEMENT_BACKENDS
+from creatures.core.spatial import DEFAULT_CELL_SIZE
 from creatures.core.random_generator import generator as random_gen
 from creatures.app.desire import DesireSystem
 from creatures.app.action import ActionSystem
 from creatures.app.brain import BrainSystem
 from creatures.app.energy import EnergySystem
 from creatures.app.sensor import SensorSystem
+from creatures.app.recorder import RecorderSystem
+from creatures.app.replay import DeltaLogSystem
 from creatures.core.movement import MovementSystem
+from creatures.core.system import System
+from creatures.core.util import tracer
 
 from .generator import GeneratorLoader
 
@@ -43,10 +50,16 @@ class Loader(object):
     'movementsystem': MovementSystem,
     'energysystem': EnergySystem
   }
+  # Systems that can be listed in a scenario, but are not loaded by default.
+  OPTIONAL_SYSTEMS = {
+    'recordersystem': RecorderSystem,
+    'deltalogsystem': DeltaLogSystem,
+  }
 
-  def __init__(self, filename, random_seed=None) -> None:
+  def __init__(self, filename, random_seed=None, content: Dict[str, Any] = None) -> None:
     self.log = logging.getLogger(self.__class__.__name__)
     self.filename = filename
+    self.content = content
     self.loader_methods: Dict[str, Callable] = {f: getattr(Loader, f) for f in dir(Loader) if callable(getattr(Loader, f)) and "_load" in f}
     self.entity_by_id: Dict[str, Entity] = {}
     self.desire_by_entity_id: Dict[str, Desire] = {}
@@ -66,13 +79,27 @@ class Loader(object):
     number = frame_dict.get('number', 0)
     world_dict = frame_dict.get('world', None)
 
-    world = self._load_world(world_dict)
+    with tracer.span('Loader._load_world', 'loader'):
+      world = self._load_world(world_dict)
 
     frame = Frame(world)
     frame.number = number
 
     return frame
   
+  def _load_scheduler(self, parallel: bool | Dict[str, Any] | None) -> SystemScheduler | None:
+    if not parallel:
+      return None
+    if parallel is True:
+      parallel = {}
+    if not isinstance(parallel, dict):
+      raise ParseException(f"'parallel' must be a boolean or a mapping with 'workers' and 'validate', got {parallel}")
+
+    try:
+      return SystemScheduler(workers=parallel.get('workers', DEFAULT_WORKERS), validate=parallel.get('validate', False))
+    except ValueError as e:
+      raise ParseException(f"Invalid 'parallel' options: {e}")
+
   def _load_world(self, world_dict: Dict[str, Any]) -> World:
     self._check_type(world_dict, World)
     
@@ -80,6 +107,14 @@ class Loader(object):
     height = world_dict.get('height', 100)
     world_random_seed = world_dict.get('random_seed', int(time.time()))
     time_resolution = world_dict.get('time_resolution', DEFAULT_TIME_RESOLUTION)
+    cell_size = world_dict.get('cell_size', DEFAULT_CELL_SIZE)
+    movement_backend = world_dict.get('movement_backend', MOVEMENT_BACKEND_OBJECT)
+    fixed_dt = world_dict.get('fixed_dt', None)
+    max_catch_up = world_dict.get('max_catch_up', DEFAULT_MAX_CATCH_UP)
+    system_timings = world_dict.get('system_timings', True)
+    if movement_backend not in MOVEMENT_BACKENDS:
+      raise ParseException(f"Movement backend '{movement_backend}' is not available. Options are {list(MOVEMENT_BACKENDS)}")
+    scheduler = self._load_scheduler(world_dict.get('parallel'))
     generator_dicts_list: List[Dict[str, Any]] = world_dict.get('generators', [])
     entities = world_dict.get('entities', [])
 
@@ -87,7 +122,18 @@ class Loader(object):
     random_gen.seed(real_random_seed)
 
     self.log.info(f"Using random seed: {real_random_seed}")
-    world = World(width, height, random_seed=real_random_seed, time_resolution=time_resolution)
+    world = World(
+      width,
+      height,
+      random_seed=real_random_seed,
+      time_resolution=time_resolution,
+      cell_size=cell_size,
+      movement_backend=movement_backend,
+      fixed_dt=fixed_dt,
+      max_catch_up=max_catch_up,
+      scheduler=scheduler,
+      system_timings=bool(system_timings)
+    )
 
     self.world = world
 
@@ -98,15 +144,18 @@ class Loader(object):
     else:
       self._load_default_systems()
 
-    generator_loader = GeneratorLoader()
-    for generator_dict in generator_dicts_list:
-      generator = generator_loader.load(generator_dict)
-      entities.extend(generator.generate())
+    with tracer.span('Loader.generators', 'loader'):
+      generator_loader = GeneratorLoader()
+      for generator_dict in generator_dicts_list:
+        generator = generator_loader.load(generator_dict)
+        entities.extend(generator.generate())
 
-    for entity_dict in entities:
-      world.add(self._load_entity(entity_dict))
+    with tracer.span('Loader._load_entity', 'loader'):
+      for entity_dict in entities:
+        world.add(self._load_entity(entity_dict))
     
-    self._attach_entity_desires()
+    with tracer.span('Loader._attach_entity_desires', 'loader'):
+      self._attach_entity_desires()
     
     return world
 
@@ -222,7 +271,7 @@ class Loader(object):
     location = None
     if isinstance(location_dict, str):
       entity = self._lookup_entity(location_dict)
-      location = Location(lambda: entity.movement.position)
+      location = Location(EntityPosition(entity))
     elif isinstance(location_dict, dict):
       if location_dict.get('type', '') == Entity.__name__:
         target = self._lookup_entity(location_dict.get('location'))
@@ -269,28 +318,78 @@ class Loader(object):
     return entity
 
   def load(self) -> Frame:
+    """
+    Load the scenario. If the loader was given `content`, it is used instead of reading `filename`;
+    it is copied first, so the same content can be loaded many times.
+    """
     self.log.info(self.filename)
-    content = self._load_yaml(self.filename)
-    return self._load_frame(content['frame'])
+    with tracer.span('Loader.load', 'loader'):
+      with tracer.span('Loader._load_yaml', 'loader'):
+        content = copy.deepcopy(self.content) if self.content is not None else self._load_yaml(self.filename)
+      if not isinstance(content, dict) or 'frame' not in content:
+        raise ParseException(f"Scenario {self.filename or ''} has no 'frame' section")
+      return self._load_frame(content['frame'])
+
+  @classmethod
+  def from_dict(cls, content: Dict[str, Any], random_seed=None, name: str = '<dict>') -> Loader:
+    """
+    Create a loader for a scenario already parsed into a dictionary, such as a variant built in memory.
+
+    Args:
+      content (dict): The scenario, with the same structure as the YAML files.
+      random_seed: The random seed. Overrides the scenario's.
+      name (str): A name for the scenario, used in log messages.
+
+    Returns:
+      Loader: The loader.
+    """
+    return cls(name, random_seed=random_seed, content=content)
 
   def _load_yaml(self, filename: str) -> Dict[Any, Any]:
     with open(filename) as fd:
       return yaml.safe_load(fd)
 
   def _make_location_func(self, entity: Entity) -> Callable:
-    return lambda: entity.movement.position
+    return EntityPosition(entity)
 
   def _load_default_systems(self):
     for system_type in Loader.BUILTIN_SYSTEMS.values():
       self.world.add_system(system_type(self.world))
 
-  def _load_systems(self, systems_dict: Dict[str, Any] | List[str]):
-    for name in systems_dict:
+  def _load_systems(self, systems_dict: Dict[str, Any] | List[str | Dict[str, Any]]):
+    for entry in systems_dict:
+      name, options = self._system_entry(entry)
       system_name = name.lower()
-      if system_name in Loader.BUILTIN_SYSTEMS:
-        self.world.add_system(Loader.BUILTIN_SYSTEMS[system_name](self.world))
+      system_type = Loader.BUILTIN_SYSTEMS.get(system_name, Loader.OPTIONAL_SYSTEMS.get(system_name))
+      if system_type is not None:
+        self.world.add_system(self._load_system(system_type, options))
       else:
         self.log.warning(
           f"System name '{system_name}' not found in Built in systems and will NOT be loaded."
-          f"Options are {list(Loader.BUILTIN_SYSTEMS.keys())}"
+          f"Options are {list(Loader.BUILTIN_SYSTEMS.keys()) + list(Loader.OPTIONAL_SYSTEMS.keys())}"
         )
+
+  def _system_entry(self, entry: str | Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    if isinstance(entry, str):
+      return entry, {}
+    if isinstance(entry, dict) and len(entry) == 1:
+      name, options = next(iter(entry.items()))
+      if options is None:
+        options = {}
+      if isinstance(options, dict):
+        return str(name), dict(options)
+
+    raise ParseException(f"System entry '{entry}' must be a system name or '<SystemName>: {{<options>}}'")
+
+  def _load_system(self, system_type: Type[System], options: Dict[str, Any]) -> System:
+    every = options.pop('every', 1)
+    every_ms = options.pop('every_ms', None)
+    phase = options.pop('phase', 0)
+
+    try:
+      system = system_type(self.world, **options)
+      system.schedule(every=every, every_ms=every_ms, phase=phase)
+    except (TypeError, ValueError) as e:
+      raise ParseException(f"Invalid options for {system_type.__name__}: {e}")
+
+    return system
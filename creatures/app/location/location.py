@@ -32,6 +32,17 @@ class Location(object):
     return str(location_str)
 
 
+class EntityPosition(object):
+  """
+  The current position of an entity, as a callable location target. Unlike a lambda, it can be pickled.
+  """
+  def __init__(self, entity: Entity) -> None:
+    self.entity = entity
+
+  def __call__(self) -> Vector:
+    return self.entity.movement.position
+
+
 class Somewhere(Location):
   def __init__(self, max_x: float = 100, max_y: float = 100) -> None:
     location = Vector(random.random() * max_x, random.random() * max_y)
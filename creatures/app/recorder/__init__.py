@@ -0,0 +1,2 @@
+from .recording import Recording, RecordingException, SlotRecord, COLUMNS
+from .recorder_system import RecorderSystem, DEFAULT_FRAME_BLOCK, DEFAULT_FLUSH_EVERY
@@ -0,0 +1,219 @@
+from __future__ import annotations
+import heapq
+import logging
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from creatures.core.component import MovementComponent, EnergyComponent
+from creatures.core.entity import Entity
+from creatures.core.system import System
+from creatures.core.world import World
+
+from .recording import (CLOCK_FILE, COLUMNS, DTYPE, FRAMES_FILE, RecordingException, SlotRecord, frames_shape,
+                        read_meta, write_entities, write_meta)
+
+DEFAULT_FRAME_BLOCK = 4096
+DEFAULT_FLUSH_EVERY = 1000
+MIN_SLOTS = 64
+
+
+class RecorderSystem(System):
+  """
+  Records the position, velocity and energy of every moving entity on each run into files mapped in
+  memory, so a long run never keeps its history in RAM. See `Recording` to read it back.
+
+  Files are grown in blocks of `frame_block` frames. Entities get a column slot when first recorded and
+  give it back when they leave the world. When more entities are in the world than there are slots, the
+  slot count doubles, which rewrites the frames file once.
+
+  Everything recorded so far is flushed to disk every `flush_every` frames and on `shutdown()`, so a
+  reader (or a crash) sees at most that many frames less than were recorded.
+
+  Attributes:
+    path (str): The recording directory.
+    frame_block (int): Frames added to the files each time they are full.
+    flush_every (int): Frames between flushes to disk.
+    frame (int): The number of frames recorded.
+    slot_count (int): The number of entity slots.
+    frame_capacity (int): The number of frames the files can hold before growing.
+    records (List[SlotRecord]): The entity to slot mapping table.
+
+  Methods:
+    update(entities): Record one frame.
+    flush(): Write the recorded frames and tables to disk.
+    shutdown(): Flush and close the files. They are opened again if the system runs after this.
+  """
+  component_types = (MovementComponent,)
+  reads = (MovementComponent, EnergyComponent)
+  writes = ()
+
+  def __init__(self,
+               world: World,
+               path: str,
+               max_entities: int = None,
+               frame_block: int = DEFAULT_FRAME_BLOCK,
+               flush_every: int = DEFAULT_FLUSH_EVERY) -> None:
+    """
+    Initialize a RecorderSystem object. An existing recording in `path` is overwritten.
+
+    Args:
+      world (World): The world instance where the system operates.
+      path (str): The recording directory. Created if needed.
+      max_entities (int): Initial number of entity slots. Defaults to twice the entities in the world on the first frame.
+      frame_block (int): Frames added to the files each time they are full (default is DEFAULT_FRAME_BLOCK).
+      flush_every (int): Frames between flushes to disk (default is DEFAULT_FLUSH_EVERY).
+    """
+    super().__init__(world)
+    if frame_block < 1:
+      raise ValueError(f"{self.__class__.__name__}: 'frame_block' must be at least 1, got {frame_block}")
+    if flush_every < 1:
+      raise ValueError(f"{self.__class__.__name__}: 'flush_every' must be at least 1, got {flush_every}")
+
+    self.log = logging.getLogger(self.__class__.__name__)
+    self.path: str = path
+    self.frame_block: int = int(frame_block)
+    self.flush_every: int = int(flush_every)
+    self.frame: int = 0
+    self.slot_count: int = int(max_entities) if max_entities else 0
+    self.frame_capacity: int = 0
+    self.records: List[SlotRecord] = []
+    self._active: Dict[str, SlotRecord] = {}
+    self._free_slots: List[int] = []
+    self._frames: np.memmap | None = None
+    self._clock: np.memmap | None = None
+
+  def update(self, entities: Sequence[Entity]):
+    """
+    Record one frame.
+
+    Args:
+      entities (Sequence[Entity]): The entities holding a movement component.
+    """
+    if self._frames is None:
+      self._open(len(entities))
+
+    self._assign_slots(entities)
+    if self.frame == self.frame_capacity:
+      self._grow_frames(self.frame_capacity + self.frame_block)
+
+    values = np.empty((len(entities), len(COLUMNS)), dtype=DTYPE)
+    slots = np.empty(len(entities), dtype=np.intp)
+    active = self._active
+    for i, entity in enumerate(entities):
+      movement = entity.movement
+      position, velocity = movement.position, movement.velocity
+      energy = entity.get_component(EnergyComponent)
+      values[i] = (position.x, position.y, velocity.x, velocity.y, energy.current if energy else np.nan)
+      slots[i] = active[entity.id].slot
+
+    row = self._frames[self.frame]
+    row.fill(np.nan)
+    row[slots] = values
+    self._clock[self.frame] = (self.world.tick, self.world.clock)
+    self.frame += 1
+
+    if self.frame % self.flush_every == 0:
+      self.flush()
+
+  def flush(self):
+    """
+    Write the recorded frames and tables to disk.
+    """
+    if self._frames is None:
+      return
+    self._frames.flush()
+    self._clock.flush()
+    write_entities(self.path, self.records)
+    write_meta(self.path, self.frame, self.frame_capacity, self.slot_count)
+
+  def shutdown(self):
+    """
+    Flush and close the files. They are opened again if the system runs after this.
+    """
+    self.flush()
+    self._frames = None
+    self._clock = None
+
+  def _open(self, entity_count: int) -> None:
+    os.makedirs(self.path, exist_ok=True)
+    if self.frame > 0:
+      # Resuming, after shutdown() or in a world restored from a snapshot. The files may have grown since.
+      meta = read_meta(self.path)
+      if meta['slots'] < self.slot_count or meta['frame_capacity'] < self.frame:
+        raise RecordingException(f"The recording in '{self.path}' does not match this recorder anymore")
+      self._free_slots.extend(range(self.slot_count, meta['slots']))
+      heapq.heapify(self._free_slots)
+      self.slot_count, self.frame_capacity = meta['slots'], meta['frame_capacity']
+      self._map('r+')
+      return
+
+    if not self.slot_count:
+      self.slot_count = max(2 * entity_count, MIN_SLOTS)
+    self._free_slots = list(range(self.slot_count))
+    self.frame_capacity = self.frame_block
+    self._map('w+')
+    self.flush()
+
+  def _map(self, mode: str) -> None:
+    self._frames = np.memmap(os.path.join(self.path, FRAMES_FILE), dtype=DTYPE, mode=mode,
+                             shape=frames_shape(self.frame_capacity, self.slot_count))
+    self._clock = np.memmap(os.path.join(self.path, CLOCK_FILE), dtype=np.float64, mode=mode,
+                            shape=(self.frame_capacity, 2))
+
+  def _assign_slots(self, entities: Sequence[Entity]) -> None:
+    active = self._active
+    if len(active) == len(entities) and all(e.id in active for e in entities):
+      return
+
+    present = {e.id for e in entities}
+    for entity_id in [i for i in active if i not in present]:
+      record = active.pop(entity_id)
+      record.last_frame = self.frame - 1
+      heapq.heappush(self._free_slots, record.slot)
+
+    for entity in entities:
+      if entity.id not in active:
+        if not self._free_slots:
+          self._grow_slots(2 * self.slot_count)
+        record = SlotRecord(heapq.heappop(self._free_slots), entity.id, entity.type, self.frame)
+        active[entity.id] = record
+        self.records.append(record)
+
+  def _grow_frames(self, frame_capacity: int) -> None:
+    self._frames.flush()
+    self._clock.flush()
+    for filename, item_size in ((FRAMES_FILE, self._frames.itemsize * self.slot_count * len(COLUMNS)),
+                                (CLOCK_FILE, self._clock.itemsize * 2)):
+      with open(os.path.join(self.path, filename), 'r+b') as fd:
+        fd.truncate(frame_capacity * item_size)
+    self.frame_capacity = frame_capacity
+    self._map('r+')
+
+  def _grow_slots(self, slot_count: int) -> None:
+    self.log.info(f"Growing recording slots from {self.slot_count} to {slot_count}.")
+    old_frames = self._frames
+    old_frames.flush()
+    filename = os.path.join(self.path, FRAMES_FILE)
+    new_frames = np.memmap(filename + '.tmp', dtype=DTYPE, mode='w+', shape=frames_shape(self.frame_capacity, slot_count))
+    for start in range(0, self.frame_capacity, self.frame_block):
+      block = slice(start, start + self.frame_block)
+      new_frames[block, :self.slot_count] = old_frames[block]
+      new_frames[block, self.slot_count:] = np.nan
+    new_frames.flush()
+    del new_frames, old_frames
+    self._frames = None
+    os.replace(filename + '.tmp', filename)
+
+    for slot in range(self.slot_count, slot_count):
+      heapq.heappush(self._free_slots, slot)
+    self.slot_count = slot_count
+    self._map('r+')
+    write_meta(self.path, self.frame, self.frame_capacity, self.slot_count)
+
+  def __getstate__(self):
+    # The files stay on disk; a restored recorder maps them again and continues from its own frame.
+    state = self.__dict__.copy()
+    state.update(_frames=None, _clock=None)
+    return state
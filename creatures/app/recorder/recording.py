@@ -0,0 +1,281 @@
+from __future__ import annotations
+import csv
+import json
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+COLUMNS = ('x', 'y', 'vx', 'vy', 'energy')
+DTYPE = np.float32
+
+META_FILE = 'meta.json'
+FRAMES_FILE = 'frames.f32'
+CLOCK_FILE = 'clock.f64'
+ENTITIES_FILE = 'entities.csv'
+ENTITIES_HEADER = ('slot', 'id', 'type', 'first_frame', 'last_frame')
+
+
+class RecordingException(Exception):
+  def __init__(self, msg: str, *args: object) -> None:
+    super().__init__(*args)
+    self.msg = msg
+
+  def __str__(self) -> str:
+    return f"Recording exception: {self.msg}"
+
+
+class SlotRecord(object):
+  """
+  One stay of an entity in a column slot of a recording. A slot is reused once its entity leaves the world.
+
+  Attributes:
+    slot (int): The slot index.
+    id (str): The entity id.
+    type (str): The entity type.
+    first_frame (int): The first frame the entity was recorded in.
+    last_frame (int | None): The last frame the entity was recorded in. None while it is still in the world.
+  """
+  __slots__ = ('slot', 'id', 'type', 'first_frame', 'last_frame')
+
+  def __init__(self, slot: int, entity_id: str, entity_type: str, first_frame: int, last_frame: int | None = None) -> None:
+    self.slot: int = slot
+    self.id: str = entity_id
+    self.type: str = entity_type
+    self.first_frame: int = first_frame
+    self.last_frame: int | None = last_frame
+
+  def __reduce__(self):
+    return (SlotRecord, (self.slot, self.id, self.type, self.first_frame, self.last_frame))
+
+  def __repr__(self) -> str:
+    return f"{self.__class__.__name__}({self.slot}, {self.id}, {self.first_frame}..{self.last_frame})"
+
+
+def frames_shape(frame_capacity: int, slots: int) -> Tuple[int, int, int]:
+  return (frame_capacity, slots, len(COLUMNS))
+
+
+def write_meta(path: str, frames: int, frame_capacity: int, slots: int) -> None:
+  meta = {
+    'version': FORMAT_VERSION,
+    'columns': list(COLUMNS),
+    'dtype': np.dtype(DTYPE).str,
+    'frames': frames,
+    'frame_capacity': frame_capacity,
+    'slots': slots,
+  }
+  _replace(os.path.join(path, META_FILE), lambda fd: json.dump(meta, fd))
+
+
+def read_meta(path: str) -> Dict[str, Any]:
+  try:
+    with open(os.path.join(path, META_FILE)) as fd:
+      meta = json.load(fd)
+  except (OSError, ValueError) as e:
+    raise RecordingException(f"Cannot read recording metadata in '{path}': {e}")
+
+  if meta.get('version') != FORMAT_VERSION:
+    raise RecordingException(f"Unsupported recording version {meta.get('version')}, expected {FORMAT_VERSION}")
+  return meta
+
+
+def write_entities(path: str, records: Sequence[SlotRecord]) -> None:
+  def write(fd):
+    writer = csv.writer(fd)
+    writer.writerow(ENTITIES_HEADER)
+    writer.writerows((r.slot, r.id, r.type, r.first_frame, '' if r.last_frame is None else r.last_frame) for r in records)
+
+  _replace(os.path.join(path, ENTITIES_FILE), write, newline='')
+
+
+def read_entities(path: str) -> List[SlotRecord]:
+  with open(os.path.join(path, ENTITIES_FILE), newline='') as fd:
+    return [
+      SlotRecord(int(row['slot']), row['id'], row['type'], int(row['first_frame']),
+                 int(row['last_frame']) if row['last_frame'] else None)
+      for row in csv.DictReader(fd)
+    ]
+
+
+def _replace(filename: str, write, newline: str = None) -> None:
+  # Write aside and rename, so a reader never sees a half written file.
+  temporary = filename + '.tmp'
+  with open(temporary, 'w', newline=newline) as fd:
+    write(fd)
+  os.replace(temporary, filename)
+
+
+class Recording(object):
+  """
+  Reads a recording made by the RecorderSystem.
+
+  Frames are stored as a (frame, slot, column) float32 array in a file mapped in memory, so slicing only
+  reads the part of the file it needs. Each entity is assigned a column slot while it is in the world,
+  and slots of entities that left are reused: the entities table maps slots to entities over frame
+  ranges. Values of empty slots are NaN, as is the energy of entities without energy.
+
+  A recording can be read while it is still being written: `refresh()` picks up frames flushed since.
+
+  Attributes:
+    path (str): The recording directory.
+    columns (Tuple[str, ...]): The recorded values of each entity, in column order.
+    frame_count (int): The number of recorded frames.
+    slot_count (int): The number of entity slots.
+    records (List[SlotRecord]): The entity to slot mapping table.
+
+  Methods:
+    refresh(): Pick up frames recorded since the recording was opened.
+    entity_ids(): Get the ids of every recorded entity.
+    entity(entity_id, start, stop, columns): Get the values of one entity over a frame range.
+    frames(start, stop, columns): Get the values of every slot over a frame range.
+    slot_ids(frame): Get the entity id of each slot on a frame.
+    ticks(start, stop): Get the world tick of each frame.
+    clock(start, stop): Get the simulation clock of each frame.
+  """
+  def __init__(self, path: str) -> None:
+    """
+    Open a recording.
+
+    Args:
+      path (str): The recording directory.
+    """
+    self.path: str = path
+    self.columns: Tuple[str, ...] = COLUMNS
+    self.frame_count: int = 0
+    self.slot_count: int = 0
+    self.records: List[SlotRecord] = []
+    self._by_id: Dict[str, List[SlotRecord]] = {}
+    self._frames: np.memmap | None = None
+    self._clock: np.memmap | None = None
+    self.refresh()
+
+  def refresh(self) -> None:
+    """
+    Pick up frames recorded since the recording was opened.
+    """
+    meta = read_meta(self.path)
+    self.columns = tuple(meta['columns'])
+    self.frame_count = meta['frames']
+    self.slot_count = meta['slots']
+    self.records = read_entities(self.path)
+    self._by_id = {}
+    for record in self.records:
+      self._by_id.setdefault(record.id, []).append(record)
+
+    capacity = meta['frame_capacity']
+    if capacity:
+      self._frames = np.memmap(os.path.join(self.path, FRAMES_FILE), dtype=DTYPE, mode='r', shape=frames_shape(capacity, self.slot_count))
+      self._clock = np.memmap(os.path.join(self.path, CLOCK_FILE), dtype=np.float64, mode='r', shape=(capacity, 2))
+
+  def __len__(self) -> int:
+    return self.frame_count
+
+  def entity_ids(self) -> List[str]:
+    """
+    Get the ids of every recorded entity.
+
+    Returns:
+      List[str]: The ids, in the order entities were first recorded.
+    """
+    return list(self._by_id)
+
+  def entity(self, entity_id: str, start: int = 0, stop: int = None, columns: Sequence[str] = None) -> np.ndarray:
+    """
+    Get the values of one entity over a frame range. Only the frames asked for are read from disk.
+
+    Args:
+      entity_id (str): The entity id.
+      start (int): The first frame (default is 0).
+      stop (int): The frame after the last one. Defaults to the end of the recording.
+      columns (Sequence[str]): The columns to get. Defaults to all of them.
+
+    Returns:
+      np.ndarray: A (frames, columns) array. Frames where the entity was not in the world are NaN.
+    """
+    records = self._by_id.get(entity_id)
+    if records is None:
+      raise RecordingException(f"Entity '{entity_id}' is not in the recording")
+
+    start, stop = self._range(start, stop)
+    indexes = self._column_indexes(columns)
+    result = np.full((stop - start, len(indexes)), np.nan, dtype=DTYPE)
+    for record in records:
+      last = self.frame_count - 1 if record.last_frame is None else record.last_frame
+      first, end = max(start, record.first_frame), min(stop, last + 1)
+      if first < end:
+        result[first - start:end - start] = self._frames[first:end, record.slot][:, indexes]
+    return result
+
+  def frames(self, start: int = 0, stop: int = None, columns: Sequence[str] = None) -> np.ndarray:
+    """
+    Get the values of every slot over a frame range, as stored. Use `slot_ids()` to tell which entity
+    each slot held.
+
+    Args:
+      start (int): The first frame (default is 0).
+      stop (int): The frame after the last one. Defaults to the end of the recording.
+      columns (Sequence[str]): The columns to get. Defaults to all of them.
+
+    Returns:
+      np.ndarray: A (frames, slots, columns) array. Without `columns`, a read-only view of the file.
+    """
+    start, stop = self._range(start, stop)
+    if self._frames is None:
+      return np.empty((0, self.slot_count, len(self.columns)), dtype=DTYPE)
+
+    frames = self._frames[start:stop]
+    return frames if columns is None else frames[:, :, self._column_indexes(columns)]
+
+  def slot_ids(self, frame: int) -> List[str | None]:
+    """
+    Get the entity id of each slot on a frame.
+
+    Args:
+      frame (int): The frame.
+
+    Returns:
+      List[str | None]: One id per slot, None for empty slots.
+    """
+    ids: List[str | None] = [None] * self.slot_count
+    for record in self.records:
+      if record.first_frame <= frame and (record.last_frame is None or frame <= record.last_frame):
+        ids[record.slot] = record.id
+    return ids
+
+  def ticks(self, start: int = 0, stop: int = None) -> np.ndarray:
+    """
+    Get the world tick of each frame.
+
+    Returns:
+      np.ndarray: The ticks.
+    """
+    start, stop = self._range(start, stop)
+    return self._clock[start:stop, 0].astype(np.int64) if self._clock is not None else np.empty(0, dtype=np.int64)
+
+  def clock(self, start: int = 0, stop: int = None) -> np.ndarray:
+    """
+    Get the simulation clock of each frame, in the world's clock units.
+
+    Returns:
+      np.ndarray: The clock values.
+    """
+    start, stop = self._range(start, stop)
+    return np.array(self._clock[start:stop, 1]) if self._clock is not None else np.empty(0)
+
+  def _range(self, start: int, stop: int | None) -> Tuple[int, int]:
+    stop = self.frame_count if stop is None else min(stop, self.frame_count)
+    start = max(0, start)
+    return start, max(start, stop)
+
+  def _column_indexes(self, columns: Sequence[str] | None) -> List[int]:
+    if columns is None:
+      return list(range(len(self.columns)))
+    try:
+      return [self.columns.index(c) for c in columns]
+    except ValueError:
+      raise RecordingException(f"Unknown column in {list(columns)}. Options are {list(self.columns)}")
+
+  def __str__(self) -> str:
+    return f"{self.__class__.__name__}({self.path}, {self.frame_count} frames, {len(self._by_id)} entities)"
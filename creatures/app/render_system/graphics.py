@@ -28,6 +28,8 @@ def default_text_style() -> Style:
 
 
 class SimpleGraphicComponent(Component):
+  transient = True
+
   def __init__(self, entity: Entity, original_scale: float = 1.0) -> None:
     super().__init__()
     self.log = logging.getLogger(self.__class__.__name__)
@@ -1,4 +1,5 @@
-from typing import List
+from time import perf_counter_ns
+from typing import Dict, List
 
 import pygame as pg
 import pygame.gfxdraw as gfx
@@ -7,6 +8,7 @@ from creatures.core.entity import Entity
 from creatures.core.primitives import Vector
 from creatures.app.render_system.widgets import EntityWidget, StatsWidget, WorldWidget, Widget
 from creatures.core.system import System
+from creatures.core.util import tracer
 from creatures.core.world import World
 from .constants import (FPS_LIMIT, GREEN, ORIGIN, SCREEN_HEIGHT, SCREEN_WIDTH, UISize, WORLD_MARGIN)
 from .mouse_handler import mouse
@@ -87,15 +89,26 @@ class RenderSystem(System):
     self.add_ui_element(self.world_widget)
     self.add_ui_element(self.stats_widget)
     self.add_ui_element(self.world_stats)
+    self._stacked: Dict[int, Vector] = {}
+
+  def set_world(self, world: World):
+    self.world = world
+    self.world_widget.world = world
+    self.world_widget.selected_entity = None
+    self.world_widget.hover = None
+    self.world_stats.stats = world.stats
 
   def update(self, entities: List[Entity]):
+    trace_start = perf_counter_ns() if tracer.enabled else 0
     self.entity_widget.entity = self.world_widget.selected_entity
+    self._stack_panels()
     
     self.ui_stack.sort(key=lambda w: w.z_position)
     self.mouse.update_position()
     self.handle_events()
     self.screen.fill(pg.Color('#E4DFDA'))
-    self.stats.frametime = self.clock.tick(self.fps_limit)
+    with tracer.span('RenderSystem.frame_limit', 'render'):
+      self.stats.frametime = self.clock.tick(self.fps_limit)
 
     self.top_hovering_widget = None
     for widget in self.ui_stack:
@@ -107,13 +120,34 @@ class RenderSystem(System):
       else:
         widget.hovering = False
       
-      widget.render()
+      if trace_start:
+        render_start = perf_counter_ns()
+        widget.render()
+        tracer.add(f"{widget.__class__.__name__}.render", 'render', render_start, perf_counter_ns() - render_start)
+      else:
+        widget.render()
     
     if self.top_hovering_widget:
       self.top_hovering_widget.hovering = True
       self.top_hovering_widget.on_hover()
     
     pg.display.update()
+    if trace_start:
+      tracer.add('RenderSystem.update', 'render', trace_start, perf_counter_ns() - trace_start)
+
+  def _stack_panels(self):
+    # The panels on the right grow with their text (system timings only show up after the first tick):
+    # keep each one right below the one above it, unless it was dragged somewhere else.
+    above = self.world_stats
+    for widget in (self.stats_widget, self.entity_widget):
+      stacked = self._stacked.get(id(widget))
+      if stacked is None or widget.position == stacked:
+        widget.position = Vector(
+          widget.position.x,
+          WORLD_MARGIN + 2 * widget.style.margin + widget.style.border_width + above.position.y + above.style.size.height
+        )
+        self._stacked[id(widget)] = widget.position
+      above = widget
 
   def draw_cursor(self):
     cursor_size = 5 * self.scale
@@ -154,6 +188,8 @@ class RenderSystem(System):
           self.app.quit()
         if event.key == pg.K_r:
           self.app.reset()
+        if event.key == pg.K_t:
+          self.app.write_trace()
         if event.key == pg.K_EQUALS:
           self.world_widget.scale *= 2
         if event.key == pg.K_MINUS:
@@ -0,0 +1,3 @@
+from .delta_log import DeltaLog, DeltaLogException, Keyframe, Delta, DEFAULT_QUANTUM, DEFAULT_KEYFRAME_EVERY
+from .delta_log_system import DeltaLogSystem
+from .replay_world import ReplayWorld
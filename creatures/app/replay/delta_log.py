@@ -0,0 +1,293 @@
+"""
+Delta log format.
+
+A delta log is an append-only file holding one record per recorded frame. Most records are deltas, holding
+only what changed since the previous frame; every few frames a keyframe holds the whole frame, so a reader
+can start anywhere. A sidecar file lists the frame number and file offset of every keyframe.
+
+Positions are quantized to multiples of `quantum` and stored as integer grid coordinates. Deltas are
+differences of grid coordinates, so decoding them never accumulates rounding error: a decoded position is
+always within `quantum / 2` of the recorded one.
+
+Layout, all little endian:
+
+  header:   magic (6s), version (H), quantum (d), width (d), height (d), time resolution (d)
+  record:   payload length (I), kind (B), payload
+  payload:  tick (q), clock (d), then
+    keyframe: count (I), indexes (I * count), grid x (q * count), grid y (q * count), JSON entity list
+    delta:    moved count (I), indexes (I * moved), grid dx (i * moved), grid dy (i * moved),
+              despawned count (I), indexes (I * despawned), JSON changes
+  JSON:     length (I) and UTF-8 text. Zero length means no data.
+
+Entities are referred to by a stream index, given when they first appear and never reused. The JSON entity
+list of a keyframe and the `spawned` list of a delta describe entities as {"i": index, "id", "type",
+"properties", "desire", "action"}, plus "x" and "y" grid coordinates for spawns. The `desire` and `action`
+lists of a delta hold [index, name] pairs of entities whose desire or action changed.
+"""
+from __future__ import annotations
+import json
+import os
+import struct
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+import numpy as np
+
+MAGIC = b'CRDLOG'
+FORMAT_VERSION = 1
+DEFAULT_QUANTUM = 0.01
+DEFAULT_KEYFRAME_EVERY = 600
+KEYS_SUFFIX = '.keys'
+
+KEYFRAME = 1
+DELTA = 2
+
+HEADER = struct.Struct('<6sHdddd')
+RECORD = struct.Struct('<IB')
+FRAME = struct.Struct('<qd')
+COUNT = struct.Struct('<I')
+KEY = struct.Struct('<QQ')
+
+INDEX_TYPE = np.dtype('<u4')
+GRID_TYPE = np.dtype('<i8')
+DELTA_TYPE = np.dtype('<i4')
+DELTA_LIMIT = np.iinfo(DELTA_TYPE).max
+
+
+class DeltaLogException(Exception):
+  def __init__(self, msg: str, *args: object) -> None:
+    super().__init__(*args)
+    self.msg = msg
+
+  def __str__(self) -> str:
+    return f"Delta log exception: {self.msg}"
+
+
+class Keyframe(object):
+  """
+  A decoded keyframe.
+
+  Attributes:
+    tick (int): The world tick.
+    clock (float): The simulation clock.
+    indexes (np.ndarray): The stream index of each entity.
+    x (np.ndarray): Grid x coordinate of each entity.
+    y (np.ndarray): Grid y coordinate of each entity.
+    entities (List[Dict[str, Any]]): The description of each entity.
+  """
+  def __init__(self, tick: int, clock: float, indexes: np.ndarray, x: np.ndarray, y: np.ndarray, entities: List[Dict[str, Any]]) -> None:
+    self.tick = tick
+    self.clock = clock
+    self.indexes = indexes
+    self.x = x
+    self.y = y
+    self.entities = entities
+
+
+class Delta(object):
+  """
+  A decoded delta.
+
+  Attributes:
+    tick (int): The world tick.
+    clock (float): The simulation clock.
+    moved (np.ndarray): Stream indexes of the entities that moved.
+    dx (np.ndarray): Grid x change of each moved entity.
+    dy (np.ndarray): Grid y change of each moved entity.
+    despawned (np.ndarray): Stream indexes of the entities that left.
+    changes (Dict[str, Any]): Spawned entities, and desire and action changes.
+  """
+  def __init__(self, tick: int, clock: float, moved: np.ndarray, dx: np.ndarray, dy: np.ndarray, despawned: np.ndarray, changes: Dict[str, Any]) -> None:
+    self.tick = tick
+    self.clock = clock
+    self.moved = moved
+    self.dx = dx
+    self.dy = dy
+    self.despawned = despawned
+    self.changes = changes
+
+
+def encode_keyframe(tick: int, clock: float, indexes: List[int], x: List[int], y: List[int], entities: List[Dict[str, Any]]) -> bytes:
+  return b''.join((
+    FRAME.pack(tick, clock),
+    COUNT.pack(len(indexes)),
+    np.asarray(indexes, dtype=INDEX_TYPE).tobytes(),
+    np.asarray(x, dtype=GRID_TYPE).tobytes(),
+    np.asarray(y, dtype=GRID_TYPE).tobytes(),
+    _encode_json(entities),
+  ))
+
+
+def encode_delta(tick: int, clock: float, moved: List[int], dx: List[int], dy: List[int], despawned: List[int], changes: Dict[str, Any]) -> bytes:
+  return b''.join((
+    FRAME.pack(tick, clock),
+    COUNT.pack(len(moved)),
+    np.asarray(moved, dtype=INDEX_TYPE).tobytes(),
+    np.asarray(dx, dtype=DELTA_TYPE).tobytes(),
+    np.asarray(dy, dtype=DELTA_TYPE).tobytes(),
+    COUNT.pack(len(despawned)),
+    np.asarray(despawned, dtype=INDEX_TYPE).tobytes(),
+    _encode_json(changes),
+  ))
+
+
+def decode(kind: int, payload: bytes) -> Keyframe | Delta:
+  tick, clock = FRAME.unpack_from(payload, 0)
+  offset = FRAME.size
+  if kind == KEYFRAME:
+    indexes, offset = _array(payload, offset, INDEX_TYPE)
+    count = len(indexes)
+    x, offset = _array(payload, offset, GRID_TYPE, count)
+    y, offset = _array(payload, offset, GRID_TYPE, count)
+    entities, _ = _decode_json(payload, offset)
+    return Keyframe(tick, clock, indexes, x, y, entities or [])
+  if kind == DELTA:
+    moved, offset = _array(payload, offset, INDEX_TYPE)
+    count = len(moved)
+    dx, offset = _array(payload, offset, DELTA_TYPE, count)
+    dy, offset = _array(payload, offset, DELTA_TYPE, count)
+    despawned, offset = _array(payload, offset, INDEX_TYPE)
+    changes, _ = _decode_json(payload, offset)
+    return Delta(tick, clock, moved, dx, dy, despawned, changes or {})
+  raise DeltaLogException(f"Unknown record kind {kind}")
+
+
+def _array(payload: bytes, offset: int, dtype: np.dtype, count: int = None) -> Tuple[np.ndarray, int]:
+  if count is None:
+    count, = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+  array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+  return array, offset + count * dtype.itemsize
+
+
+def _encode_json(data: Any) -> bytes:
+  if not data:
+    return COUNT.pack(0)
+  text = json.dumps(data, separators=(',', ':')).encode()
+  return COUNT.pack(len(text)) + text
+
+
+def _decode_json(payload: bytes, offset: int) -> Tuple[Any, int]:
+  length, = COUNT.unpack_from(payload, offset)
+  offset += COUNT.size
+  if not length:
+    return None, offset
+  return json.loads(payload[offset:offset + length]), offset + length
+
+
+class DeltaLog(object):
+  """
+  Reads a delta log.
+
+  Attributes:
+    path (str): The log file.
+    quantum (float): The position quantization step.
+    width (float): The width of the recorded world.
+    height (float): The height of the recorded world.
+    time_resolution (float): The time resolution of the recorded world.
+    keyframes (List[Tuple[int, int]]): Frame number and file offset of each keyframe.
+    frame_count (int): The number of recorded frames.
+
+  Methods:
+    refresh(): Pick up frames written since the log was opened.
+    keyframe_before(frame): Get the last keyframe at or before a frame.
+    read(offset): Read the record at a file offset.
+    close(): Close the file.
+  """
+  def __init__(self, path: str) -> None:
+    """
+    Open a delta log.
+
+    Args:
+      path (str): The log file.
+    """
+    self.path: str = path
+    self._file: BinaryIO = open(path, 'rb')
+    header = self._file.read(HEADER.size)
+    if len(header) < HEADER.size:
+      raise DeltaLogException(f"'{path}' is not a delta log: too short")
+    magic, version, self.quantum, self.width, self.height, self.time_resolution = HEADER.unpack(header)
+    if magic != MAGIC:
+      raise DeltaLogException(f"'{path}' is not a delta log")
+    if version != FORMAT_VERSION:
+      raise DeltaLogException(f"Unsupported delta log version {version}, expected {FORMAT_VERSION}")
+
+    self.keyframes: List[Tuple[int, int]] = []
+    self.frame_count: int = 0
+    self.refresh()
+    if not self.keyframes:
+      raise DeltaLogException(f"'{path}' has no keyframe")
+
+  def refresh(self) -> None:
+    """
+    Pick up frames written since the log was opened, for logs still being recorded.
+    """
+    self.keyframes = read_keys(self.path)
+    self.frame_count = self._count_frames() if self.keyframes else 0
+
+  def keyframe_before(self, frame: int) -> Tuple[int, int]:
+    """
+    Get the last keyframe at or before a frame.
+
+    Args:
+      frame (int): The frame number.
+
+    Returns:
+      Tuple[int, int]: The frame number and file offset of the keyframe.
+    """
+    low, high = 0, len(self.keyframes)
+    while high - low > 1:
+      middle = (low + high) // 2
+      if self.keyframes[middle][0] <= frame:
+        low = middle
+      else:
+        high = middle
+    return self.keyframes[low]
+
+  def read(self, offset: int) -> Tuple[Keyframe | Delta | None, int]:
+    """
+    Read the record at a file offset.
+
+    Args:
+      offset (int): The file offset.
+
+    Returns:
+      Tuple: The decoded record, or None past the end of the log, and the offset of the next record.
+    """
+    self._file.seek(offset)
+    header = self._file.read(RECORD.size)
+    if len(header) < RECORD.size:
+      return None, offset
+    length, kind = RECORD.unpack(header)
+    payload = self._file.read(length)
+    if len(payload) < length:
+      return None, offset
+    return decode(kind, payload), offset + RECORD.size + length
+
+  def close(self) -> None:
+    self._file.close()
+
+  def _count_frames(self) -> int:
+    frame, offset = self.keyframes[-1]
+    self._file.seek(0, os.SEEK_END)
+    end = self._file.tell()
+    while offset + RECORD.size <= end:
+      self._file.seek(offset)
+      length, _ = RECORD.unpack(self._file.read(RECORD.size))
+      if offset + RECORD.size + length > end:
+        break
+      offset += RECORD.size + length
+      frame += 1
+    return frame
+
+  def __str__(self) -> str:
+    return f"{self.__class__.__name__}({self.path}, {self.frame_count} frames)"
+
+
+def read_keys(path: str) -> List[Tuple[int, int]]:
+  try:
+    with open(path + KEYS_SUFFIX, 'rb') as fd:
+      data = fd.read()
+  except OSError:
+    return []
+  usable = len(data) - len(data) % KEY.size
+  return [KEY.unpack_from(data, offset) for offset in range(0, usable, KEY.size)]
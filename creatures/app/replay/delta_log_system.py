@@ -0,0 +1,232 @@
+from __future__ import annotations
+import os
+from typing import Any, BinaryIO, Dict, List, Sequence, Tuple
+
+from creatures.app.action import ActionComponent
+from creatures.app.desire import DesireComponent
+from creatures.core.component import MetaDataComponent, MovementComponent
+from creatures.core.entity import Entity
+from creatures.core.system import System
+from creatures.core.world import World
+
+from .delta_log import (DEFAULT_KEYFRAME_EVERY, DEFAULT_QUANTUM, DELTA, DELTA_LIMIT, FORMAT_VERSION, HEADER, KEY,
+                        KEYFRAME, KEYS_SUFFIX, MAGIC, RECORD, encode_delta, encode_keyframe)
+
+
+def _describe(entity: Entity) -> Dict[str, Any]:
+  return {
+    'id': entity.id,
+    'type': entity.type,
+    'properties': {k: v for k, v in entity.properties.items() if isinstance(v, (str, int, float, bool))},
+  }
+
+
+def _desire_name(entity: Entity) -> str | None:
+  desire_component: DesireComponent = entity.get_component(DesireComponent)
+  return str(desire_component.desire) if desire_component and desire_component.desire else None
+
+
+def _action_name(entity: Entity) -> str | None:
+  action_component: ActionComponent = entity.get_component(ActionComponent)
+  return action_component.action.__class__.__name__ if action_component and action_component.action else None
+
+
+class DeltaLogSystem(System):
+  """
+  Appends a frame to a delta log on each run: the moved entities with quantized position deltas, spawned
+  and despawned entities, and desire and action changes. Every `keyframe_every` frames, the whole frame is
+  written instead. See `creatures.app.replay.delta_log` for the format, and `ReplayWorld` to play it back.
+
+  The file is buffered and flushed on every keyframe and on `shutdown()`.
+
+  Attributes:
+    path (str): The log file. The keyframe index is written next to it, with a '.keys' suffix.
+    quantum (float): The position quantization step.
+    keyframe_every (int): Frames between keyframes.
+    frame (int): The number of frames written.
+
+  Methods:
+    update(entities): Write one frame.
+    shutdown(): Flush and close the log. It is opened again if the system runs after this.
+  """
+  component_types = (MovementComponent,)
+  reads = (MovementComponent, MetaDataComponent, DesireComponent, ActionComponent)
+  writes = ()
+
+  def __init__(self,
+               world: World,
+               path: str,
+               quantum: float = DEFAULT_QUANTUM,
+               keyframe_every: int = DEFAULT_KEYFRAME_EVERY) -> None:
+    """
+    Initialize a DeltaLogSystem object. An existing log in `path` is overwritten.
+
+    Args:
+      world (World): The world instance where the system operates.
+      path (str): The log file.
+      quantum (float): The position quantization step (default is DEFAULT_QUANTUM).
+      keyframe_every (int): Frames between keyframes (default is DEFAULT_KEYFRAME_EVERY).
+    """
+    super().__init__(world)
+    if quantum <= 0:
+      raise ValueError(f"{self.__class__.__name__}: 'quantum' must be positive, got {quantum}")
+    if keyframe_every < 1:
+      raise ValueError(f"{self.__class__.__name__}: 'keyframe_every' must be at least 1, got {keyframe_every}")
+
+    self.path: str = path
+    self.quantum: float = float(quantum)
+    self.keyframe_every: int = int(keyframe_every)
+    self.frame: int = 0
+    self._indexes: Dict[str, int] = {}
+    self._grid: Dict[int, Tuple[int, int]] = {}
+    self._desires: Dict[int, str | None] = {}
+    self._actions: Dict[int, str | None] = {}
+    self._next_index: int = 0
+    self._size: int = 0
+    self._keys: int = 0
+    self._file: BinaryIO | None = None
+    self._keys_file: BinaryIO | None = None
+
+  def update(self, entities: Sequence[Entity]):
+    """
+    Write one frame.
+
+    Args:
+      entities (Sequence[Entity]): The entities holding a movement component.
+    """
+    if self._file is None:
+      self._open()
+
+    if self.frame % self.keyframe_every == 0 or not self._write_delta(entities):
+      self._write_keyframe(entities)
+    self.frame += 1
+
+  def shutdown(self):
+    """
+    Flush and close the log. It is opened again if the system runs after this.
+    """
+    if self._file is not None:
+      self._file.close()
+      self._keys_file.close()
+      self._file = self._keys_file = None
+
+  def _grid_of(self, entity: Entity) -> Tuple[int, int]:
+    position = entity.movement.position
+    return round(position.x / self.quantum), round(position.y / self.quantum)
+
+  def _write_keyframe(self, entities: Sequence[Entity]) -> None:
+    indexes, xs, ys, descriptions = [], [], [], []
+    present = set()
+    for entity in entities:
+      index = self._index_of(entity)
+      present.add(index)
+      x, y = self._grid[index] = self._grid_of(entity)
+      desire, action = self._desires[index], self._actions[index] = _desire_name(entity), _action_name(entity)
+      indexes.append(index)
+      xs.append(x)
+      ys.append(y)
+      descriptions.append({'i': index, **_describe(entity), 'desire': desire, 'action': action})
+    self._forget([entity_id for entity_id, index in self._indexes.items() if index not in present])
+
+    self._keys_file.write(KEY.pack(self.frame, self._size))
+    self._write(KEYFRAME, encode_keyframe(self.world.tick, self.world.clock, indexes, xs, ys, descriptions))
+    self._keys += 1
+    self._file.flush()
+    self._keys_file.flush()
+
+  def _write_delta(self, entities: Sequence[Entity]) -> bool:
+    moved, dxs, dys, spawned, desires, actions = [], [], [], [], [], []
+    present = set()
+    spawns: List[Tuple[Entity, Tuple[int, int]]] = []
+    for entity in entities:
+      index = self._indexes.get(entity.id)
+      grid = self._grid_of(entity)
+      if index is None:
+        spawns.append((entity, grid))
+        continue
+
+      present.add(index)
+      old_x, old_y = self._grid[index]
+      dx, dy = grid[0] - old_x, grid[1] - old_y
+      if dx or dy:
+        if abs(dx) > DELTA_LIMIT or abs(dy) > DELTA_LIMIT:
+          return False
+        moved.append(index)
+        dxs.append(dx)
+        dys.append(dy)
+
+    despawned = [index for index in self._indexes.values() if index not in present]
+
+    # Nothing can fail past this point: update the decoded state.
+    for index, dx, dy in zip(moved, dxs, dys):
+      old_x, old_y = self._grid[index]
+      self._grid[index] = (old_x + dx, old_y + dy)
+    self._forget([entity_id for entity_id, index in self._indexes.items() if index not in present])
+    for entity, (x, y) in spawns:
+      index = self._index_of(entity)
+      self._grid[index] = (x, y)
+      desire, action = self._desires[index], self._actions[index] = _desire_name(entity), _action_name(entity)
+      spawned.append({'i': index, **_describe(entity), 'desire': desire, 'action': action, 'x': x, 'y': y})
+
+    for entity in entities:
+      index = self._indexes[entity.id]
+      desire, action = _desire_name(entity), _action_name(entity)
+      if desire != self._desires[index]:
+        self._desires[index] = desire
+        desires.append([index, desire])
+      if action != self._actions[index]:
+        self._actions[index] = action
+        actions.append([index, action])
+
+    changes = {k: v for k, v in (('spawned', spawned), ('desire', desires), ('action', actions)) if v}
+    self._write(DELTA, encode_delta(self.world.tick, self.world.clock, moved, dxs, dys, despawned, changes))
+    return True
+
+  def _index_of(self, entity: Entity) -> int:
+    index = self._indexes.get(entity.id)
+    if index is None:
+      index = self._indexes[entity.id] = self._next_index
+      self._next_index += 1
+      self._desires[index] = self._actions[index] = None
+    return index
+
+  def _forget(self, entity_ids: List[str]) -> None:
+    for entity_id in entity_ids:
+      index = self._indexes.pop(entity_id)
+      del self._grid[index], self._desires[index], self._actions[index]
+
+  def _write(self, kind: int, payload: bytes) -> None:
+    self._file.write(RECORD.pack(len(payload), kind))
+    self._file.write(payload)
+    self._size += RECORD.size + len(payload)
+
+  def _open(self) -> None:
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+
+    if self.frame > 0:
+      # Resuming, after shutdown() or in a world restored from a snapshot: drop whatever was written after
+      # this system's last frame, and carry on from there.
+      self._file = open(self.path, 'r+b')
+      self._file.truncate(self._size)
+      self._file.seek(self._size)
+      self._keys_file = open(self.path + KEYS_SUFFIX, 'r+b')
+      self._keys_file.truncate(self._keys * KEY.size)
+      self._keys_file.seek(self._keys * KEY.size)
+      return
+
+    self._file = open(self.path, 'wb')
+    self._keys_file = open(self.path + KEYS_SUFFIX, 'wb')
+    self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.quantum, self.world.size.x, self.world.size.y, self.world.time_resolution))
+    self._size = HEADER.size
+    self._keys = 0
+
+  def __getstate__(self):
+    # The log stays on disk; a restored system opens it again and continues from its own frame.
+    if self._file is not None:
+      self._file.flush()
+      self._keys_file.flush()
+    state = self.__dict__.copy()
+    state.update(_file=None, _keys_file=None)
+    return state
@@ -0,0 +1,242 @@
+from __future__ import annotations
+from time import time
+from typing import Any, Dict, List, Set, Tuple
+
+from creatures.app.action import ActionComponent
+from creatures.app.desire import DesireComponent
+from creatures.core.component import MetaDataComponent, MovementComponent
+from creatures.core.entity import Entity
+from creatures.core.primitives import Vector
+from creatures.core.world import World
+
+from .delta_log import Delta, DeltaLog, DeltaLogException, Keyframe
+
+
+class ReplayWorld(World):
+  """
+  A world that plays back a delta log instead of simulating. It runs no systems: each frame is rebuilt
+  from the log, so anything that only reads a world, such as the RenderSystem, can show a recording.
+
+  Replayed entities are plain entities holding a metadata component, a movement component, the recorded
+  properties, and desire and action components holding the name of the recorded desire and action.
+  Velocities are derived from the recorded movement.
+
+  Attributes:
+    delta_log (DeltaLog): The log being played back.
+    frame (int): The frame shown, or -1 before the first one.
+    speed (float): Playback speed for `update()` and `advance()`, relative to the recorded simulation time.
+
+  Methods:
+    seek(frame): Show a frame, starting from the last keyframe before it when needed.
+    step(dt): Show the next frame.
+    update(external_dt): Play back as much recorded time as the elapsed wall-clock time.
+    advance(frame_time): Same as `update()`, returning the number of frames shown.
+    finished(): Check if the last recorded frame is shown.
+    shutdown(): Close the log.
+  """
+  def __init__(self, delta_log: DeltaLog | str, speed: float = 1.0) -> None:
+    """
+    Initialize a ReplayWorld object and show the first frame of the log.
+
+    Args:
+      delta_log (DeltaLog or str): The log, or the path of the log file.
+      speed (float): Playback speed, relative to the recorded simulation time (default is 1.0).
+    """
+    delta_log = delta_log if isinstance(delta_log, DeltaLog) else DeltaLog(delta_log)
+    super().__init__(delta_log.width, delta_log.height, time_resolution=delta_log.time_resolution)
+    self.delta_log: DeltaLog = delta_log
+    self.frame: int = -1
+    self.speed: float = speed
+    self._offset: int = 0
+    self._pending: Tuple[Keyframe | Delta, int] | None = None
+    self._playback_clock: float = 0.0
+    self._entities: Dict[int, Entity] = {}
+    self._grid: Dict[int, List[int]] = {}
+    self._moving: Set[int] = set()
+    self.seek(0)
+
+  def seek(self, frame: int) -> None:
+    """
+    Show a frame. Moving forward applies the deltas in between; moving backward, or far enough forward,
+    starts again from the last keyframe at or before the frame.
+
+    Args:
+      frame (int): The frame number. Clamped to the recorded frames.
+    """
+    if frame >= self.delta_log.frame_count:
+      self.delta_log.refresh()
+    frame = max(0, min(frame, self.delta_log.frame_count - 1))
+
+    key_frame, key_offset = self.delta_log.keyframe_before(frame)
+    if frame < self.frame or key_frame > self.frame:
+      self.frame, self._offset, self._pending = key_frame - 1, key_offset, None
+    while self.frame < frame and self._next():
+      pass
+    self._playback_clock = self._clock
+
+  def step(self, dt: float = None) -> None:
+    """
+    Show the next frame, if it was recorded already.
+
+    Args:
+      dt (float): Ignored. Frames advance by the recorded step.
+    """
+    self._next()
+    self._playback_clock = self._clock
+
+  def update(self, external_dt: float = None) -> None:
+    """
+    Play back as much recorded simulation time as the wall-clock time elapsed, times `speed`.
+
+    Args:
+      external_dt (float): Wall-clock time since the last call, in milliseconds. Defaults to the time since the
+        previous frame was shown.
+    """
+    self.advance(external_dt if external_dt else self.dt)
+
+  def advance(self, frame_time: float) -> int:
+    """
+    Play back as much recorded simulation time as the wall-clock time elapsed, times `speed`.
+
+    Args:
+      frame_time (float): Wall-clock time since the last call, in milliseconds.
+
+    Returns:
+      int: The number of frames shown.
+    """
+    update_start = time() * 1000
+    self._playback_clock += frame_time * self.time_resolution * self.speed
+    frames = 0
+    while True:
+      record = self._peek()
+      if record is None or record.clock > self._playback_clock:
+        break
+      self._next()
+      frames += 1
+
+    self._dt = frame_time
+    self.stats.internal_dt = time() * 1000 - update_start
+    return frames
+
+  @property
+  def finished(self) -> bool:
+    """
+    Check if the last frame recorded so far is shown.
+
+    Returns:
+      bool: True if there is no next frame.
+    """
+    return self._peek() is None
+
+  def shutdown(self) -> None:
+    """
+    Close the log.
+    """
+    self.delta_log.close()
+
+  def _peek(self) -> Keyframe | Delta | None:
+    if self._pending is None:
+      record, next_offset = self.delta_log.read(self._offset)
+      if record is None:
+        return None
+      self._pending = (record, next_offset)
+    return self._pending[0]
+
+  def _next(self) -> bool:
+    record = self._peek()
+    if record is None:
+      return False
+
+    self._offset = self._pending[1]
+    self._pending = None
+    if isinstance(record, Keyframe):
+      self._apply_keyframe(record)
+    else:
+      self._apply_delta(record)
+
+    self.frame += 1
+    self.tick = record.tick
+    self._clock = record.clock
+    self.stats.population = len(self.entities_map)
+    self.stats.simulation_clock = self.clock
+    self.stats.time_resolution = self.time_resolution
+    return True
+
+  def _apply_keyframe(self, keyframe: Keyframe) -> None:
+    # Entities in both frames are kept, so a selected entity stays selected across seeks.
+    present = set(keyframe.indexes.tolist())
+    for index in [i for i in self._entities if i not in present]:
+      self.remove(self._entities.pop(index))
+      del self._grid[index]
+
+    for index, x, y, description in zip(keyframe.indexes.tolist(), keyframe.x.tolist(), keyframe.y.tolist(), keyframe.entities):
+      entity = self._entities.get(index)
+      if entity is None:
+        self._spawn(description, x, y)
+      else:
+        self._set_state(entity, description.get('desire'), description.get('action'))
+        self._move(index, x, y, Vector(0, 0))
+    self._moving.clear()
+
+  def _apply_delta(self, delta: Delta) -> None:
+    elapsed = delta.clock - self._clock
+    quantum = self.delta_log.quantum
+    moved = delta.moved.tolist()
+    for index, dx, dy in zip(moved, delta.dx.tolist(), delta.dy.tolist()):
+      x, y = self._grid[index]
+      velocity = Vector(dx * quantum / elapsed, dy * quantum / elapsed) if elapsed > 0 else Vector(0, 0)
+      self._move(index, x + dx, y + dy, velocity)
+
+    moved = set(moved)
+    for index in self._moving - moved:
+      if index in self._entities:
+        self._entities[index].movement.velocity = Vector(0, 0)
+    self._moving = moved
+
+    for index in delta.despawned.tolist():
+      self.despawn(self._entities.pop(index))
+      del self._grid[index]
+
+    changes = delta.changes
+    for description in changes.get('spawned', ()):
+      self._spawn(description, description['x'], description['y'])
+    for index, desire in changes.get('desire', ()):
+      self._entities[index].get_component(DesireComponent).desire = desire
+    for index, action in changes.get('action', ()):
+      self._entities[index].get_component(ActionComponent).action = action
+
+  def _spawn(self, description: Dict[str, Any], x: int, y: int) -> None:
+    index = description['i']
+    entity = Entity(description['id'], description['type'])
+    entity.properties.update(description['properties'])
+    entity.add_component(MetaDataComponent(entity.properties.get('name', ''), description['type']))
+    entity.add_component(MovementComponent(self._position(x, y)))
+    entity.add_component(DesireComponent(None))
+    entity.add_component(ActionComponent())
+    self._set_state(entity, description.get('desire'), description.get('action'))
+    self._entities[index] = entity
+    self._grid[index] = [x, y]
+    self.add(entity)
+
+  def _move(self, index: int, x: int, y: int, velocity: Vector) -> None:
+    entity = self._entities[index]
+    self._grid[index] = [x, y]
+    movement = entity.movement
+    movement.position = self._position(x, y)
+    movement.velocity = velocity
+    self.spatial_index.move(entity)
+
+  def _position(self, x: int, y: int) -> Vector:
+    quantum = self.delta_log.quantum
+    return Vector(x * quantum, y * quantum)
+
+  @staticmethod
+  def _set_state(entity: Entity, desire: str | None, action: str | None) -> None:
+    entity.get_component(DesireComponent).desire = desire
+    entity.get_component(ActionComponent).action = action
+
+  def __getstate__(self) -> Dict[str, Any]:
+    raise DeltaLogException(f"A {self.__class__.__name__} cannot be copied. Open the log again instead.")
+
+  def __str__(self) -> str:
+    return f"{self.__class__.__name__}({self.delta_log.path}, frame {self.frame}/{self.delta_log.frame_count})"
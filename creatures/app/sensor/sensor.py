@@ -3,28 +3,24 @@ from creatures.core.component.component import MovementComponent
 
 from creatures.core.entity import Entity
 from creatures.core.primitives import Vector
+from creatures.core.spatial import within_radius
 
 
 class Sensor(object):
   def __init__(self) -> None:
     self.position = Vector(0,0)
 
-  def scan(self, entities: List[Entity]) -> Set[Entity]: pass
+  def scan(self, entities: List[Entity], position: Vector = None) -> Set[Entity]: pass
 
 class RadialSensor(Sensor):
   def __init__(self, radius: float = 7.0) -> None:
     super().__init__()
     self.radius = radius
   
-  def scan(self, entities: List[Entity]) -> Set[Entity]:
-    result: Set[Entity] = set()
-    for entity  in entities:
-      movement_component = entity.get_component(MovementComponent)
-      if movement_component:
-        if entity.distance(self.position) <= self.radius:
-          result.add(entity)
-
-    return result
+  def scan(self, entities: List[Entity], position: Vector = None) -> Set[Entity]:
+    position = position if position is not None else self.position
+    located = [entity for entity in entities if entity.get_component(MovementComponent)]
+    return set(within_radius(position, located, self.radius))
 
   def to_dict(self):
     return {
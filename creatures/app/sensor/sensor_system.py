@@ -1,19 +1,38 @@
-from typing import List
+from typing import List, Sequence, Set, Tuple
+from creatures.core.component import MovementComponent
 from creatures.core.entity import Entity
 from creatures.app.sensor.sensor_component import SensorComponent
-from creatures.core.system import System
+from creatures.core.primitives import Vector
+from creatures.core.system import ParallelSystem, DEFAULT_CHUNK_SIZE
 
+Detection = Tuple[SensorComponent, Vector, Set[Entity]]
 
-class SensorSystem(System):
-  def __init__(self, world) -> None:
-    super().__init__(world)
 
-  def update(self, entities: List[Entity]):
+class SensorSystem(ParallelSystem):
+  component_types = (SensorComponent,)
+  reads = (MovementComponent,)
+  writes = (SensorComponent,)
+
+  def __init__(self, world, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    super().__init__(world, workers=workers, chunk_size=chunk_size)
+
+  def process_chunk(self, entities: Sequence[Entity]) -> List[Detection]:
+    detections: List[Detection] = []
     for entity in entities:
       sensor_component: SensorComponent = entity.get_component(SensorComponent)
       if sensor_component:
-        sensor_component.detected = set()
+        position = entity.movement.position
+        detected = set()
+        for sensor in sensor_component.sensors:
+          candidates = self.world.spatial_index.candidates(position, sensor.radius)
+          detected = detected.union(sensor.scan(candidates, position))
+          detected.remove(entity)
+        detections.append((sensor_component, position, detected))
+    return detections
+
+  def merge(self, results: List[List[Detection]]):
+    for detections in results:
+      for sensor_component, position, detected in detections:
         for sensor in sensor_component.sensors:
-          sensor.position = entity.movement.position
-          sensor_component.detected = sensor_component.detected.union(sensor.scan(entities))
-          sensor_component.detected.remove(entity)
\ No newline at end of file
+          sensor.position = position
+        sensor_component.detected = detected
@@ -0,0 +1,3 @@
+from .layout import ShardLayout
+from .shard import Shard, max_sensor_radius
+from .sharded_world import ShardedWorld, ShardError
\ No newline at end of file
@@ -0,0 +1,102 @@
+from math import floor
+from typing import List, Tuple
+from creatures.core.primitives import Vector
+
+Bounds = Tuple[float, float, float, float]
+
+
+class ShardLayout(object):
+  """
+  Splits the world plane into a grid of `columns` x `rows` equally sized tiles, one per shard.
+
+  Tiles are numbered row by row. Positions outside the world belong to the nearest border tile.
+
+  Attributes:
+    width (float): The world width.
+    height (float): The world height.
+    columns (int): Number of tile columns.
+    rows (int): Number of tile rows.
+    tile_width (float): The width of a tile.
+    tile_height (float): The height of a tile.
+
+  Methods:
+    tile_of(position): Get the tile owning a position.
+    bounds(tile): Get the rectangle covered by a tile.
+    near(position, margin): Get the tiles within a distance of a position.
+  """
+  def __init__(self, width: float, height: float, columns: int = 2, rows: int = 1) -> None:
+    """
+    Initialize a ShardLayout object.
+
+    Args:
+      width (float): The world width.
+      height (float): The world height.
+      columns (int): Number of tile columns (default is 2).
+      rows (int): Number of tile rows (default is 1).
+    """
+    if columns < 1 or rows < 1:
+      raise ValueError(f"A shard layout needs at least one column and one row, got {columns}x{rows}")
+
+    self.width: float = float(width)
+    self.height: float = float(height)
+    self.columns: int = int(columns)
+    self.rows: int = int(rows)
+    self.tile_width: float = self.width / self.columns
+    self.tile_height: float = self.height / self.rows
+
+  def __len__(self) -> int:
+    return self.columns * self.rows
+
+  def tile_of(self, position: Vector) -> int:
+    """
+    Get the tile owning a position.
+
+    Args:
+      position (Vector): The position.
+
+    Returns:
+      int: The tile index.
+    """
+    column = min(max(floor(position.x / self.tile_width), 0), self.columns - 1)
+    row = min(max(floor(position.y / self.tile_height), 0), self.rows - 1)
+    return row * self.columns + column
+
+  def bounds(self, tile: int) -> Bounds:
+    """
+    Get the rectangle covered by a tile. Border tiles extend to infinity on their outer sides.
+
+    Args:
+      tile (int): The tile index.
+
+    Returns:
+      Bounds: The (min_x, min_y, max_x, max_y) of the tile.
+    """
+    row, column = divmod(tile, self.columns)
+    min_x = column * self.tile_width if column > 0 else float('-inf')
+    min_y = row * self.tile_height if row > 0 else float('-inf')
+    max_x = (column + 1) * self.tile_width if column < self.columns - 1 else float('inf')
+    max_y = (row + 1) * self.tile_height if row < self.rows - 1 else float('inf')
+    return min_x, min_y, max_x, max_y
+
+  def near(self, position: Vector, margin: float) -> List[int]:
+    """
+    Get the tiles whose rectangle is within `margin` of a position, including the one owning it.
+
+    Args:
+      position (Vector): The position.
+      margin (float): The distance.
+
+    Returns:
+      List[int]: The tile indexes, in increasing order.
+    """
+    result: List[int] = []
+    for tile in range(len(self)):
+      min_x, min_y, max_x, max_y = self.bounds(tile)
+      dx = max(min_x - position.x, 0.0, position.x - max_x)
+      dy = max(min_y - position.y, 0.0, position.y - max_y)
+      if dx * dx + dy * dy <= margin * margin:
+        result.append(tile)
+    return result
+
+  def __str__(self) -> str:
+    return f"{self.__class__.__name__}({self.columns}x{self.rows}, tile={self.tile_width}x{self.tile_height})"
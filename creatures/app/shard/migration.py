@@ -0,0 +1,127 @@
+import pickle
+from typing import Any, Dict, Tuple
+from creatures.app.action import ActionComponent
+from creatures.app.brain.brain_component import BrainComponent
+from creatures.app.desire import StayStill, Wander
+from creatures.app.desire.desire_abstract import DesireComponent
+from creatures.app.sensor.sensor_component import SensorComponent
+from creatures.core.component.component import MetaDataComponent, MovementComponent
+from creatures.core.entity import Entity
+from creatures.core.primitives import Vector
+from creatures.core.world import World
+
+GhostState = Tuple[str, str, Dict[str, Any], str, str, float, float, float, float]
+
+
+def pack_entity(world: World, entity: Entity) -> bytes:
+  """
+  Remove an entity from a world and serialize it, to be added to the world of another shard.
+
+  State pointing at other entities or at the world cannot travel: detections are cleared, pending
+  actions dropped and desires other than StayStill replaced by the default Wander desire on arrival.
+
+  Args:
+    world (World): The world the entity leaves.
+    entity (Entity): The entity to migrate.
+
+  Returns:
+    bytes: The serialized entity.
+  """
+  world.remove(entity)
+
+  sensor_component: SensorComponent = entity.get_component(SensorComponent)
+  if sensor_component:
+    sensor_component.detected = set()
+
+  action_component: ActionComponent = entity.get_component(ActionComponent)
+  if action_component:
+    action_component.action = None
+
+  desire_component: DesireComponent = entity.get_component(DesireComponent)
+  if desire_component and not isinstance(desire_component.desire, StayStill):
+    desire_component.desire = None
+    brain_component: BrainComponent = entity.get_component(BrainComponent)
+    if brain_component and brain_component.creature:
+      brain_component.creature._desire = None
+  if getattr(entity, 'desire', None) is not None and not isinstance(entity.desire, StayStill):
+    entity.desire = None # Set by the loader on plain entities, next to their DesireComponent.
+
+  return pickle.dumps(entity, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def unpack_entity(world: World, data: bytes) -> Entity:
+  """
+  Deserialize a migrated entity, ready to be added to a world.
+
+  Args:
+    world (World): The world the entity will join.
+    data (bytes): The entity, as serialized by `pack_entity()`.
+
+  Returns:
+    Entity: The entity.
+  """
+  entity: Entity = pickle.loads(data)
+
+  desire_component: DesireComponent = entity.get_component(DesireComponent)
+  if desire_component and desire_component.desire is None:
+    desire = Wander(entity, world=world)
+    brain_component: BrainComponent = entity.get_component(BrainComponent)
+    if brain_component and brain_component.creature:
+      brain_component.creature.desire = desire
+    else:
+      desire_component.desire = desire
+  if hasattr(entity, 'desire') and entity.desire is None:
+    entity.desire = desire_component.desire if desire_component else None
+
+  return entity
+
+
+def ghost_state(entity: Entity) -> GhostState:
+  """
+  Get what a neighbour shard needs to know about an entity to sense it.
+
+  Args:
+    entity (Entity): The entity.
+
+  Returns:
+    GhostState: The id, type, properties, metadata, position and velocity of the entity.
+  """
+  movement, metadata = entity.movement, entity.metadata
+  position, velocity = movement.position, movement.velocity
+  return (entity.id, entity.type, entity.properties, metadata.name, metadata.type,
+          position.x, position.y, velocity.x, velocity.y)
+
+
+def make_ghost(state: GhostState) -> Entity:
+  """
+  Create a read-only stand-in for an entity owned by another shard.
+
+  Args:
+    state (GhostState): The state of the entity, from `ghost_state()`.
+
+  Returns:
+    Entity: The ghost entity. It is never added to a world, only to its spatial index.
+  """
+  entity_id, entity_type, properties, name, metadata_type, x, y, vx, vy = state
+  ghost = Entity(entity_id, entity_type=entity_type)
+  ghost.properties = properties
+  ghost.add_component(MetaDataComponent(name, metadata_type))
+  movement = MovementComponent(Vector(x, y))
+  movement.velocity = Vector(vx, vy)
+  ghost.add_component(movement)
+  return ghost
+
+
+def update_ghost(ghost: Entity, state: GhostState) -> None:
+  """
+  Refresh a ghost in place, so entities holding a reference to it see the new state.
+
+  Args:
+    ghost (Entity): The ghost entity.
+    state (GhostState): The new state of the entity, from `ghost_state()`.
+  """
+  _, _, properties, _, _, x, y, vx, vy = state
+  ghost.properties = properties
+  movement = ghost.get_component(MovementComponent)
+  movement.position = Vector(x, y)
+  movement.velocity = Vector(vx, vy)
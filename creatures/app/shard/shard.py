@@ -0,0 +1,204 @@
+from typing import Any, Dict, List, Set
+from creatures.app.io import Loader
+from creatures.app.sensor.sensor_component import SensorComponent
+from creatures.core.component.component import MovementComponent
+from creatures.core.entity import Entity
+from creatures.core.world import World, WorldStats
+
+from .layout import ShardLayout
+from .migration import GhostState, ghost_state, make_ghost, pack_entity, unpack_entity, update_ghost
+
+KILLS = 'kills'
+MIGRANTS = 'migrants'
+GHOSTS = 'ghosts'
+
+Message = Dict[str, List[Any]]
+Outbox = Dict[int, Message]
+
+
+def new_message() -> Message:
+  return {KILLS: [], MIGRANTS: [], GHOSTS: []}
+
+
+def max_sensor_radius(world: World) -> float:
+  """
+  Get the largest sensor radius of the entities in a world. Entities further than this from a tile
+  border cannot be sensed from the other side.
+
+  Args:
+    world (World): The world.
+
+  Returns:
+    float: The largest sensor radius, or 0.0 if no entity has a sensor.
+  """
+  radius = 0.0
+  for entity in world.query(SensorComponent):
+    for sensor in entity.get_component(SensorComponent).sensors:
+      radius = max(radius, getattr(sensor, 'radius', 0.0))
+  return radius
+
+
+class Shard(object):
+  """
+  One tile of a sharded world: a regular World holding the entities inside the tile, plus ghosts of the
+  entities of neighbour tiles close enough to be sensed.
+
+  Ghosts are only inserted into the world's spatial index, so sensors detect them but no system updates
+  them. A ghost flagged for removal (for example, eaten) is reported to its owner, which despawns the
+  real entity at the start of the next tick. References held to a ghost are not redirected when the
+  real entity migrates into this tile; they keep seeing the ghost's last state.
+
+  Attributes:
+    index (int): The tile index of the shard.
+    world (World): The world simulating the tile.
+    layout (ShardLayout): The tiles of the whole world.
+    ghost_width (float): Distance from a tile border within which entities are sent as ghosts.
+    ghosts (Dict[str, Entity]): The ghosts currently known, by entity id.
+    _owners (Dict[str, int]): The tile owning each ghost.
+    _killed (Set[str]): Ghosts reported as removed in the last tick. Their owner may still send them once.
+
+  Methods:
+    load(filename, index, layout, random_seed, ghost_width): Load a scenario and keep the entities of one tile.
+    receive(messages): Apply the messages sent by the other shards.
+    step(dt): Run one tick of the world.
+    send(): Collect the messages for the other shards.
+  """
+  def __init__(self, index: int, world: World, layout: ShardLayout, ghost_width: float) -> None:
+    """
+    Initialize a Shard object. Entities of the world outside the tile are removed.
+
+    Args:
+      index (int): The tile index of the shard.
+      world (World): The world, holding at least the entities of the tile.
+      layout (ShardLayout): The tiles of the whole world.
+      ghost_width (float): Distance from a tile border within which entities are sent as ghosts.
+    """
+    self.index: int = index
+    self.world: World = world
+    self.layout: ShardLayout = layout
+    self.ghost_width: float = ghost_width
+    self.ghosts: Dict[str, Entity] = {}
+    self._owners: Dict[str, int] = {}
+    self._killed: Set[str] = set()
+
+    for entity in tuple(world.entities()):
+      if self._tile_of(entity) != index:
+        world.remove(entity)
+
+  @classmethod
+  def load(cls, filename: str, index: int, layout: ShardLayout, random_seed: int, ghost_width: float | None = None):
+    """
+    Load a scenario and keep the entities of one tile. Every shard loads the same scenario with the same
+    seed, so they agree on the initial state of the whole world.
+
+    Args:
+      filename (str): The scenario file.
+      index (int): The tile index of the shard.
+      layout (ShardLayout): The tiles of the whole world.
+      random_seed (int): The random seed, shared by all shards.
+      ghost_width (float): Ghost zone width. Defaults to the largest sensor radius in the scenario.
+
+    Returns:
+      Shard: The shard.
+    """
+    world = Loader(filename, random_seed=random_seed).load().world
+    if ghost_width is None:
+      ghost_width = max_sensor_radius(world)
+    return cls(index, world, layout, ghost_width)
+
+  def receive(self, messages: Dict[int, Message]) -> None:
+    """
+    Apply the messages sent by the other shards: despawn eaten entities, add migrated ones and
+    replace the ghosts. Messages are applied in sender order, so the result does not depend on
+    the order they arrived in.
+
+    Args:
+      messages (Dict[int, Message]): The messages, by sender tile.
+    """
+    world = self.world
+    senders = sorted(messages)
+    for message in (messages[s] for s in senders):
+      for entity_id in message[KILLS]:
+        entity = world.entities_map.get(entity_id)
+        if entity is not None:
+          world.despawn(entity)
+
+    for message in (messages[s] for s in senders):
+      for data in message[MIGRANTS]:
+        entity = unpack_entity(world, data)
+        self._drop_ghost(entity.id)
+        world.add(entity)
+
+    seen = set()
+    for sender in senders:
+      for state in messages[sender][GHOSTS]:
+        entity_id = state[0]
+        if entity_id in world.entities_map or entity_id in self._killed:
+          continue
+        seen.add(entity_id)
+        ghost = self.ghosts.get(entity_id)
+        if ghost is None:
+          ghost = self.ghosts[entity_id] = make_ghost(state)
+          world.spatial_index.insert(ghost)
+        else:
+          update_ghost(ghost, state)
+          world.spatial_index.move(ghost)
+        self._owners[entity_id] = sender
+
+    for entity_id in [i for i in self.ghosts if i not in seen]:
+      self._drop_ghost(entity_id)
+    self._killed.clear()
+
+  def step(self, dt: float) -> WorldStats:
+    """
+    Run one tick of the world.
+
+    Args:
+      dt (float): The step size, in milliseconds. The same for every shard.
+
+    Returns:
+      WorldStats: The statistics of the shard.
+    """
+    self.world.step(dt)
+    return self.world.stats
+
+  def send(self) -> Outbox:
+    """
+    Collect the messages for the other shards: eaten ghosts, entities that left the tile and
+    ghosts of the entities close to a border.
+
+    Returns:
+      Outbox: The message for each other tile that has something to receive.
+    """
+    outbox: Outbox = {}
+
+    for entity_id, ghost in list(self.ghosts.items()):
+      if ghost.remove:
+        outbox.setdefault(self._owners[entity_id], new_message())[KILLS].append(entity_id)
+        self._killed.add(entity_id)
+        self._drop_ghost(entity_id)
+
+    for entity in tuple(self.world.entities()):
+      tile = self._tile_of(entity)
+      if tile != self.index:
+        outbox.setdefault(tile, new_message())[MIGRANTS].append(pack_entity(self.world, entity))
+
+    if self.ghost_width > 0 and len(self.layout) > 1:
+      for entity in self.world.query(MovementComponent):
+        state: GhostState | None = None
+        for tile in self.layout.near(entity.movement.position, self.ghost_width):
+          if tile != self.index:
+            state = state if state is not None else ghost_state(entity)
+            outbox.setdefault(tile, new_message())[GHOSTS].append(state)
+
+    return outbox
+
+  def _tile_of(self, entity: Entity) -> int:
+    movement = entity.get_component(MovementComponent)
+    return self.layout.tile_of(movement.position) if movement else 0
+
+  def _drop_ghost(self, entity_id: str) -> None:
+    ghost = self.ghosts.pop(entity_id, None)
+    if ghost is not None:
+      self.world.spatial_index.remove(ghost)
+      self._owners.pop(entity_id, None)
@@ -0,0 +1,218 @@
+import copy
+import logging
+import multiprocessing
+import traceback
+from multiprocessing.connection import Connection
+from typing import Dict, List
+
+from creatures.app.io import Loader
+from creatures.core.util import SystemTimings
+from creatures.core.world import WorldStats, DEFAULT_FIXED_DT
+
+from .layout import ShardLayout
+from .shard import Message, Shard, max_sensor_radius
+
+READY = 'ready'
+STEP = 'step'
+CLOSE = 'close'
+TIMINGS = 'timings'
+ERROR = 'error'
+
+
+class ShardError(Exception):
+  """
+  Raised when a shard process fails. The message holds the traceback from the shard.
+  """
+  pass
+
+
+def run_shard(connection: Connection, filename: str, index: int, layout: ShardLayout, random_seed: int, ghost_width: float) -> None:
+  """
+  Entry point of a shard process. Loads the shard, then answers step commands until told to close.
+
+  Args:
+    connection (Connection): The pipe to the coordinator.
+    filename (str): The scenario file.
+    index (int): The tile index of the shard.
+    layout (ShardLayout): The tiles of the whole world.
+    random_seed (int): The random seed, shared by all shards.
+    ghost_width (float): Ghost zone width.
+  """
+  logging.disable(logging.INFO)
+  try:
+    shard = Shard.load(filename, index, layout, random_seed, ghost_width)
+    connection.send((READY, shard.send(), _without_timings(shard.world.stats)))
+    while True:
+      command, messages, dt = connection.recv()
+      if command == CLOSE:
+        break
+      if command == TIMINGS:
+        connection.send((TIMINGS, {}, shard.world.stats.system_timings))
+        continue
+      shard.receive(messages)
+      stats = shard.step(dt)
+      connection.send((STEP, shard.send(), _without_timings(stats)))
+  except Exception:
+    connection.send((ERROR, traceback.format_exc(), None))
+  finally:
+    connection.close()
+
+
+def _without_timings(stats: WorldStats) -> WorldStats:
+  # System timings are much larger than the rest of the stats: they are only sent when asked for.
+  result = copy.copy(stats)
+  result.system_timings = None
+  return result
+
+
+class ShardedWorld(object):
+  """
+  Runs a scenario split into `columns` x `rows` tiles, each simulated by its own process.
+
+  The coordinator talks to every shard over a pipe (a star topology). Each tick it hands every shard the
+  messages the other shards produced in the previous tick (ghosts, migrating entities and removals),
+  lets all shards step in parallel, and collects their new messages and statistics.
+
+  Shards always use fixed steps, so all of them advance by the same amount each tick. A sharded run is
+  deterministic for a given seed and layout, but does not reproduce the single-process run: each shard
+  draws from its own random generator, and removals across a border take effect one tick later.
+
+  Attributes:
+    filename (str): The scenario file.
+    layout (ShardLayout): The tiles of the world.
+    random_seed (int): The random seed, shared by all shards.
+    fixed_dt (float | None): The scenario's fixed step, in milliseconds.
+    time_resolution (float): The scenario's time resolution, which scales the simulation clock.
+    ghost_width (float): Distance from a tile border within which entities are mirrored to neighbours.
+    tick (int): The number of ticks run so far.
+    shard_stats (List[WorldStats]): The latest statistics of each shard.
+
+  Methods:
+    start(): Start the shard processes.
+    step(dt): Run one tick on every shard.
+    close(): Stop the shard processes.
+    stats(): Get the statistics of the whole world.
+    system_timings(): Get the system timings of every shard, pooled.
+  """
+  def __init__(self, filename: str, columns: int = 2, rows: int = 1, random_seed: int = None, ghost_width: float = None) -> None:
+    """
+    Initialize a ShardedWorld object. The scenario is loaded once to learn its size, seed and sensor ranges.
+
+    Args:
+      filename (str): The scenario file.
+      columns (int): Number of tile columns (default is 2).
+      rows (int): Number of tile rows (default is 1).
+      random_seed (int): The random seed. Defaults to the scenario's.
+      ghost_width (float): Ghost zone width. Defaults to the largest sensor radius in the scenario.
+    """
+    self.log = logging.getLogger(self.__class__.__name__)
+    world = Loader(filename, random_seed=random_seed).load().world
+
+    self.filename: str = filename
+    self.layout = ShardLayout(world.size.x, world.size.y, columns, rows)
+    self.random_seed: int = world.random_seed
+    self.fixed_dt: float | None = world.fixed_dt
+    self.time_resolution: float = world.time_resolution
+    self.ghost_width: float = ghost_width if ghost_width is not None else max_sensor_radius(world)
+    self.tick: int = 0
+    self.shard_stats: List[WorldStats] = [world.stats]
+    self._connections: List[Connection] = []
+    self._processes: List[multiprocessing.Process] = []
+    self._pending: Dict[int, Dict[int, Message]] = {}
+
+  def start(self) -> None:
+    """
+    Start the shard processes and wait until all of them loaded their tile.
+    """
+    for index in range(len(self.layout)):
+      connection, child_connection = multiprocessing.Pipe()
+      process = multiprocessing.Process(
+        target=run_shard,
+        args=(child_connection, self.filename, index, self.layout, self.random_seed, self.ghost_width),
+        name=f"shard-{index}",
+        daemon=True
+      )
+      process.start()
+      child_connection.close()
+      self._connections.append(connection)
+      self._processes.append(process)
+
+    self._collect()
+    self.log.info(f"Started {len(self.layout)} shards: {self.layout}, ghost width {self.ghost_width}")
+
+  def step(self, dt: float = None) -> None:
+    """
+    Run one tick on every shard.
+
+    Args:
+      dt (float): Step size in milliseconds. Defaults to the scenario's `fixed_dt`, or DEFAULT_FIXED_DT.
+    """
+    step_dt = dt if dt else (self.fixed_dt if self.fixed_dt else DEFAULT_FIXED_DT)
+    pending, self._pending = self._pending, {}
+    for index, connection in enumerate(self._connections):
+      connection.send((STEP, pending.get(index, {}), step_dt))
+
+    self._collect()
+    self.tick += 1
+
+  def close(self) -> None:
+    """
+    Stop the shard processes.
+    """
+    for connection in self._connections:
+      try:
+        connection.send((CLOSE, None, None))
+      except (BrokenPipeError, OSError):
+        pass
+      connection.close()
+    for process in self._processes:
+      process.join()
+
+    self._connections, self._processes = [], []
+
+  @property
+  def stats(self) -> WorldStats:
+    return WorldStats.aggregate(self.shard_stats)
+
+  def system_timings(self) -> SystemTimings | None:
+    """
+    Get the system timings of every shard, pooled. Unlike the rest of the statistics, shards only send them
+    when asked.
+
+    Returns:
+      SystemTimings | None: The pooled timings, or None if the shards do not keep timings.
+    """
+    for connection in self._connections:
+      connection.send((TIMINGS, None, None))
+    timings = [self._receive(index, connection)[2] for index, connection in enumerate(self._connections)]
+    timings = [t for t in timings if t is not None]
+    return SystemTimings.merge(timings) if timings else None
+
+  def _receive(self, index: int, connection: Connection):
+    try:
+      status, outbox, payload = connection.recv()
+    except EOFError:
+      self.close()
+      raise ShardError(f"Shard {index} exited unexpectedly")
+
+    if status == ERROR:
+      self.close()
+      raise ShardError(f"Shard {index} failed:\n{outbox}")
+    return status, outbox, payload
+
+  def _collect(self) -> None:
+    shard_stats: List[WorldStats] = []
+    for index, connection in enumerate(self._connections):
+      _, outbox, stats = self._receive(index, connection)
+      for destination, message in outbox.items():
+        self._pending.setdefault(destination, {})[index] = message
+      shard_stats.append(stats)
+
+    self.shard_stats = shard_stats
+
+  def __enter__(self):
+    self.start()
+    return self
+
+  def __exit__(self, *_):
+    self.close()
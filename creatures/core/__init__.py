@@ -6,6 +6,7 @@ from .component import *
 from .entity import *
 from .movement import *
 from .primitives import *
+from .spatial import *
 from .system import *
 from .util import *
 from .world import *
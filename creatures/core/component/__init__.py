@@ -1 +1,2 @@
 from .component import *
+from .movement_store import MovementStore
@@ -8,10 +8,14 @@ class Component(object):
 
   Attributes:
     properties (dict): A dictionary holding the properties of the component.
+    transient (bool): Class attribute. Transient components, such as rendering state, are left out of
+      world snapshots and recreated by whoever needs them.
 
   Methods:
     to_dict(): Converts the component and its properties to a dictionary.
   """
+  transient: bool = False
+
   def __init__(self) -> None:
     self.properties = {}
 
@@ -66,12 +70,17 @@ class MovementComponent(Component):
   """
   Represents a component related to movement information.
 
+  The component either holds its vectors itself or, once bound to a `MovementStore`, acts as a
+  view onto one row of the store's arrays. Both modes expose the same attributes.
+
   Attributes:
     position (Vector): The position vector of the entity.
     velocity (Vector): The velocity vector of the entity.
     acceleration (Vector): The acceleration vector of the entity.
 
   Methods:
+    bind(store, row): Make the component a view onto a row of a movement store.
+    unbind(): Copy the row back into the component and detach it from the store.
     to_dict(): Converts the movement component to a dictionary.
   """
   def __init__(self, position: Vector = Vector(0, 0)) -> None:
@@ -83,9 +92,82 @@ class MovementComponent(Component):
 
     """
     super().__init__()
-    self.position:     Vector = position
-    self.velocity:     Vector = Vector(0, 0)
-    self.acceleration: Vector = Vector(0, 0)
+    self._store = None
+    self._row: int = -1
+    self._position:     Vector = position
+    self._velocity:     Vector = Vector(0, 0)
+    self._acceleration: Vector = Vector(0, 0)
+
+  @property
+  def position(self) -> Vector:
+    if self._store is None:
+      return self._position
+    return Vector(*self._store.positions[self._row].tolist())
+
+  @position.setter
+  def position(self, value: Vector):
+    if self._store is None:
+      self._position = value
+    else:
+      self._store.positions[self._row] = (value.x, value.y)
+
+  @property
+  def velocity(self) -> Vector:
+    if self._store is None:
+      return self._velocity
+    return Vector(*self._store.velocities[self._row].tolist())
+
+  @velocity.setter
+  def velocity(self, value: Vector):
+    if self._store is None:
+      self._velocity = value
+    else:
+      self._store.velocities[self._row] = (value.x, value.y)
+
+  @property
+  def acceleration(self) -> Vector:
+    if self._store is None:
+      return self._acceleration
+    return Vector(*self._store.accelerations[self._row].tolist())
+
+  @acceleration.setter
+  def acceleration(self, value: Vector):
+    if self._store is None:
+      self._acceleration = value
+    else:
+      self._store.accelerations[self._row] = (value.x, value.y)
+
+  @property
+  def bound(self) -> bool:
+    """
+    Check if the component is a view onto a movement store.
+
+    Returns:
+      bool: True if the component is bound to a store, False otherwise.
+    """
+    return self._store is not None
+
+  def bind(self, store, row: int) -> None:
+    """
+    Make the component a view onto a row of a movement store. The current vectors are copied into the row.
+
+    Args:
+      store (MovementStore): The store holding the arrays.
+      row (int): The row assigned to this component.
+    """
+    position, velocity, acceleration = self.position, self.velocity, self.acceleration
+    self._store = store
+    self._row = row
+    self.position, self.velocity, self.acceleration = position, velocity, acceleration
+
+  def unbind(self) -> None:
+    """
+    Copy the current row back into the component and detach it from its store.
+    """
+    position, velocity, acceleration = self.position, self.velocity, self.acceleration
+    self._store = None
+    self._row = -1
+    self.position, self.velocity, self.acceleration = position, velocity, acceleration
     
   def to_dict(self) -> Dict[str, Any]:
     """
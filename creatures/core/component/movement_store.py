@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+import numpy as np
+
+from .component import MovementComponent
+
+if TYPE_CHECKING:
+  from creatures.core.entity import Entity
+
+DEFAULT_STORE_CAPACITY = 1024
+
+
+class MovementStore(object):
+  """
+  Structure-of-arrays storage for the movement state of every entity in a world.
+
+  Positions, velocities and accelerations live in contiguous `(capacity, 2)` float arrays. Each attached
+  `MovementComponent` is bound to one row and reads/writes through it. Rows `[0, size)` are always in use:
+  detaching an entity moves the last row into the freed slot, so systems can work on dense slices.
+
+  Attributes:
+    positions (np.ndarray): Entity positions, one row per entity.
+    velocities (np.ndarray): Entity velocities, one row per entity.
+    accelerations (np.ndarray): Entity accelerations, one row per entity.
+    entities (List[Entity]): The entity owning each row in use.
+    size (int): The number of rows in use.
+
+  Methods:
+    attach(entity): Bind an entity's movement component to a new row.
+    detach(entity): Release an entity's row and restore its component to plain vectors.
+    integrate(dt): Advance all positions by their velocity.
+  """
+  def __init__(self, capacity: int = DEFAULT_STORE_CAPACITY) -> None:
+    """
+    Initialize a MovementStore object.
+
+    Args:
+      capacity (int): The number of rows preallocated (default is DEFAULT_STORE_CAPACITY). The store grows as needed.
+    """
+    capacity = max(1, capacity)
+    self.positions:     np.ndarray = np.zeros((capacity, 2), dtype=np.float64)
+    self.velocities:    np.ndarray = np.zeros((capacity, 2), dtype=np.float64)
+    self.accelerations: np.ndarray = np.zeros((capacity, 2), dtype=np.float64)
+    self.entities: List[Entity] = []
+    self.components: List[MovementComponent] = []
+    self.size: int = 0
+
+  @property
+  def capacity(self) -> int:
+    return self.positions.shape[0]
+
+  def attach(self, entity: Entity) -> None:
+    """
+    Bind an entity's movement component to a new row. Components that are already bound are left untouched.
+
+    Args:
+      entity (Entity): The entity to attach. Must have a MovementComponent.
+    """
+    component: MovementComponent = entity.get_component(MovementComponent)
+    if component is None or component.bound:
+      return
+
+    if self.size == self.capacity:
+      self._grow(2 * self.capacity)
+
+    row = self.size
+    self.size += 1
+    self.entities.append(entity)
+    self.components.append(component)
+    component.bind(self, row)
+
+  def detach(self, entity: Entity) -> None:
+    """
+    Release an entity's row. Its component gets its vectors back and stops being a view.
+
+    Args:
+      entity (Entity): The entity to detach.
+    """
+    component: MovementComponent = entity.get_component(MovementComponent)
+    if component is None or component._store is not self:
+      return
+
+    row = component._row
+    component.unbind()
+
+    last = self.size - 1
+    if row != last:
+      self.positions[row] = self.positions[last]
+      self.velocities[row] = self.velocities[last]
+      self.accelerations[row] = self.accelerations[last]
+      self.entities[row] = self.entities[last]
+      self.components[row] = self.components[last]
+      self.components[row]._row = row
+
+    self.positions[last] = 0.0
+    self.velocities[last] = 0.0
+    self.accelerations[last] = 0.0
+    self.entities.pop()
+    self.components.pop()
+    self.size = last
+
+  def integrate(self, dt: float) -> None:
+    """
+    Advance all positions by their velocity in one vectorized operation.
+
+    Args:
+      dt (float): The time step.
+    """
+    n = self.size
+    self.positions[:n] += self.velocities[:n] * dt
+
+  def _grow(self, capacity: int) -> None:
+    for name in ('positions', 'velocities', 'accelerations'):
+      old = getattr(self, name)
+      new = np.zeros((capacity, 2), dtype=old.dtype)
+      new[:self.size] = old[:self.size]
+      setattr(self, name, new)
+
+  def __len__(self) -> int:
+    return self.size
+
+  def __str__(self) -> str:
+    return f"{self.__class__.__name__}(size={self.size}, capacity={self.capacity})"
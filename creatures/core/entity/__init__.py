@@ -1 +1 @@
-from .entity import Entity
\ No newline at end of file
+from .entity import Entity, component_key, set_access_hook
\ No newline at end of file
@@ -1,12 +1,13 @@
 from __future__ import annotations
 from math import sqrt
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 from creatures.core.primitives import Vector
 from creatures.core.component import Component, MetaDataComponent, MovementComponent
 
 _ENTITY_IDS: int = -1
 DEFAULT_MOVEMENT_COMPONENT = [MovementComponent()]
 DEFAULT_METADATA_COMPONENT = [MetaDataComponent()]
+_ACCESS_HOOK: Callable[[str], None] | None = None
 
 def _next_id() -> int:
   global _ENTITY_IDS
@@ -14,6 +15,31 @@ def _next_id() -> int:
   return _ENTITY_IDS
 
 
+def component_key(component_id: str | type) -> str:
+  """
+  Get the key a component type is registered under.
+
+  Args:
+    component_id (str or type): The component type or its name.
+
+  Returns:
+    str: The component type name.
+  """
+  return component_id.__name__ if isinstance(component_id, type) else component_id
+
+
+def set_access_hook(hook: Callable[[str], None] | None) -> None:
+  """
+  Set a function called with the component type name on every component lookup of any entity.
+  Used to validate the accesses systems declare. Pass None to remove it.
+
+  Args:
+    hook (Callable[[str], None] or None): The function to call, or None.
+  """
+  global _ACCESS_HOOK
+  _ACCESS_HOOK = hook
+
+
 class Entity(object):
   """
   Represents an entity in the system.
@@ -24,13 +50,16 @@ class Entity(object):
     properties (dict): Dictionary holding additional properties of the entity.
     type (str): Type of the entity.
     _components (dict): Dictionary holding the components attached to the entity.
+    _world (World): The world the entity was added to, notified when components are added.
 
   Methods:
     add_component(component): Add a component to the entity.
+    remove_component(component_id): Remove a component from the entity.
     get_component(component_id): Get a specific component of the entity.
     mark_remove(): Mark the entity for removal.
     metadata(): Get the metadata component of the entity.
     movement(): Get the movement component of the entity.
+    world(): Get the world the entity is in.
     is_resource(): Check if the entity is a resource.
     name(): Get the name of the entity.
     size(): Get the size of the entity.
@@ -38,6 +67,7 @@ class Entity(object):
     __str__(): Get a string representation of the entity.
     __repr__(): Get a detailed string representation of the entity.
     to_dict(): Convert the entity and its components to a dictionary.
+    __getstate__(): Get the state to pickle, without transient components.
   """
   def __init__(self, id: str, entity_type: str = None) -> None:
     """
@@ -53,16 +83,40 @@ class Entity(object):
     self.properties: Dict[str, Any] = {}
     self.type = entity_type if entity_type else self.__class__.__name__
     self._components: Dict[str, Component] = {}
+    self._world = None
 
   def add_component(self, component: Component):
     """
-    Add a component to the entity.
+    Add a component to the entity. If the entity is in a world, the world's component index is updated.
 
     Args:
       component (Component): The component to be added.
     """
     component_type_name = component.__class__.__qualname__
+    if self._world is not None and component_type_name in self._components:
+      self._world.unindex_component(self, component_type_name)
+
     self._components[component_type_name] = component
+    if self._world is not None:
+      self._world.index_component(self, component_type_name)
+
+  def remove_component(self, component_id: str | type) -> Component | None:
+    """
+    Remove a component from the entity. If the entity is in a world, the world's component index is updated.
+
+    Args:
+      component_id (str or type): Identifier or type of the component. The identifier is the type name.
+
+    Returns:
+      Component or None: The removed component or None if the entity did not hold it.
+    """
+    name = component_key(component_id)
+    if name not in self._components:
+      return None
+
+    if self._world is not None:
+      self._world.unindex_component(self, name)
+    return self._components.pop(name)
   
   def get_component(self, component_id: str | type) -> Component | None:
     """
@@ -74,17 +128,28 @@ class Entity(object):
     Returns:
       Component or None: The requested component or None if not found.
     """
-    name = component_id
-    if isinstance(component_id, type):
-      name = component_id.__name__
-    
+    name = component_key(component_id)
+    if _ACCESS_HOOK is not None:
+      _ACCESS_HOOK(name)
     return self._components.get(name, None)
   
   def mark_remove(self):
     """
-    Mark the entity for removal.
+    Mark the entity for removal. If it is in a world, a despawn command is queued on the world's command buffer.
     """
     self.remove = True
+    if self._world is not None:
+      self._world.commands.despawn(self)
+
+  @property
+  def world(self):
+    """
+    Get the world the entity is in.
+
+    Returns:
+      World or None: The world the entity was added to, or None if it is not in a world.
+    """
+    return self._world
 
   @property
   def metadata(self) -> MetaDataComponent:
@@ -94,6 +159,8 @@ class Entity(object):
     Returns:
       MetaDataComponent: The metadata component of the entity.
     """
+    if _ACCESS_HOOK is not None:
+      _ACCESS_HOOK(MetaDataComponent.__name__)
     return self._components.get(MetaDataComponent.__name__, DEFAULT_METADATA_COMPONENT)
   
   @property
@@ -104,6 +171,8 @@ class Entity(object):
     Returns:
       MovementComponent: The movement component of the entity.
     """
+    if _ACCESS_HOOK is not None:
+      _ACCESS_HOOK(MovementComponent.__name__)
     return self._components.get(MovementComponent.__name__, DEFAULT_MOVEMENT_COMPONENT)
   
   @property
@@ -163,6 +232,20 @@ class Entity(object):
     y_diff = v1.y - v2.y
     return sqrt( x_diff * x_diff + y_diff * y_diff)
 
+  def __getstate__(self) -> Dict[str, Any]:
+    """
+    Get the state to pickle. Transient components, such as rendering state, are left out.
+
+    Returns:
+      dict: The entity attributes.
+    """
+    if not any(component.transient for component in self._components.values()):
+      return self.__dict__
+
+    state = self.__dict__.copy()
+    state['_components'] = {k: v for k, v in self._components.items() if not v.transient}
+    return state
+
   def __str__(self) -> str:
     return f"{self.__class__.__name__}({self.name})"
 
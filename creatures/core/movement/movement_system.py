@@ -1,4 +1,6 @@
 from typing import List
+import numpy as np
+from creatures.core.component import MovementComponent, MovementStore
 from creatures.core.entity import Entity
 from creatures.core.system import System
 from creatures.core.world import World
@@ -7,6 +9,10 @@ from creatures.core.world import World
 class MovementSystem(System):
   """
   A system responsible for updating the movement of entities based on their velocity.
+  Moved entities are re-bucketed in the world's spatial index.
+
+  When the world uses the numpy movement backend, all positions are integrated in a single
+  vectorized operation on the world's MovementStore instead of per entity.
 
   Attributes:
       world (World): The world instance where the system operates.
@@ -14,7 +20,13 @@ class MovementSystem(System):
 
   Methods:
       update(entities): Update the movement of entities based on their velocity.
+
+  Positions are advanced by the time elapsed since the system last ran, so it can be throttled.
   """
+  component_types = (MovementComponent,)
+  reads = ()
+  writes = (MovementComponent,)
+
   def __init__(self, world: World) -> None:
     """
     Initialize a MovementSystem object.
@@ -32,5 +44,28 @@ class MovementSystem(System):
     Args:
         entities (List[Entity]): The list of entities to update.
     """
+    if self.world.movement_store is not None:
+      self._update_store(self.world.movement_store)
+      return
+
+    spatial_index = self.world.spatial_index
     for entity in entities:
-      entity.movement.position += entity.movement.velocity * self.world.dt
+      entity.movement.position += entity.movement.velocity * self.dt
+      spatial_index.move(entity)
+
+  def _update_store(self, store: MovementStore):
+    """
+    Integrate every row of the movement store at once, then re-bucket only the entities that changed cells.
+
+    Args:
+        store (MovementStore): The world's movement store.
+    """
+    spatial_index = self.world.spatial_index
+    positions = store.positions[:store.size]
+
+    old_cells = np.floor(positions / spatial_index.cell_size)
+    store.integrate(self.dt)
+    new_cells = np.floor(positions / spatial_index.cell_size)
+
+    for row in np.flatnonzero((old_cells != new_cells).any(axis=1)).tolist():
+      spatial_index.move(store.entities[row])
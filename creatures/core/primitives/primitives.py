@@ -32,7 +32,10 @@ class Vector(object):
       copy(): Create a copy of the vector.
       __eq__(other): Check if two vectors are approximately equal.
       __str__(): Get a string representation of the vector.
+      __reduce__(): Pickle the vector as its coordinates.
   """
+  __slots__ = ('_x', '_y')
+
   def __init__(self, x: float, y: float) -> None:
     """
     Initialize a Vector object.
@@ -238,6 +241,15 @@ class Vector(object):
     """
     return Vector(self.x, self.y)
 
+  def __reduce__(self) -> Tuple[type, Tuple[float, float]]:
+    """
+    Pickle the vector as its coordinates, which is smaller and faster to restore than its attribute dictionary.
+
+    Returns:
+        tuple: The class and its constructor arguments.
+    """
+    return (Vector, (self._x, self._y))
+
   def __eq__(self, __o: object) -> bool:
     """
     Check if two vectors are approximately equal.
@@ -8,5 +8,8 @@ consistent generation across simulation instances.
 """
 import random
 
+RESOURCE = 'random_generator'
+"""Name systems using the generator declare in their `writes`, so they never draw numbers concurrently."""
+
 generator = random.Random()
 
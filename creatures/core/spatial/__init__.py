@@ -0,0 +1,5 @@
+from .spatial_hash import SpatialHashGrid, DEFAULT_CELL_SIZE
+from .geometry import (
+  BATCH_THRESHOLD, distance_squared, in_radius, entity_distance_squared, entities_in_radius, positions_of,
+  distances_squared, distances, within_radius, by_distance, k_nearest
+)
@@ -0,0 +1,211 @@
+"""
+Distance kernels for proximity checks.
+
+Radius tests compare squared distances against the squared radius, so they never take a square root, and
+sorting by squared distance gives the same order as sorting by distance. Ties are broken by entity id, so
+results do not depend on the order entities are given in. The batched kernels compute the
+distances from one point to many in one numpy operation, reading positions straight from the arrays of a
+MovementStore when the entities are bound to one.
+"""
+from __future__ import annotations
+import heapq
+from typing import Callable, Iterable, List, Sequence
+
+import numpy as np
+
+from creatures.core.component import MovementComponent
+from creatures.core.entity import Entity
+from creatures.core.primitives import Vector
+
+# Below this many entities, testing them one by one is faster than gathering their rows of a MovementStore.
+BATCH_THRESHOLD = 16
+
+
+def distance_squared(a: Vector, b: Vector) -> float:
+  """
+  Get the squared distance between two points.
+
+  Args:
+    a (Vector): A point.
+    b (Vector): Another point.
+
+  Returns:
+    float: The squared distance.
+  """
+  dx = a.x - b.x
+  dy = a.y - b.y
+  return dx * dx + dy * dy
+
+
+def in_radius(a: Vector, b: Vector, radius: float) -> bool:
+  """
+  Check if two points are at most `radius` apart.
+
+  Args:
+    a (Vector): A point.
+    b (Vector): Another point.
+    radius (float): The radius.
+
+  Returns:
+    bool: True if the distance between the points is at most `radius`.
+  """
+  dx = a.x - b.x
+  dy = a.y - b.y
+  return dx * dx + dy * dy <= radius * radius
+
+
+def entity_distance_squared(a: Entity, b: Entity) -> float:
+  """
+  Get the squared distance between two entities.
+
+  Args:
+    a (Entity): An entity.
+    b (Entity): Another entity.
+
+  Returns:
+    float: The squared distance between their positions.
+  """
+  return distance_squared(a.movement.position, b.movement.position)
+
+
+def entities_in_radius(a: Entity, b: Entity, radius: float) -> bool:
+  """
+  Check if two entities are at most `radius` apart.
+
+  Args:
+    a (Entity): An entity.
+    b (Entity): Another entity.
+    radius (float): The radius.
+
+  Returns:
+    bool: True if the distance between their positions is at most `radius`.
+  """
+  return in_radius(a.movement.position, b.movement.position, radius)
+
+
+def positions_of(entities: Sequence[Entity]) -> np.ndarray:
+  """
+  Get the positions of entities as an array. When every entity is bound to the same MovementStore, the rows
+  are taken from its positions array without building any Vector.
+
+  Args:
+    entities (Sequence[Entity]): The entities.
+
+  Returns:
+    np.ndarray: A `(len(entities), 2)` float array.
+  """
+  movements = [entity.movement for entity in entities]
+  stored = _stored_positions(movements)
+  if stored is not None:
+    return stored
+
+  positions = np.empty((len(movements), 2), dtype=np.float64)
+  for i, movement in enumerate(movements):
+    position = movement.position
+    positions[i, 0] = position.x
+    positions[i, 1] = position.y
+  return positions
+
+
+def _stored_positions(movements: List[MovementComponent]) -> np.ndarray | None:
+  store = movements[0]._store if movements else None
+  if store is None or any(m._store is not store for m in movements):
+    return None
+  return store.positions[[m._row for m in movements]]
+
+
+def distances_squared(origin: Vector, positions: np.ndarray) -> np.ndarray:
+  """
+  Get the squared distances from one point to many.
+
+  Args:
+    origin (Vector): The point.
+    positions (np.ndarray): A `(n, 2)` array of points, such as `MovementStore.positions[:size]`.
+
+  Returns:
+    np.ndarray: The `n` squared distances.
+  """
+  dx = positions[:, 0] - origin.x
+  dy = positions[:, 1] - origin.y
+  return dx * dx + dy * dy
+
+
+def distances(origin: Vector, positions: np.ndarray) -> np.ndarray:
+  """
+  Get the distances from one point to many. Prefer `distances_squared()` to compare them against a radius.
+
+  Args:
+    origin (Vector): The point.
+    positions (np.ndarray): A `(n, 2)` array of points.
+
+  Returns:
+    np.ndarray: The `n` distances.
+  """
+  return np.sqrt(distances_squared(origin, positions))
+
+
+def within_radius(origin: Vector, entities: Sequence[Entity], radius: float) -> List[Entity]:
+  """
+  Get the entities at most `radius` away from a point, keeping their order. Many entities bound to a
+  MovementStore are tested in one batch, others one by one.
+
+  Args:
+    origin (Vector): The point.
+    entities (Sequence[Entity]): The entities to test.
+    radius (float): The radius.
+
+  Returns:
+    List[Entity]: The entities within `radius`.
+  """
+  limit = radius * radius
+  # Building Vectors out of a MovementStore costs more than reading its rows in one batch. Plain components
+  # are faster to test one by one.
+  if len(entities) >= BATCH_THRESHOLD and entities[0].movement._store is not None:
+    stored = _stored_positions([entity.movement for entity in entities])
+    if stored is not None:
+      inside = distances_squared(origin, stored) <= limit
+      return [entity for entity, keep in zip(entities, inside.tolist()) if keep]
+
+  x, y = origin.x, origin.y
+  result = []
+  for entity in entities:
+    position = entity.movement.position
+    dx = position.x - x
+    dy = position.y - y
+    if dx * dx + dy * dy <= limit:
+      result.append(entity)
+  return result
+
+
+def by_distance(origin: Vector, entities: Sequence[Entity]) -> List[Entity]:
+  """
+  Sort entities by distance to a point, nearest first, breaking ties by id so the order is reproducible.
+
+  Args:
+    origin (Vector): The point.
+    entities (Sequence[Entity]): The entities.
+
+  Returns:
+    List[Entity]: The sorted entities.
+  """
+  return sorted(entities, key=lambda entity: (distance_squared(origin, entity.movement.position), entity.id))
+
+
+def k_nearest(origin: Vector, entities: Iterable[Entity], k: int = 1,
+              predicate: Callable[[Entity], bool] | None = None) -> List[Entity]:
+  """
+  Get the `k` entities nearest to a point, nearest first. Only the `k` best are kept while the entities are
+  scanned, which is cheaper than sorting them all when `k` is small.
+
+  Args:
+    origin (Vector): The point.
+    entities (Iterable[Entity]): The entities.
+    k (int): The number of entities to get.
+    predicate (Callable[[Entity], bool]): Only consider the entities it accepts, if given.
+
+  Returns:
+    List[Entity]: At most `k` entities, sorted by distance then id.
+  """
+  if predicate is not None:
+    entities = filter(predicate, entities)
+  return heapq.nsmallest(k, entities, key=lambda entity: (distance_squared(origin, entity.movement.position), entity.id))
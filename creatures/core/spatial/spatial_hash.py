@@ -0,0 +1,149 @@
+from math import floor
+from typing import Dict, Iterator, List, Tuple
+from creatures.core.entity import Entity
+from creatures.core.primitives import Vector
+
+DEFAULT_CELL_SIZE = 25.0
+
+Cell = Tuple[int, int]
+
+
+class SpatialHashGrid(object):
+  """
+  A uniform grid that buckets entities by position, used to answer proximity queries
+  without walking every entity in the world.
+
+  Cells are keyed by their integer grid coordinates and only exist while they hold entities.
+  Entities inside a cell are kept in insertion order, so query results are deterministic.
+
+  Attributes:
+    cell_size (float): The side length of each grid cell, in world units.
+    cells (Dict[Cell, Dict[str, Entity]]): Entities bucketed by cell, keyed by entity id.
+    entity_cells (Dict[str, Cell]): The cell each indexed entity currently lives in.
+
+  Methods:
+    cell_of(position): Get the cell coordinates of a position.
+    insert(entity): Add an entity to the grid.
+    remove(entity): Remove an entity from the grid.
+    move(entity): Re-bucket an entity after its position changed.
+    candidates(position, radius): Get the entities in all cells overlapping a circle.
+  """
+  def __init__(self, cell_size: float = DEFAULT_CELL_SIZE) -> None:
+    """
+    Initialize a SpatialHashGrid object.
+
+    Args:
+      cell_size (float): The side length of each grid cell (default is DEFAULT_CELL_SIZE).
+    """
+    if cell_size <= 0:
+      raise ValueError(f"Cell size must be positive, got {cell_size}")
+
+    self.cell_size: float = float(cell_size)
+    self.cells: Dict[Cell, Dict[str, Entity]] = {}
+    self.entity_cells: Dict[str, Cell] = {}
+
+  def cell_of(self, position: Vector) -> Cell:
+    """
+    Get the cell coordinates of a position.
+
+    Args:
+      position (Vector): The position to locate.
+
+    Returns:
+      Cell: The (column, row) of the cell containing the position.
+    """
+    return floor(position.x / self.cell_size), floor(position.y / self.cell_size)
+
+  def insert(self, entity: Entity) -> None:
+    """
+    Add an entity to the grid. An entity already indexed under the same id is replaced.
+
+    Args:
+      entity (Entity): The entity to index.
+    """
+    if entity.id in self.entity_cells:
+      self.remove(entity)
+
+    cell = self.cell_of(entity.movement.position)
+    self.cells.setdefault(cell, {})[entity.id] = entity
+    self.entity_cells[entity.id] = cell
+
+  def remove(self, entity: Entity) -> None:
+    """
+    Remove an entity from the grid. Entities that are not indexed are ignored.
+
+    Args:
+      entity (Entity): The entity to remove.
+    """
+    cell = self.entity_cells.pop(entity.id, None)
+    if cell is None:
+      return
+
+    bucket = self.cells[cell]
+    bucket.pop(entity.id, None)
+    if not bucket:
+      del self.cells[cell]
+
+  def move(self, entity: Entity) -> None:
+    """
+    Re-bucket an entity after its position changed. Cheap when the entity stays in the same cell.
+
+    Args:
+      entity (Entity): The entity that moved.
+    """
+    old_cell = self.entity_cells.get(entity.id)
+    if old_cell is None:
+      return
+
+    new_cell = self.cell_of(entity.movement.position)
+    if new_cell == old_cell:
+      return
+
+    bucket = self.cells[old_cell]
+    bucket.pop(entity.id, None)
+    if not bucket:
+      del self.cells[old_cell]
+
+    self.cells.setdefault(new_cell, {})[entity.id] = entity
+    self.entity_cells[entity.id] = new_cell
+
+  def candidates(self, position: Vector, radius: float) -> List[Entity]:
+    """
+    Get the entities in every cell overlapping the circle of `radius` around `position`.
+
+    The result is a superset of the entities within `radius`; callers are expected to do the
+    exact distance test themselves.
+
+    Args:
+      position (Vector): The center of the query.
+      radius (float): The query radius.
+
+    Returns:
+      List[Entity]: The candidate entities.
+    """
+    x, y, size = position.x, position.y, self.cell_size
+    min_col, max_col = floor((x - radius) / size), floor((x + radius) / size)
+    min_row, max_row = floor((y - radius) / size), floor((y + radius) / size)
+
+    result: List[Entity] = []
+    cells = self.cells
+    for col in range(min_col, max_col + 1):
+      for row in range(min_row, max_row + 1):
+        bucket = cells.get((col, row))
+        if bucket:
+          result.extend(bucket.values())
+
+    return result
+
+  def __len__(self) -> int:
+    return len(self.entity_cells)
+
+  def __contains__(self, entity: Entity) -> bool:
+    return entity.id in self.entity_cells
+
+  def __iter__(self) -> Iterator[Entity]:
+    for bucket in self.cells.values():
+      yield from bucket.values()
+
+  def __str__(self) -> str:
+    return f"{self.__class__.__name__}(cell_size={self.cell_size}, cells={len(self.cells)}, entities={len(self)})"
@@ -1 +1,2 @@
-from .system import System
\ No newline at end of file
+from .system import System
+from .parallel_system import ParallelSystem, DEFAULT_CHUNK_SIZE
\ No newline at end of file
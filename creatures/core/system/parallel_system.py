@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Sequence
+from abc import abstractmethod
+from creatures.core.entity import Entity
+from .system import System
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+class ParallelSystem(System):
+  """
+  Base class for systems that split their entities into chunks and process the chunks on worker threads.
+
+  Subclasses implement `process_chunk()`, which must only compute: it reads the world and returns a result
+  for its chunk, without modifying anything another chunk could read. `merge()` then receives the chunk
+  results in chunk order, on the calling thread, and applies them. Since the merge order never depends on
+  which worker finished first, the outcome is the same as processing all entities serially.
+
+  Attributes:
+      workers (int): Number of worker threads. With 1, chunks are processed serially on the calling thread.
+      chunk_size (int): Number of entities per chunk.
+      _executor (ThreadPoolExecutor | None): The worker pool, created on first use.
+
+  Methods:
+      update(entities): Process the entities chunk by chunk and merge the results.
+      process_chunk(entities): Compute the result of one chunk.
+      merge(results): Apply the chunk results, in chunk order.
+      shutdown(): Stop the worker threads.
+  """
+  def __init__(self, world, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Initialize a ParallelSystem object.
+
+    Args:
+        world: The world instance where the system operates.
+        workers (int): Number of worker threads (default is 1, serial).
+        chunk_size (int): Number of entities per chunk (default is DEFAULT_CHUNK_SIZE).
+    """
+    super().__init__(world)
+    if workers < 1:
+      raise ValueError(f"{self.__class__.__name__}: 'workers' must be at least 1, got {workers}")
+    if chunk_size < 1:
+      raise ValueError(f"{self.__class__.__name__}: 'chunk_size' must be at least 1, got {chunk_size}")
+
+    self.workers: int = int(workers)
+    self.chunk_size: int = int(chunk_size)
+    self._executor: ThreadPoolExecutor | None = None
+
+  def update(self, entities: Sequence[Entity]):
+    """
+    Process the entities chunk by chunk and merge the results.
+
+    Args:
+        entities (Sequence[Entity]): The entities to process.
+    """
+    chunks = [entities[i:i + self.chunk_size] for i in range(0, len(entities), self.chunk_size)]
+    if self.workers == 1 or len(chunks) < 2:
+      results = [self.process_chunk(chunk) for chunk in chunks]
+    else:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.__class__.__name__)
+      results = list(self._executor.map(self.process_chunk, chunks))
+
+    self.merge(results)
+
+  @abstractmethod
+  def process_chunk(self, entities: Sequence[Entity]) -> Any:
+    """
+    Compute the result of one chunk. May run on a worker thread, concurrently with other chunks.
+
+    Args:
+        entities (Sequence[Entity]): The entities of the chunk.
+
+    Returns:
+        Any: The chunk result, passed to `merge()`.
+    """
+    pass
+
+  def merge(self, results: List[Any]):
+    """
+    Apply the chunk results. Runs on the calling thread, with results in chunk order.
+
+    Args:
+        results (List[Any]): One result per chunk, as returned by `process_chunk()`.
+    """
+    pass
+
+  def shutdown(self):
+    """
+    Stop the worker threads. The pool is created again if the system runs after this.
+    """
+    if self._executor is not None:
+      self._executor.shutdown()
+      self._executor = None
+
+  def __getstate__(self):
+    # Worker threads cannot be pickled; the pool is created again on the next update.
+    state = self.__dict__.copy()
+    state['_executor'] = None
+    return state
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 from abc import ABC, abstractmethod
 from creatures.core.entity import Entity
 
@@ -7,12 +7,34 @@ class System(ABC):
   """
   Represents a base class for systems in the simulation.
 
+  By default a system runs on every world tick. A system can instead be scheduled every `every` ticks or
+  every `every_ms` milliseconds of simulation time, with a `phase` offset to spread the load of several
+  throttled systems over different ticks.
+
+  Systems can declare the component types (or named shared resources, such as the random generator) they
+  read and write. The world uses these declarations to run systems that do not conflict in parallel. A
+  system that declares neither runs alone.
+
   Attributes:
       world: The world instance where the system operates.
+      component_types (Tuple[type, ...]): Component types an entity must hold to be passed to `update()`.
+        Empty means every entity in the world is passed.
+      reads (Tuple[type | str, ...] | None): Component types and resources the system only reads.
+      writes (Tuple[type | str, ...] | None): Component types and resources the system modifies.
+      every (int): Run once every `every` ticks.
+      every_ms (float | None): Run once every `every_ms` milliseconds of simulation time. Takes precedence over `every`.
+      phase (float): Offset of the first run, in ticks (or in milliseconds when `every_ms` is set).
+      dt (float): Simulation time elapsed since the system last ran. Set by the world before each `update()`.
 
   Methods:
       update(entities): Update the system based on a list of entities.
+      schedule(every, every_ms, phase): Set how often the system runs.
+      due(tick, clock): Check if the system should run on a tick.
   """
+  component_types: Tuple[type, ...] = ()
+  reads: Tuple[type | str, ...] | None = None
+  writes: Tuple[type | str, ...] | None = None
+
   def __init__(self, world) -> None:
     """
     Initialize a System object.
@@ -21,6 +43,53 @@ class System(ABC):
         world: The world instance where the system operates.
     """
     self.world = world
+    self.every: int = 1
+    self.every_ms: float | None = None
+    self.phase: float = 0
+    self.dt: float = 0.0
+    self._elapsed: float = 0.0
+    self._next_run_ms: float = 0.0
+
+  def schedule(self, every: int = 1, every_ms: float | None = None, phase: float = 0):
+    """
+    Set how often the system runs.
+
+    Args:
+        every (int): Run once every `every` ticks (default is 1, every tick).
+        every_ms (float): Run once every `every_ms` milliseconds of simulation time. Overrides `every`.
+        phase (float): Offset of the first run, in ticks, or in milliseconds when `every_ms` is set.
+    """
+    if every < 1:
+      raise ValueError(f"{self.__class__.__name__}: 'every' must be at least 1, got {every}")
+    if every_ms is not None and every_ms <= 0:
+      raise ValueError(f"{self.__class__.__name__}: 'every_ms' must be positive, got {every_ms}")
+    if phase < 0:
+      raise ValueError(f"{self.__class__.__name__}: 'phase' must not be negative, got {phase}")
+
+    self.every = int(every)
+    self.every_ms = every_ms
+    self.phase = phase
+    self._next_run_ms = phase
+
+  def due(self, tick: int, clock: float) -> bool:
+    """
+    Check if the system should run on a tick. Time-based schedules advance their next run when due.
+
+    Args:
+        tick (int): The world tick number, starting at 0.
+        clock (float): The simulation time, in milliseconds. Unlike `World.clock`, not scaled by the time resolution.
+
+    Returns:
+        bool: True if the system should run.
+    """
+    if self.every_ms is not None:
+      if clock < self._next_run_ms:
+        return False
+      while self._next_run_ms <= clock:
+        self._next_run_ms += self.every_ms
+      return True
+
+    return tick >= self.phase and (tick - self.phase) % self.every == 0
 
   @abstractmethod
   def update(self, entities: List[Entity]):
@@ -1 +1,5 @@
-from .stats import Stats
\ No newline at end of file
+from .stats import Stats
+from .timings import SystemTimings, RollingWindow, DEFAULT_WINDOW, percentile
+from .trace import Tracer, tracer, DEFAULT_CAPACITY as DEFAULT_TRACE_CAPACITY
+from .profiling import (Profiler, DeterministicProfiler, SamplingProfiler, PSTATS, CALLGRIND, FORMATS as PROFILE_FORMATS,
+                        DEFAULT_SAMPLE_INTERVAL, write_pstats, write_callgrind)
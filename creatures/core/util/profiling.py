@@ -0,0 +1,454 @@
+"""
+Profiling of whole runs or of a range of frames.
+
+Two profilers share one interface and one output:
+
+- `DeterministicProfiler` runs cProfile, which counts every call exactly but slows pure Python code down
+  severalfold, and only sees the thread it was started from.
+- `SamplingProfiler` wakes up every few milliseconds on a thread of its own and records the call stack of
+  every other thread. Its overhead does not grow with the number of calls, so it suits long runs, but its
+  numbers are estimates: calls are sample counts, and times are samples times the sampling period.
+
+Either profile is kept as a pstats dictionary, so both are written the same way: as a pstats file, which
+`python -m pstats` and snakeviz read, or in the callgrind format, which KCachegrind and QCachegrind read.
+
+  profiler = SamplingProfiler(frames=(100, 600))
+  for _ in range(1000):
+    profiler.frame(world.tick)
+    world.step()
+  profiler.stop()
+  profiler.write('profile.callgrind', CALLGRIND)
+  print(profiler.report(world))
+"""
+from __future__ import annotations
+import cProfile
+import marshal
+import os
+import queue
+import selectors
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from time import perf_counter
+from types import CodeType
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+  from creatures.core.system import System
+  from creatures.core.world import World
+
+PSTATS = 'pstats'
+CALLGRIND = 'callgrind'
+FORMATS = (PSTATS, CALLGRIND)
+DEFAULT_SAMPLE_INTERVAL = 5.0
+REPORT_FUNCTIONS = 15
+
+# A pstats function label: file name, first line number and function name.
+Label = Tuple[str, int, str]
+# pstats entries: primitive calls, calls, own time, cumulative time, and the same numbers per caller.
+ProfileStats = Dict[Label, Tuple[int, int, float, float, Dict[Label, Tuple[int, int, float, float]]]]
+
+# Python frames at the top of a thread stack in these modules are waiting on a lock, a queue or a socket.
+_IDLE_FILES = frozenset(module.__file__ for module in (threading, queue, selectors))
+
+
+def label(code: CodeType) -> Label:
+  """
+  Get the pstats label of a function.
+
+  Args:
+    code (CodeType): The code object of the function.
+
+  Returns:
+    Label: The file name, first line number and function name.
+  """
+  return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def format_of(path: str) -> str:
+  """
+  Guess the profile format from a file name: callgrind for 'callgrind.out.*' and '*.callgrind', pstats otherwise.
+
+  Args:
+    path (str): The file name.
+
+  Returns:
+    str: PSTATS or CALLGRIND.
+  """
+  name = os.path.basename(path)
+  return CALLGRIND if name.startswith('callgrind.out') or name.endswith('.callgrind') else PSTATS
+
+
+class Profiler(ABC):
+  """
+  Base class of the profilers. A profiler covers either the whole run, from `start()` to `stop()`, or a range
+  of frames: `frame()` is then called before each frame, and starts and stops profiling at the range bounds.
+
+  Attributes:
+    frames (Tuple[int, int | None] | None): The first and last profiled ticks, both included. The last one
+      is None for no end. None to profile from `start()` to `stop()`.
+    running (bool): True while profiling.
+    first_tick (int | None): The tick profiling started at, if it did.
+    last_tick (int | None): The last tick profiled, once profiling stopped.
+    duration (float): Wall-clock time spent profiling, in seconds.
+
+  Methods:
+    start(): Start profiling.
+    stop(): Stop profiling. Profiling can start again, and adds up.
+    close(): Stop profiling for good, keeping the profile.
+    frame(tick): Start or stop profiling at the bounds of `frames`.
+    stats(): Get the profile as a pstats dictionary.
+    write(path, output_format): Write the profile to a file.
+    system_breakdown(world): Get the cumulative time of each system of a world.
+    report(world): Get a summary of the profile.
+  """
+  def __init__(self, frames: Tuple[int, int | None] | None = None) -> None:
+    """
+    Initialize a Profiler object.
+
+    Args:
+      frames (Tuple[int, int | None] | None): The first and last ticks to profile, both included. The last one
+        can be None for no end. Defaults to the whole run.
+    """
+    if frames is not None:
+      first, last = frames
+      if first < 0 or (last is not None and last < first):
+        raise ValueError(f"Invalid frame range {first}..{last}")
+    self.frames: Tuple[int, int | None] | None = frames
+    self.running: bool = False
+    self.first_tick: int | None = None
+    self.last_tick: int | None = None
+    self.duration: float = 0.0
+    self._tick: int | None = None
+    self._started: float = 0.0
+
+  def start(self) -> None:
+    """
+    Start profiling.
+    """
+    if self.running:
+      return
+    self.running = True
+    self._started = perf_counter()
+    self._enable()
+
+  def stop(self) -> None:
+    """
+    Stop profiling. Profiling can start again, and adds up.
+    """
+    if not self.running:
+      return
+    self._disable()
+    self.running = False
+    self.duration += perf_counter() - self._started
+    if self._tick is not None:
+      self.last_tick = self._tick
+
+  def close(self) -> None:
+    """
+    Stop profiling for good and release what the profiler holds, keeping the profile.
+    """
+    self.stop()
+
+  def frame(self, tick: int) -> None:
+    """
+    Start or stop profiling at the bounds of `frames`. Call it before each frame. Does nothing when the
+    whole run is profiled.
+
+    Args:
+      tick (int): The world tick about to run.
+    """
+    if self.frames is None:
+      return
+
+    first, last = self.frames
+    inside = first <= tick and (last is None or tick <= last)
+    if inside and not self.running:
+      if self.first_tick is None:
+        self.first_tick = tick
+      self.start()
+    elif not inside and self.running:
+      self.stop()
+    if self.running:
+      self._tick = tick
+
+  @abstractmethod
+  def _enable(self) -> None:
+    pass
+
+  @abstractmethod
+  def _disable(self) -> None:
+    pass
+
+  @abstractmethod
+  def stats(self) -> ProfileStats:
+    """
+    Get the profile as a pstats dictionary, such as `pstats.Stats.stats`.
+
+    Returns:
+      ProfileStats: For each function, its primitive calls, calls, own time, cumulative time in seconds, and
+        the same numbers per caller.
+    """
+    pass
+
+  def write(self, path: str, output_format: str = None) -> None:
+    """
+    Write the profile to a file.
+
+    Args:
+      path (str): The file to write. Replaced if it exists.
+      output_format (str): PSTATS or CALLGRIND. Defaults to a guess from the file name.
+    """
+    output_format = output_format or format_of(path)
+    if output_format not in FORMATS:
+      raise ValueError(f"Unknown profile format '{output_format}', expected one of {', '.join(FORMATS)}")
+    stats = self.stats()
+    temporary = path + '.tmp'
+    if output_format == PSTATS:
+      write_pstats(stats, temporary)
+    else:
+      write_callgrind(stats, temporary)
+    os.replace(temporary, path)
+
+  def system_breakdown(self, world: World) -> List[Dict[str, Any]]:
+    """
+    Get the cumulative time of each system of a world, from the profile of its `update()` method. Parallel
+    systems sharing one `update()` method are told apart by their `process_chunk()` method, whose time leaves
+    out the merge of the chunk results; other systems sharing a method share one entry. The deferred command
+    flushes of the world are counted as 'commands'.
+
+    Args:
+      world (World): The profiled world.
+
+    Returns:
+      List[Dict[str, Any]]: One entry per system, by decreasing cumulative time, with the system 'name', the
+        number of 'calls', the 'cumulative' time in seconds and its 'share' of the profiled time in percent.
+    """
+    by_update: Dict[Label, List[System]] = {}
+    for system in world.systems:
+      by_update.setdefault(label(type(system).update.__code__), []).append(system)
+
+    names: Dict[Label, List[str]] = {}
+    for function, systems in by_update.items():
+      # Parallel systems share their update() method: tell them apart by their own process_chunk() method.
+      chunks = [label(type(s).process_chunk.__code__) for s in systems if hasattr(type(s), 'process_chunk')]
+      if len(systems) > 1 and len(chunks) == len(systems) == len(set(chunks)):
+        for chunk, system in zip(chunks, systems):
+          names[chunk] = [system.__class__.__name__]
+      else:
+        names[function] = [system.__class__.__name__ for system in systems]
+    names[label(type(world).flush_commands.__code__)] = ['commands']
+
+    stats = self.stats()
+    total = sum(entry[2] for entry in stats.values()) or 1.0
+    breakdown = []
+    for function, systems in names.items():
+      _, calls, _, cumulative, _ = stats.get(function, (0, 0, 0.0, 0.0, {}))
+      breakdown.append({
+        'name': ', '.join(systems),
+        'calls': calls,
+        'cumulative': cumulative,
+        'share': 100 * cumulative / total,
+      })
+    breakdown.sort(key=lambda entry: entry['cumulative'], reverse=True)
+    return breakdown
+
+  def report(self, world: World | None = None) -> str:
+    """
+    Get a summary of the profile: the functions taking the most time of their own, then the breakdown of
+    the world systems.
+
+    Args:
+      world (World): The profiled world, for the system breakdown. Optional.
+
+    Returns:
+      str: A text table.
+    """
+    stats = self.stats()
+    if not stats:
+      return 'Nothing profiled'
+
+    total = sum(entry[2] for entry in stats.values())
+    ticks = f", ticks {self.first_tick}..{self.last_tick}" if self.first_tick is not None else ''
+    lines = [f"{self.__class__.__name__}: {self.duration:.3f}s profiled{ticks}", '']
+    lines.append(f"{'own':>9} {'cumul.':>9} {'calls':>9}  function  (s)")
+    functions = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:REPORT_FUNCTIONS]
+    for (filename, line, name), (_, calls, own, cumulative, _) in functions:
+      where = f"{os.path.basename(filename)}:{line}" if line else filename
+      lines.append(f"{own:9.3f} {cumulative:9.3f} {calls:9d}  {name} ({where})")
+
+    if world is not None and world.systems:
+      breakdown = self.system_breakdown(world)
+      width = max(len('system'), *(len(entry['name']) for entry in breakdown))
+      lines += ['', f"{'system':<{width}} {'cumul.':>9} {'share':>7} {'calls':>9}  (s)"]
+      for entry in breakdown:
+        lines.append(f"{entry['name']:<{width}} {entry['cumulative']:9.3f} {entry['share']:6.1f}% {entry['calls']:9d}")
+    lines.append(f"\nTotal own time: {total:.3f}s")
+    return '\n'.join(lines)
+
+
+class DeterministicProfiler(Profiler):
+  """
+  Profiles with cProfile. Only calls made on the thread that starts profiling are seen, so the work of
+  scheduler and parallel system threads is missing: use a SamplingProfiler for those.
+  """
+  def __init__(self, frames: Tuple[int, int | None] | None = None) -> None:
+    super().__init__(frames)
+    self._profile = cProfile.Profile()
+
+  def _enable(self) -> None:
+    self._profile.enable()
+
+  def _disable(self) -> None:
+    self._profile.disable()
+
+  def stats(self) -> ProfileStats:
+    self._profile.create_stats()
+    return self._profile.stats
+
+
+class SamplingProfiler(Profiler):
+  """
+  Profiles by sampling the call stacks of every thread at a fixed interval, from a thread of its own.
+
+  The sampler needs the interpreter lock to take a sample, and a busy thread only hands it over every
+  `sys.getswitchinterval()` seconds, so the switch interval is lowered to a fraction of the sampling
+  interval while profiling. Samples may still come less often than asked, and times are computed from the
+  number of samples actually taken. Threads waiting on a lock, a queue or a socket are not counted.
+
+  Attributes:
+    interval (float): Time between samples, in milliseconds.
+    samples (int): The number of times the threads were sampled.
+  """
+  def __init__(self, frames: Tuple[int, int | None] | None = None, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+    """
+    Initialize a SamplingProfiler object.
+
+    Args:
+      frames (Tuple[int, int | None] | None): The first and last ticks to profile, both included. Defaults to
+        the whole run.
+      interval (float): Time between samples, in milliseconds (default is DEFAULT_SAMPLE_INTERVAL).
+    """
+    super().__init__(frames)
+    if interval <= 0:
+      raise ValueError(f"Sample interval must be positive, got {interval}")
+    self.interval: float = float(interval)
+    self.samples: int = 0
+    self._stacks: Counter[Tuple[CodeType, ...]] = Counter()
+    self._sampling = threading.Event()
+    self._stopped = threading.Event()
+    self._thread: threading.Thread | None = None
+    self._switch_interval: float = sys.getswitchinterval()
+
+  def _enable(self) -> None:
+    self._switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(self._switch_interval, self.interval / 1000 / 4))
+    self._sampling.set()
+    if self._thread is None:
+      self._stopped.clear()
+      self._thread = threading.Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+      self._thread.start()
+
+  def _disable(self) -> None:
+    self._sampling.clear()
+    sys.setswitchinterval(self._switch_interval)
+
+  def close(self) -> None:
+    """
+    Stop profiling and end the sampling thread, keeping the samples taken.
+    """
+    self.stop()
+    if self._thread is not None:
+      self._stopped.set()
+      self._sampling.set()
+      self._thread.join()
+      self._thread = None
+
+  def _run(self) -> None:
+    own = threading.get_ident()
+    interval = self.interval / 1000
+    deadline = perf_counter()
+    while True:
+      if not self._sampling.is_set():
+        self._sampling.wait()
+        deadline = perf_counter()
+      # Aim at a fixed rate: the time taken to get the interpreter lock back comes out of the next wait.
+      deadline = max(deadline + interval, perf_counter())
+      if self._stopped.wait(deadline - perf_counter()):
+        return
+      if not self._sampling.is_set():
+        continue
+
+      for thread, frame in sys._current_frames().items():
+        if thread == own or frame.f_code.co_filename in _IDLE_FILES:
+          continue
+        stack = []
+        while frame is not None:
+          stack.append(frame.f_code)
+          frame = frame.f_back
+        self._stacks[tuple(stack)] += 1
+      self.samples += 1
+
+  def stats(self) -> ProfileStats:
+    period = self.duration / self.samples if self.samples else 0.0
+    functions: Dict[Label, List[Any]] = {}
+    for stack, count in list(self._stacks.items()):
+      weight = count * period
+      labels = [label(code) for code in stack]
+      for function in set(labels):
+        entry = functions.setdefault(function, [0, 0, 0.0, 0.0, {}])
+        entry[0] += count
+        entry[1] += count
+        entry[3] += weight
+      functions[labels[0]][2] += weight
+
+      # Stacks are listed from the innermost frame: each frame is called by the next one.
+      edges = set()
+      for depth, (callee, caller) in enumerate(zip(labels, labels[1:])):
+        if (callee, caller) in edges:
+          continue
+        edges.add((callee, caller))
+        calls, primitive, own, cumulative = functions[callee][4].get(caller, (0, 0, 0.0, 0.0))
+        functions[callee][4][caller] = (calls + count, primitive + count, own + (weight if depth == 0 else 0.0), cumulative + weight)
+
+    return {function: (cc, nc, tt, ct, callers) for function, (cc, nc, tt, ct, callers) in functions.items()}
+
+
+def write_pstats(stats: ProfileStats, path: str) -> None:
+  """
+  Write a profile in the format of `cProfile.Profile.dump_stats()`, which `pstats.Stats` loads.
+
+  Args:
+    stats (ProfileStats): The profile.
+    path (str): The file to write.
+  """
+  with open(path, 'wb') as fd:
+    marshal.dump(stats, fd)
+
+
+def write_callgrind(stats: ProfileStats, path: str) -> None:
+  """
+  Write a profile in the callgrind format, with costs in microseconds.
+
+  Args:
+    stats (ProfileStats): The profile.
+    path (str): The file to write.
+  """
+  callees: Dict[Label, List[Tuple[Label, int, float]]] = {}
+  for callee, (_, _, _, _, callers) in stats.items():
+    for caller, (calls, _, _, cumulative) in callers.items():
+      callees.setdefault(caller, []).append((callee, calls, cumulative))
+
+  total = sum(entry[2] for entry in stats.values())
+  with open(path, 'w') as fd:
+    fd.write(f"# callgrind format\nversion: 1\ncreator: creatures\nevents: Microseconds\nsummary: {_us(total)}\n")
+    for function, (_, _, own, _, _) in stats.items():
+      filename, line, name = function
+      fd.write(f"\nfl={filename}\nfn={name}:{line}\n{line} {_us(own)}\n")
+      for (callee_file, callee_line, callee_name), calls, cumulative in callees.get(function, ()):
+        fd.write(f"cfl={callee_file}\ncfn={callee_name}:{callee_line}\ncalls={calls} {callee_line}\n{line} {_us(cumulative)}\n")
+
+
+def _us(seconds: float) -> int:
+  return int(round(seconds * 1e6))
@@ -0,0 +1,210 @@
+from __future__ import annotations
+from math import ceil
+from typing import Any, Dict, Iterable, List, Sequence
+
+from .stats import Stats
+
+DEFAULT_WINDOW = 600
+PERCENTILES = (50, 95, 99)
+
+
+class RollingWindow(object):
+  """
+  The last `size` samples of a measurement, kept in a preallocated ring buffer so adding a sample never
+  allocates.
+
+  Attributes:
+    size (int): The number of samples kept.
+    count (int): The number of samples currently held, up to `size`.
+
+  Methods:
+    add(value): Add a sample, dropping the oldest one when the window is full.
+    values(): Get the samples held, oldest first.
+    percentile(p): Get a percentile of the samples held.
+    max(): Get the largest sample held.
+  """
+  __slots__ = ('size', 'count', '_values', '_next')
+
+  def __init__(self, size: int = DEFAULT_WINDOW) -> None:
+    """
+    Initialize a RollingWindow object.
+
+    Args:
+      size (int): The number of samples kept (default is DEFAULT_WINDOW).
+    """
+    if size < 1:
+      raise ValueError(f"Window size must be at least 1, got {size}")
+    self.size: int = int(size)
+    self.count: int = 0
+    self._values: List[float] = [0.0] * self.size
+    self._next: int = 0
+
+  def add(self, value: float) -> None:
+    """
+    Add a sample, dropping the oldest one when the window is full.
+
+    Args:
+      value (float): The sample.
+    """
+    self._values[self._next] = value
+    self._next = (self._next + 1) % self.size
+    if self.count < self.size:
+      self.count += 1
+
+  def values(self) -> List[float]:
+    """
+    Get the samples held, oldest first.
+
+    Returns:
+      List[float]: The samples.
+    """
+    if self.count < self.size:
+      return self._values[:self.count]
+    return self._values[self._next:] + self._values[:self._next]
+
+  def percentile(self, p: float) -> float:
+    """
+    Get a percentile of the samples held, by the nearest-rank method.
+
+    Args:
+      p (float): The percentile, between 0 and 100.
+
+    Returns:
+      float: The sample at that rank, or 0.0 if the window is empty.
+    """
+    return percentile(sorted(self.values()), p)
+
+  def max(self) -> float:
+    """
+    Get the largest sample held.
+
+    Returns:
+      float: The largest sample, or 0.0 if the window is empty.
+    """
+    return max(self.values(), default=0.0)
+
+  def __len__(self) -> int:
+    return self.count
+
+
+def percentile(ordered: Sequence[float], p: float) -> float:
+  """
+  Get a percentile of sorted samples, by the nearest-rank method.
+
+  Args:
+    ordered (Sequence[float]): The samples, sorted.
+    p (float): The percentile, between 0 and 100.
+
+  Returns:
+    float: The sample at that rank, or 0.0 without samples.
+  """
+  if not ordered:
+    return 0.0
+  rank = max(1, ceil(p / 100 * len(ordered)))
+  return ordered[min(rank, len(ordered)) - 1]
+
+
+class SystemTimings(Stats):
+  """
+  Rolling timings of each system of a world, in milliseconds. Only the last `window` runs of each system
+  are kept, so percentiles follow the current state of the simulation rather than its whole history.
+
+  Attributes:
+    window (int): The number of runs kept per system.
+    windows (Dict[str, RollingWindow]): The timings of each system, keyed by name, in the order they first ran.
+
+  Methods:
+    record(name, milliseconds): Add the duration of one run of a system.
+    summary(): Get the percentiles and maximum of each system.
+    get_dict(): Get a dictionary representation of the timings, for display.
+    merge(timings): Pool the samples of several worlds.
+  """
+  def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+    """
+    Initialize a SystemTimings object.
+
+    Args:
+      window (int): The number of runs kept per system (default is DEFAULT_WINDOW).
+    """
+    self.window: int = int(window)
+    self.windows: Dict[str, RollingWindow] = {}
+
+  def record(self, name: str, milliseconds: float) -> None:
+    """
+    Add the duration of one run of a system.
+
+    Args:
+      name (str): The system name.
+      milliseconds (float): The duration of the run.
+    """
+    window = self.windows.get(name)
+    if window is None:
+      window = self.windows.setdefault(name, RollingWindow(self.window))
+    window.add(milliseconds)
+
+  def summary(self) -> Dict[str, Dict[str, float]]:
+    """
+    Get the percentiles and maximum of each system.
+
+    Returns:
+      Dict[str, Dict[str, float]]: For each system, 'p50', 'p95', 'p99' and 'max' in milliseconds, and the
+        number of runs they were taken over as 'runs'.
+    """
+    result = {}
+    for name, window in self.windows.items():
+      ordered = sorted(window.values())
+      result[name] = {
+        **{f"p{p}": percentile(ordered, p) for p in PERCENTILES},
+        'max': ordered[-1] if ordered else 0.0,
+        'runs': len(ordered),
+      }
+    return result
+
+  def get_dict(self) -> Dict[str, Any]:
+    """
+    Get a dictionary representation of the timings, for display.
+
+    Returns:
+      dict: A header entry, then one entry per system with its percentiles and maximum.
+    """
+    summary = self.summary()
+    if not summary:
+      return {}
+    columns = [f"p{p}" for p in PERCENTILES] + ['max']
+    return {
+      'system timings': '/'.join(columns),
+      **{name: '/'.join(f"{values[c]:.2f}" for c in columns) + 'ms' for name, values in summary.items()},
+    }
+
+  @classmethod
+  def merge(cls, timings: Iterable[SystemTimings]) -> SystemTimings:
+    """
+    Pool the samples of several worlds, such as the shards of one world.
+
+    Args:
+      timings (Iterable[SystemTimings]): The timings of each world.
+
+    Returns:
+      SystemTimings: Timings holding the samples of every world, per system.
+    """
+    timings = list(timings)
+    result = cls(sum(t.window for t in timings) or DEFAULT_WINDOW)
+    for other in timings:
+      for name, window in other.windows.items():
+        for value in window.values():
+          result.record(name, value)
+    return result
+
+  def __str__(self) -> str:
+    summary = self.summary()
+    if not summary:
+      return 'No system timings'
+    width = max(len('system'), *(len(name) for name in summary))
+    header = f"{'system':<{width}} " + ' '.join(f"{f'p{p}':>8}" for p in PERCENTILES) + f" {'max':>8} {'runs':>6}"
+    lines = [header + '  (ms)']
+    for name, values in summary.items():
+      lines.append(
+        f"{name:<{width}} " + ' '.join(f"{values[f'p{p}']:8.3f}" for p in PERCENTILES)
+        + f" {values['max']:8.3f} {values['runs']:6d}"
+      )
+    return '\n'.join(lines)
@@ -0,0 +1,217 @@
+"""
+Span tracing in the Chrome trace-event format, which Perfetto (https://ui.perfetto.dev) and chrome://tracing open.
+
+Tracing is off by default. `tracer.start()` allocates a ring buffer of spans; from then on, instrumented code
+adds one span per call, and once the buffer is full the oldest spans are overwritten. Nothing is written to
+disk until `tracer.write()`, so tracing a long run costs one list write per span and no I/O.
+
+Hot code checks `tracer.enabled` and reads the clock itself:
+
+  start = perf_counter_ns() if tracer.enabled else 0
+  ...
+  if start:
+    tracer.add('World.update', 'world', start, perf_counter_ns() - start)
+
+Elsewhere, `with tracer.span('Loader.load', 'loader'):` does the same, and costs nothing when tracing is off.
+"""
+from __future__ import annotations
+import itertools
+import json
+import os
+import threading
+from time import perf_counter_ns
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_CAPACITY = 1 << 18
+
+
+class _Span(object):
+  __slots__ = ('tracer', 'name', 'category', 'start')
+
+  def __init__(self, tracer: Tracer, name: str, category: str) -> None:
+    self.tracer = tracer
+    self.name = name
+    self.category = category
+    self.start = 0
+
+  def __enter__(self):
+    self.start = perf_counter_ns()
+    return self
+
+  def __exit__(self, *_):
+    self.tracer.add(self.name, self.category, self.start, perf_counter_ns() - self.start)
+
+
+class _NullSpan(object):
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *_):
+    pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+  """
+  Records spans into a preallocated ring buffer and writes them as Chrome trace-event JSON.
+
+  Attributes:
+    enabled (bool): True while spans are recorded.
+    capacity (int): The number of spans the buffer holds. Older spans are overwritten.
+    recorded (int): The number of spans recorded since `start()`, including overwritten ones.
+
+  Methods:
+    start(capacity): Allocate the buffer and start recording.
+    stop(): Stop recording. The buffer is kept until the next `start()`.
+    add(name, category, start, duration): Record a span.
+    span(name, category): Get a context manager recording a span around its block.
+    events(): Get the recorded spans as trace events.
+    write(path): Write the recorded spans to a JSON file.
+  """
+  def __init__(self) -> None:
+    self.enabled: bool = False
+    self.capacity: int = 0
+    self.recorded: int = 0
+    self._origin: int = 0
+    self._lock = threading.Lock()
+    self._counter = itertools.count()
+    self._keys: Dict[str, int] = {}
+    self._key_list: List[Tuple[str, str]] = []
+    self._threads: Dict[int, int] = {}
+    self._thread_names: List[str] = []
+    self._spans: List[Tuple[int, int, int, int] | None] = []
+
+  def start(self, capacity: int = DEFAULT_CAPACITY) -> None:
+    """
+    Allocate the buffer and start recording. Spans recorded before are dropped.
+
+    Args:
+      capacity (int): The number of spans the buffer holds (default is DEFAULT_CAPACITY).
+    """
+    if capacity < 1:
+      raise ValueError(f"Trace capacity must be at least 1, got {capacity}")
+    self.enabled = False
+    self.capacity = int(capacity)
+    self.recorded = 0
+    self._counter = itertools.count()
+    self._keys, self._key_list, self._threads, self._thread_names = {}, [], {}, []
+    self._spans = [None] * self.capacity
+    self._origin = perf_counter_ns()
+    self.enabled = True
+
+  def stop(self) -> None:
+    """
+    Stop recording. The buffer is kept until the next `start()`, so it can still be written.
+    """
+    self.enabled = False
+
+  def add(self, name: str, category: str, start: int, duration: int) -> None:
+    """
+    Record a span. Safe to call from several threads: each call takes its own slot, and only the first
+    span of a name or of a thread takes a lock.
+
+    Args:
+      name (str): The span name.
+      category (str): The span category, used to filter spans in the viewer. Fixed by the first span of a name.
+      start (int): The start time, from `time.perf_counter_ns()`.
+      duration (int): The duration, in nanoseconds.
+    """
+    if not self.enabled:
+      return
+
+    key_id = self._keys.get(name)
+    if key_id is None:
+      key_id = self._register_key(name, category)
+    thread_id = self._threads.get(threading.get_ident())
+    if thread_id is None:
+      thread_id = self._register_thread()
+
+    index = next(self._counter)
+    self._spans[index % self.capacity] = (start, duration, key_id, thread_id)
+    if index >= self.recorded:
+      self.recorded = index + 1
+
+  def _register_key(self, name: str, category: str) -> int:
+    with self._lock:
+      if name not in self._keys:
+        self._key_list.append((name, category))
+        self._keys[name] = len(self._key_list) - 1
+      return self._keys[name]
+
+  def _register_thread(self) -> int:
+    with self._lock:
+      thread = threading.get_ident()
+      if thread not in self._threads:
+        self._thread_names.append(threading.current_thread().name)
+        self._threads[thread] = len(self._thread_names) - 1
+      return self._threads[thread]
+
+  def span(self, name: str, category: str):
+    """
+    Get a context manager recording a span around its block. Does nothing while tracing is off.
+
+    Args:
+      name (str): The span name.
+      category (str): The span category.
+
+    Returns:
+      A context manager.
+    """
+    return _Span(self, name, category) if self.enabled else _NULL_SPAN
+
+  def events(self) -> List[Dict[str, Any]]:
+    """
+    Get the recorded spans as trace events, oldest first, after one metadata event naming each thread.
+
+    Returns:
+      List[Dict[str, Any]]: Complete ('X') events, with times in microseconds since `start()`.
+    """
+    with self._lock:
+      split = self.recorded % self.capacity if self.recorded > self.capacity else 0
+      spans = self._spans[split:] + self._spans[:split]
+      keys = list(self._key_list)
+      thread_names = list(self._thread_names)
+
+    pid = os.getpid()
+    events: List[Dict[str, Any]] = [
+      {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+      for tid, name in enumerate(thread_names)
+    ]
+    for span in spans:
+      if span is None:
+        continue
+      start, duration, key_id, tid = span
+      name, category = keys[key_id]
+      events.append({
+        'name': name, 'cat': category, 'ph': 'X', 'ts': (start - self._origin) / 1000, 'dur': duration / 1000,
+        'pid': pid, 'tid': tid,
+      })
+    return events
+
+  def write(self, path: str) -> int:
+    """
+    Write the recorded spans to a JSON file in the Chrome trace-event format. Recording goes on.
+
+    Args:
+      path (str): The file to write. Replaced if it exists.
+
+    Returns:
+      int: The number of spans written.
+    """
+    events = self.events()
+    dropped = max(0, self.recorded - self.capacity)
+    trace = {
+      'traceEvents': events,
+      'displayTimeUnit': 'ms',
+      'otherData': {'recorded_spans': self.recorded, 'dropped_spans': dropped},
+    }
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as fd:
+      json.dump(trace, fd, separators=(',', ':'))
+    os.replace(temporary, path)
+    return min(self.recorded, self.capacity)
+
+
+tracer = Tracer()
@@ -1 +1,6 @@
-from .world import World, Frame, DEFAULT_TIME_RESOLUTION
\ No newline at end of file
+from .commands import CommandBuffer
+from .scheduler import SystemScheduler, UndeclaredAccessError, DEFAULT_WORKERS, conflicts
+from .world import World, WorldStats, Frame, DEFAULT_TIME_RESOLUTION, DEFAULT_FIXED_DT, DEFAULT_MAX_CATCH_UP, MOVEMENT_BACKEND_OBJECT, MOVEMENT_BACKEND_NUMPY, MOVEMENT_BACKENDS
+from . import snapshot
+from .snapshot import SnapshotException
+from .branches import BranchError, BranchResult, run_branches, fork_supported
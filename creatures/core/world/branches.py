@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import multiprocessing
+import traceback
+from multiprocessing.connection import Connection, wait
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence
+
+from creatures.core.entity import entity as entity_module
+from creatures.core.random_generator import generator
+
+if TYPE_CHECKING:
+  from .world import World, WorldStats
+
+Branch = Callable[['World'], Any]
+
+_OK = 'ok'
+_ERROR = 'error'
+
+
+class BranchError(Exception):
+  """
+  Raised when a branch fails. The message holds the traceback from the branch.
+  """
+  pass
+
+
+class BranchResult(object):
+  """
+  The outcome of one branch of a world.
+
+  Attributes:
+    index (int): The position of the branch in the list given to `run_branches()`.
+    seed (int | None): The seed the random generator was reset to, or None if the branch continued
+      with a copy of the parent's generator.
+    value (Any): What the branch function returned.
+    stats (WorldStats): The statistics of the branch world once the branch function returned.
+  """
+  def __init__(self, index: int, seed: int | None, value: Any, stats: WorldStats) -> None:
+    self.index: int = index
+    self.seed: int | None = seed
+    self.value: Any = value
+    self.stats: WorldStats = stats
+
+  def __repr__(self) -> str:
+    return f"{self.__class__.__name__}({self.index}, seed={self.seed}, value={self.value!r})"
+
+
+def fork_supported() -> bool:
+  """
+  Check if branches can run in forked processes on this platform.
+
+  Returns:
+    bool: True if the 'fork' start method is available.
+  """
+  return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def run_branches(world: World,
+                 branches: Sequence[Branch],
+                 seeds: Sequence[int | None] = None,
+                 workers: int = None,
+                 processes: bool = True) -> List[BranchResult]:
+  """
+  Run alternative futures of a world side by side.
+
+  Every branch function gets its own copy of the world as it is now. It can change parameters, run steps and
+  return whatever it wants to report. The parent world is never touched.
+
+  With `processes` (the default, where `os.fork` exists), each branch runs in a forked child process. The
+  world is shared copy-on-write rather than copied up front, and branches run in parallel. Branch functions
+  need not be picklable, but their return values must be. Without it, branches run one after the other in
+  this process, on copies made by `World.fork()`.
+
+  Each branch either reseeds the random generator with its entry in `seeds`, or, when the entry is None,
+  continues with a copy of the generator state at the fork. Either way branches never draw from each other's
+  generator, and the parent's generator and entity id counter are left as they were.
+
+  Args:
+    world (World): The world to branch from.
+    branches (Sequence[Branch]): One function per branch, called with the branch's world.
+    seeds (Sequence[int | None]): One seed per branch. Defaults to None for every branch.
+    workers (int): Maximum number of branches running at once. Defaults to one per CPU.
+    processes (bool): Run branches in forked processes. Falls back to running them in turn if fork is not
+      available.
+
+  Returns:
+    List[BranchResult]: One result per branch, in order.
+  """
+  seeds = list(seeds) if seeds is not None else [None] * len(branches)
+  if len(seeds) != len(branches):
+    raise ValueError(f"Got {len(seeds)} seeds for {len(branches)} branches")
+
+  if processes and fork_supported():
+    return _run_forked(world, branches, seeds, workers or multiprocessing.cpu_count())
+  return _run_in_turn(world, branches, seeds)
+
+
+def _run_branch(world: World, index: int, branch: Branch, seed: int | None) -> BranchResult:
+  if seed is not None:
+    generator.seed(seed)
+  value = branch(world)
+  return BranchResult(index, seed, value, world.stats)
+
+
+def _run_in_turn(world: World, branches: Sequence[Branch], seeds: List[int | None]) -> List[BranchResult]:
+  random_state, entity_ids = generator.getstate(), entity_module._ENTITY_IDS
+  results: List[BranchResult] = []
+  try:
+    for index, (branch, seed) in enumerate(zip(branches, seeds)):
+      generator.setstate(random_state)
+      entity_module._ENTITY_IDS = entity_ids
+      branch_world = world.fork()
+      try:
+        results.append(_run_branch(branch_world, index, branch, seed))
+      except Exception:
+        raise BranchError(f"Branch {index} failed:\n{traceback.format_exc()}")
+      finally:
+        branch_world.shutdown()
+  finally:
+    generator.setstate(random_state)
+    entity_module._ENTITY_IDS = entity_ids
+
+  return results
+
+
+def _fork_main(connection: Connection, world: World, index: int, branch: Branch, seed: int | None) -> None:
+  # Worker threads do not survive a fork: drop the parent's pools so the branch starts its own.
+  world.shutdown()
+  try:
+    connection.send((_OK, _run_branch(world, index, branch, seed)))
+  except Exception:
+    connection.send((_ERROR, traceback.format_exc()))
+  finally:
+    connection.close()
+
+
+def _run_forked(world: World, branches: Sequence[Branch], seeds: List[int | None], workers: int) -> List[BranchResult]:
+  context = multiprocessing.get_context('fork')
+  results: Dict[int, BranchResult] = {}
+  errors: Dict[int, str] = {}
+  running: Dict[Connection, multiprocessing.Process] = {}
+  indexes: Dict[Connection, int] = {}
+  pending = list(enumerate(zip(branches, seeds)))
+
+  while pending or running:
+    while pending and len(running) < workers:
+      index, (branch, seed) = pending.pop(0)
+      connection, child_connection = context.Pipe(duplex=False)
+      process = context.Process(
+        target=_fork_main,
+        args=(child_connection, world, index, branch, seed),
+        name=f"branch-{index}",
+        daemon=True
+      )
+      process.start()
+      child_connection.close()
+      running[connection] = process
+      indexes[connection] = index
+
+    for connection in wait(list(running)):
+      index, process = indexes.pop(connection), running.pop(connection)
+      try:
+        status, payload = connection.recv()
+      except EOFError:
+        process.join()
+        status, payload = _ERROR, f"Process exited with code {process.exitcode} before reporting"
+      connection.close()
+      process.join()
+      if status == _OK:
+        results[index] = payload
+      else:
+        errors[index] = payload
+
+  if errors:
+    index = min(errors)
+    raise BranchError(f"Branch {index} failed:\n{errors[index]}")
+  return [results[index] for index in range(len(branches))]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, List, Tuple
+from creatures.core.component import Component
+from creatures.core.entity import Entity
+
+if TYPE_CHECKING:
+  from .world import World
+
+SPAWN = 'spawn'
+DESPAWN = 'despawn'
+ADD_COMPONENT = 'add_component'
+REMOVE_COMPONENT = 'remove_component'
+
+Command = Tuple[str, Entity, Any]
+
+
+class CommandBuffer(object):
+  """
+  Records structural world mutations so they can be applied in one batch at a sync point.
+
+  Systems write to the buffer instead of mutating the world while they iterate it. The world
+  flushes the buffer between systems, applying commands in the order they were recorded.
+
+  Attributes:
+    commands (List[Command]): The recorded commands, as (operation, entity, argument) tuples.
+
+  Methods:
+    spawn(entity): Add an entity to the world.
+    despawn(entity): Remove an entity from the world.
+    add_component(entity, component): Attach a component to an entity.
+    remove_component(entity, component_type): Detach a component from an entity.
+    flush(world): Apply and clear the recorded commands.
+  """
+  def __init__(self) -> None:
+    self.commands: List[Command] = []
+
+  def spawn(self, entity: Entity) -> None:
+    """
+    Add an entity to the world at the next sync point.
+
+    Args:
+      entity (Entity): The entity to add.
+    """
+    self.commands.append((SPAWN, entity, None))
+
+  def despawn(self, entity: Entity) -> None:
+    """
+    Remove an entity from the world at the next sync point. Despawning an entity twice is harmless.
+
+    Args:
+      entity (Entity): The entity to remove.
+    """
+    self.commands.append((DESPAWN, entity, None))
+
+  def add_component(self, entity: Entity, component: Component) -> None:
+    """
+    Attach a component to an entity at the next sync point.
+
+    Args:
+      entity (Entity): The entity receiving the component.
+      component (Component): The component to attach.
+    """
+    self.commands.append((ADD_COMPONENT, entity, component))
+
+  def remove_component(self, entity: Entity, component_type: type | str) -> None:
+    """
+    Detach a component from an entity at the next sync point.
+
+    Args:
+      entity (Entity): The entity holding the component.
+      component_type (type or str): The component type, or its name.
+    """
+    self.commands.append((REMOVE_COMPONENT, entity, component_type))
+
+  def flush(self, world: World) -> int:
+    """
+    Apply the recorded commands to a world, in order, and clear the buffer.
+
+    Commands recorded while flushing are applied in the same flush.
+
+    Args:
+      world (World): The world to apply the commands to.
+
+    Returns:
+      int: The number of commands applied.
+    """
+    applied = 0
+    while self.commands:
+      commands, self.commands = self.commands, []
+      for operation, entity, argument in commands:
+        if operation == SPAWN:
+          world.add(entity)
+        elif operation == DESPAWN:
+          world.despawn(entity)
+        elif operation == ADD_COMPONENT:
+          entity.add_component(argument)
+        elif operation == REMOVE_COMPONENT:
+          entity.remove_component(argument)
+      applied += len(commands)
+
+    return applied
+
+  def __len__(self) -> int:
+    return len(self.commands)
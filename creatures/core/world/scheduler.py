@@ -0,0 +1,225 @@
+from __future__ import annotations
+import threading
+from time import perf_counter_ns
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Sequence, Tuple
+from creatures.core.entity import Entity, component_key, set_access_hook
+from creatures.core.system import System
+from creatures.core.util import SystemTimings, tracer
+
+from .commands import CommandBuffer
+
+if TYPE_CHECKING:
+  from .world import World
+
+DEFAULT_WORKERS = 4
+
+Stage = List[System]
+
+
+class UndeclaredAccessError(RuntimeError):
+  """
+  Raised in validation mode when a system touches a component it did not declare in `reads` or `writes`.
+  """
+  pass
+
+
+def _access_keys(system: System) -> Tuple[FrozenSet[str], FrozenSet[str]] | None:
+  if system.reads is None and system.writes is None:
+    return None
+
+  writes = frozenset(component_key(c) for c in (system.writes or ()))
+  reads = frozenset(component_key(c) for c in (system.reads or ())) | writes
+  return reads, writes
+
+
+def conflicts(first: System, second: System) -> bool:
+  """
+  Check if two systems must not run at the same time.
+
+  Two systems conflict when one writes something the other reads or writes. A system that declares
+  neither `reads` nor `writes` conflicts with every other system.
+
+  Args:
+    first (System): A system.
+    second (System): Another system.
+
+  Returns:
+    bool: True if the systems conflict.
+  """
+  first_keys, second_keys = _access_keys(first), _access_keys(second)
+  if first_keys is None or second_keys is None:
+    return True
+
+  first_reads, first_writes = first_keys
+  second_reads, second_writes = second_keys
+  return bool(first_writes & second_reads or second_writes & first_reads)
+
+
+class SystemScheduler(object):
+  """
+  Runs the systems due on a tick in parallel where their declared accesses allow it.
+
+  Systems are grouped into stages. A system goes into the stage right after the last earlier system it
+  conflicts with, so systems only run concurrently when none of them writes what another one touches,
+  and conflicting systems always run in declaration order. Stages run one after the other; the systems
+  in a stage run on a thread pool.
+
+  Each system in a stage records its commands into its own buffer. At the end of the stage the buffers are
+  flushed in declaration order, so the world ends up in the same state as with a serial run, regardless of
+  which thread finished first.
+
+  Attributes:
+    workers (int): Number of worker threads. With 1, stages run serially on the calling thread.
+    validate (bool): Raise UndeclaredAccessError when a system gets a component it did not declare.
+    _executor (ThreadPoolExecutor | None): The worker pool, created on first use.
+    _plans (Dict[Tuple[int, ...], List[Stage]]): Stage plans, cached per set of due systems.
+    _current (threading.local): The system running on each thread, used in validation mode.
+
+  Methods:
+    plan(systems): Group systems into stages.
+    run(world, systems): Run systems, stage by stage.
+    shutdown(): Stop the worker threads.
+  """
+  def __init__(self, workers: int = DEFAULT_WORKERS, validate: bool = False) -> None:
+    """
+    Initialize a SystemScheduler object.
+
+    Args:
+      workers (int): Number of worker threads (default is DEFAULT_WORKERS).
+      validate (bool): Check every component access against the running system's declarations.
+    """
+    if workers < 1:
+      raise ValueError(f"Worker count must be at least 1, got {workers}")
+
+    self.workers: int = int(workers)
+    self.validate: bool = validate
+    self._executor: ThreadPoolExecutor | None = None
+    self._plans: Dict[Tuple[int, ...], List[Stage]] = {}
+    self._declared: Dict[int, FrozenSet[str] | None] = {}
+    self._current = threading.local()
+
+  def plan(self, systems: Sequence[System]) -> List[Stage]:
+    """
+    Group systems into stages of mutually compatible systems.
+
+    Args:
+      systems (Sequence[System]): The systems, in declaration order.
+
+    Returns:
+      List[Stage]: The stages, in execution order. Systems keep their declaration order inside a stage.
+    """
+    key = tuple(id(system) for system in systems)
+    stages = self._plans.get(key)
+    if stages is not None:
+      return stages
+
+    levels: List[int] = []
+    for index, system in enumerate(systems):
+      level = 0
+      for earlier in range(index):
+        if levels[earlier] >= level and conflicts(systems[earlier], system):
+          level = levels[earlier] + 1
+      levels.append(level)
+
+    stages = [[] for _ in range(max(levels) + 1)] if levels else []
+    for system, level in zip(systems, levels):
+      stages[level].append(system)
+
+    self._plans[key] = stages
+    return stages
+
+  def run(self, world: World, systems: Sequence[System]) -> int:
+    """
+    Run systems stage by stage and apply their commands at the end of each stage.
+
+    Each system's `dt` must already be set. Commands are flushed after every stage. When the world keeps
+    system timings, each system's run is recorded in them, and traced when tracing is on.
+
+    Args:
+      world (World): The world the systems belong to.
+      systems (Sequence[System]): The systems to run, in declaration order.
+
+    Returns:
+      int: The time spent applying commands, in nanoseconds. Only measured when the world keeps system timings.
+    """
+    timings = world.stats.system_timings
+    flush_time = 0
+    if self.validate:
+      set_access_hook(self._check_access)
+
+    try:
+      for stage in self.plan(systems):
+        batches = [(system, world.query(*system.component_types), CommandBuffer(), timings) for system in stage]
+        if len(batches) == 1 or self.workers == 1:
+          for batch in batches:
+            self._run_system(world, *batch)
+        else:
+          if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='system')
+          futures = [self._executor.submit(self._run_system, world, *batch) for batch in batches]
+          for future in futures:
+            future.result()
+
+        flush_start = perf_counter_ns() if timings is not None else 0
+        for _, _, commands, _ in batches:
+          commands.flush(world)
+        world.flush_commands()
+        if timings is not None:
+          flush_time += perf_counter_ns() - flush_start
+    finally:
+      if self.validate:
+        set_access_hook(None)
+    return flush_time
+
+  def shutdown(self) -> None:
+    """
+    Stop the worker threads. The pool is created again if the scheduler runs after this.
+    """
+    if self._executor is not None:
+      self._executor.shutdown()
+      self._executor = None
+
+  def __getstate__(self):
+    # Worker threads and thread-locals cannot be pickled, and the caches are keyed by object id,
+    # which does not survive a restore. All of them are rebuilt on the next run.
+    state = self.__dict__.copy()
+    state.update(_executor=None, _plans={}, _declared={})
+    del state['_current']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._current = threading.local()
+
+  def _run_system(self, world: World, system: System, entities: Sequence[Entity], commands: CommandBuffer,
+                  timings: SystemTimings | None) -> None:
+    world.bind_commands(commands)
+    self._current.system = system
+    try:
+      if timings is None and not tracer.enabled:
+        system.update(entities)
+      else:
+        start = perf_counter_ns()
+        system.update(entities)
+        duration = perf_counter_ns() - start
+        if timings is not None:
+          timings.record(system.__class__.__name__, duration / 1e6)
+        tracer.add(system.__class__.__name__, 'system', start, duration)
+    finally:
+      self._current.system = None
+      world.bind_commands(None)
+
+  def _check_access(self, component_name: str) -> None:
+    system = getattr(self._current, 'system', None)
+    if system is None:
+      return
+
+    declared = self._declared.get(id(system), False)
+    if declared is False:
+      keys = _access_keys(system)
+      declared = self._declared[id(system)] = keys[0] if keys else None
+
+    if declared is not None and component_name not in declared:
+      raise UndeclaredAccessError(
+        f"{system.__class__.__name__} accessed {component_name} without declaring it in reads or writes")
@@ -0,0 +1,199 @@
+"""
+Binary world snapshots.
+
+A snapshot holds a whole world: its entities and their components, desires and their targets, systems,
+clock, statistics and pending commands, along with the state of the shared random generator and the
+entity id counter. Restoring it gives a world that continues exactly like the original would have,
+provided both are driven with the same steps (see `World.step()`).
+
+The format is a short header followed by pickle protocol 5 data. Entities are written as empty shells
+wherever they first appear and their state is written afterwards, in batches, so long chains of entities
+referencing each other (sensors, desire targets) do not hit the recursion limit. Like any pickle, a
+snapshot can run arbitrary code when loaded: only load snapshots you wrote yourself.
+
+Usage:
+  data = snapshot.dumps(world)
+  restored = snapshot.loads(data)
+"""
+from __future__ import annotations
+
+import copyreg
+import gc
+import io
+import pickle
+import struct
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterator, List, Tuple
+
+from creatures.core.entity import Entity
+from creatures.core.entity import entity as entity_module
+from creatures.core.random_generator import generator
+
+if TYPE_CHECKING:
+  from .world import World
+
+MAGIC = b'CRSNAP'
+SNAPSHOT_VERSION = 1
+PICKLE_PROTOCOL = 5
+
+_HEADER = struct.Struct('<6sH')
+
+
+class SnapshotException(Exception):
+  def __init__(self, msg: str, *args: object) -> None:
+    super().__init__(*args)
+    self.msg = msg
+
+  def __str__(self) -> str:
+    return f"Snapshot exception: {self.msg}"
+
+
+class _SnapshotPickler(pickle.Pickler):
+  def __init__(self, file: BinaryIO) -> None:
+    super().__init__(file, protocol=PICKLE_PROTOCOL)
+    self.entities: List[Entity] = []
+
+  def reducer_override(self, obj: Any) -> Tuple | NotImplemented:
+    # Called once per object not yet written, except for numbers and strings. An entity is first written
+    # as an empty shell, and its state later in `dump_entities()`.
+    if not isinstance(obj, Entity):
+      return NotImplemented
+
+    self.entities.append(obj)
+    return (copyreg.__newobj__, (obj.__class__,))
+
+  def dump_entities(self) -> None:
+    # Writing a batch of entity states can reference entities not seen yet, such as the target of a
+    # desire that already left the world. Those go in the next batch.
+    written = 0
+    while written < len(self.entities):
+      batch = self.entities[written:]
+      self.dump([(entity, entity.__getstate__()) for entity in batch])
+      written += len(batch)
+    self.dump(None)
+
+
+def _load_entities(unpickler: pickle.Unpickler) -> None:
+  while (batch := unpickler.load()) is not None:
+    for entity, state in batch:
+      entity.__dict__.update(state)
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+  # Reading or writing a world allocates or visits a few dozen container objects per entity, which
+  # keeps triggering the cyclic garbage collector over an ever larger heap. Nothing collectable is
+  # created meanwhile, so it is paused.
+  enabled = gc.isenabled()
+  gc.disable()
+  try:
+    yield
+  finally:
+    if enabled:
+      gc.enable()
+
+
+def write(world: World, file: BinaryIO) -> None:
+  """
+  Write a snapshot of a world to a binary file object.
+
+  Args:
+    world (World): The world.
+    file (BinaryIO): Where to write.
+  """
+  file.write(_HEADER.pack(MAGIC, SNAPSHOT_VERSION))
+  pickler = _SnapshotPickler(file)
+  with _gc_paused():
+    pickler.dump({
+      'world': world,
+      'random_state': generator.getstate(),
+      'entity_ids': entity_module._ENTITY_IDS,
+    })
+    pickler.dump_entities()
+
+
+def read(file: BinaryIO) -> World:
+  """
+  Read a world snapshot from a binary file object. The shared random generator and the entity id counter
+  are set back to their state at the time of the snapshot.
+
+  Args:
+    file (BinaryIO): Where to read from.
+
+  Returns:
+    World: The restored world.
+  """
+  header = file.read(_HEADER.size)
+  if len(header) < _HEADER.size:
+    raise SnapshotException("Not a world snapshot: too short")
+  magic, version = _HEADER.unpack(header)
+  if magic != MAGIC:
+    raise SnapshotException("Not a world snapshot")
+  if version != SNAPSHOT_VERSION:
+    raise SnapshotException(f"Unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+
+  unpickler = pickle.Unpickler(file)
+  try:
+    with _gc_paused():
+      content = unpickler.load()
+      _load_entities(unpickler)
+  except (EOFError, pickle.UnpicklingError) as e:
+    raise SnapshotException(f"Corrupt snapshot: {e}")
+
+  generator.setstate(content['random_state'])
+  entity_module._ENTITY_IDS = content['entity_ids']
+  return content['world']
+
+
+def dumps(world: World) -> bytes:
+  """
+  Take a snapshot of a world.
+
+  Args:
+    world (World): The world.
+
+  Returns:
+    bytes: The snapshot.
+  """
+  buffer = io.BytesIO()
+  write(world, buffer)
+  return buffer.getvalue()
+
+
+def loads(data: bytes) -> World:
+  """
+  Restore a world from a snapshot. See `read()`.
+
+  Args:
+    data (bytes): The snapshot.
+
+  Returns:
+    World: The restored world.
+  """
+  return read(io.BytesIO(data))
+
+
+def save(world: World, filename: str) -> None:
+  """
+  Save a snapshot of a world to a file.
+
+  Args:
+    world (World): The world.
+    filename (str): The file to write.
+  """
+  with open(filename, 'wb') as fd:
+    write(world, fd)
+
+
+def load(filename: str) -> World:
+  """
+  Restore a world from a snapshot file. See `read()`.
+
+  Args:
+    filename (str): The file to read.
+
+  Returns:
+    World: The restored world.
+  """
+  with open(filename, 'rb') as fd:
+    return read(fd)
@@ -1,18 +1,32 @@
 from __future__ import annotations
 
 import logging
-from time import time
+import threading
+from time import perf_counter_ns, time
 
-from creatures.core.entity import Entity
+from creatures.core.component import MovementComponent, MovementStore
+from creatures.core.entity import Entity, component_key
 from creatures.core.primitives import Vector
+from creatures.core.spatial import SpatialHashGrid, DEFAULT_CELL_SIZE, entity_distance_squared, k_nearest, within_radius
 
 from creatures.core.system import System
 
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
 
-from creatures.core.util import Stats
+from creatures.core.util import Stats, SystemTimings, tracer
+
+from . import snapshot
+from .commands import CommandBuffer
+from .scheduler import SystemScheduler
 
 DEFAULT_TIME_RESOLUTION = .001
+DEFAULT_FIXED_DT = 1000.0 / 60.0
+DEFAULT_MAX_CATCH_UP = 5
+
+MOVEMENT_BACKEND_OBJECT = 'object'
+MOVEMENT_BACKEND_NUMPY = 'numpy'
+MOVEMENT_BACKENDS = (MOVEMENT_BACKEND_OBJECT, MOVEMENT_BACKEND_NUMPY)
+COMMANDS_TIMING = 'commands'
 
 
 class World(object):
@@ -30,21 +44,51 @@ class World(object):
     systems (List[System]): A list of systems operating in the world.
     random_seed: The random seed for the world.
     _clock (float): The simulation clock.
-    stats (WorldStats): The statistics for the world.
+    stats (WorldStats): The statistics for the world. With system timings enabled, it also holds the rolling
+      timings of each system and of applying deferred commands (entity removals, mostly), under COMMANDS_TIMING.
+    spatial_index (SpatialHashGrid): Grid index of entity positions, used for proximity queries.
+    movement_store (MovementStore | None): Array storage for movement components, when the numpy backend is enabled.
+    _component_index (Dict[str, Dict[str, Entity]]): Entities holding each component type, keyed by component type name.
+    version (int): Structural version, bumped every time an entity is added or removed.
+    _entities_cache (Tuple[Entity, ...]): Cached entity sequence, valid while `version` is unchanged.
+    _query_cache (Dict[Tuple[str, ...], Tuple[Entity, ...]]): Cached `query()` results, dropped on any structural change.
+    commands (CommandBuffer): Deferred structural mutations, flushed at the world's sync points. While a system
+      runs under the scheduler, this is the buffer of that system.
+    scheduler (SystemScheduler | None): Runs non-conflicting systems in parallel. None runs systems serially.
+    fixed_dt (float | None): Fixed simulation step, in milliseconds. None means the variable-step `update()` is used.
+    max_catch_up (int): Maximum number of fixed steps `advance()` runs for a single rendered frame.
+    _accumulator (float): Frame time not yet consumed by fixed steps, in milliseconds.
+    tick (int): The number of ticks run so far. Used to schedule systems that do not run every tick.
 
   Methods:
     update(external_dt): Update the world simulation.
+    step(dt): Run one deterministic simulation tick.
+    advance(frame_time): Run as many fixed steps as the elapsed frame time allows.
     add(entity): Add an entity to the world.
     remove(entity): Remove an entity from the world.
-    entities(): Get a list of entities in the world.
+    despawn(entity): Remove an entity from the world, counting it as removed.
+    flush_commands(): Apply the deferred structural mutations.
+    bind_commands(commands): Route the current thread's commands to another buffer.
+    entities(): Get the entities in the world.
+    query(*component_types): Get the entities holding all the given component types.
+    within(position, radius, predicate): Get the entities within a radius of a position.
+    nearest(position, predicate, k, max_radius): Get the entities nearest to a position.
     any_near(entity): Check if any entity is near a given entity.
     add_system(system): Add a system to the world.
+    fork(): Copy the world, sharing nothing with the original.
+    shutdown(): Stop the worker threads of the scheduler and systems.
   """
   def __init__(self,
               width: int = 100,
               height: int = 100,
               random_seed=None,
-              time_resolution: float = DEFAULT_TIME_RESOLUTION) -> None:
+              time_resolution: float = DEFAULT_TIME_RESOLUTION,
+              cell_size: float = DEFAULT_CELL_SIZE,
+              movement_backend: str = MOVEMENT_BACKEND_OBJECT,
+              fixed_dt: float | None = None,
+              max_catch_up: int = DEFAULT_MAX_CATCH_UP,
+              scheduler: SystemScheduler | None = None,
+              system_timings: bool = True) -> None:
     """
     Initialize a World object.
 
@@ -52,7 +96,17 @@ class World(object):
       width (int): The width of the world.
       height (int): The height of the world.
       random_seed: The random seed for the world.
+      time_resolution (float): The time resolution for simulations.
+      cell_size (float): The cell size of the spatial index.
+      movement_backend (str): 'object' keeps movement state in each component, 'numpy' keeps it in a MovementStore.
+      fixed_dt (float): Fixed simulation step, in milliseconds. If not specified, the world runs with a variable step.
+      max_catch_up (int): Maximum number of fixed steps run for a single rendered frame.
+      scheduler (SystemScheduler): Scheduler used to run systems in parallel. If not specified, systems run serially.
+      system_timings (bool): Time every system run and keep rolling percentiles in the stats. Without it, nothing is timed.
     """
+    if movement_backend not in MOVEMENT_BACKENDS:
+      raise ValueError(f"Unknown movement backend '{movement_backend}'. Options are {list(MOVEMENT_BACKENDS)}")
+
     self.log = logging.getLogger(self.__class__.__name__)
     self.time_resolution = time_resolution
     self._height = width
@@ -63,7 +117,21 @@ class World(object):
     self.systems: List[System] = []
     self.random_seed = int(time()) if not random_seed else random_seed
     self._clock = 0.0
-    self.stats = WorldStats()
+    self.stats = WorldStats(system_timings)
+    self.spatial_index = SpatialHashGrid(cell_size)
+    self.movement_store: MovementStore | None = MovementStore() if movement_backend == MOVEMENT_BACKEND_NUMPY else None
+    self._component_index: Dict[str, Dict[str, Entity]] = {}
+    self.version: int = 0
+    self._entities_cache: Tuple[Entity, ...] = ()
+    self._entities_cache_version: int = -1
+    self._query_cache: Dict[Tuple[str, ...], Tuple[Entity, ...]] = {}
+    self._commands = CommandBuffer()
+    self._bound_commands = threading.local()
+    self.scheduler: SystemScheduler | None = scheduler
+    self.fixed_dt: float | None = fixed_dt
+    self.max_catch_up: int = max(1, max_catch_up)
+    self._accumulator: float = 0.0
+    self.tick: int = 0
 
   def update(self, external_dt: float = None):
     """
@@ -74,23 +142,20 @@ class World(object):
 
     All times are measured in milliseconds.
 
+    Deferred commands are flushed at the world's sync points: before the first system runs and after
+    each system's update, so every system sees the structural changes made by the systems before it. With a
+    scheduler, commands are flushed after each stage of systems that ran in parallel.
+
     Args:
       external_dt (float): External time step for simulations, in milliseconds. If not specified, the internal dt will be used.
     """
+    trace_start = perf_counter_ns() if tracer.enabled else 0
     update_start = time() * 1000
 
-    self.stats.population = len(self.entities_map.keys())
-    for system in self.systems:
-      system.update(self.entities())
-
-    for entity in [a for a in self.entities() if a.remove]:
-      self.log.info(f"Entity {entity.id} removed.")
-      self.remove(entity)
-      self.stats.removed_count += 1
+    self._run_systems()
     
     update_end = time() * 1000
     internal_dt = (update_end - update_start)
-    self.dt = external_dt if external_dt else internal_dt
     if external_dt:
       self.dt = external_dt
       self.stats.external_dt = external_dt
@@ -99,26 +164,342 @@ class World(object):
       self.dt = internal_dt
     self.stats.simulation_clock = self.clock
     self.stats.time_resolution = self.time_resolution
+    if trace_start:
+      tracer.add('World.update', 'world', trace_start, perf_counter_ns() - trace_start)
+
+  def step(self, dt: float = None):
+    """
+    Run one deterministic simulation tick.
+
+    Unlike `update()`, the step size never depends on wall-clock time: systems see `dt` (or the world's
+    `fixed_dt`) for this tick, and the clock advances by exactly that amount afterwards. Wall-clock time is
+    only recorded in the stats.
+
+    Args:
+      dt (float): Step size in milliseconds. Defaults to `fixed_dt`, or DEFAULT_FIXED_DT if the world has none.
+    """
+    step_dt = dt if dt else (self.fixed_dt if self.fixed_dt else DEFAULT_FIXED_DT)
+    trace_start = perf_counter_ns() if tracer.enabled else 0
+    step_start = time() * 1000
+
+    self._dt = step_dt * self.time_resolution
+    self._run_systems()
+    self._clock += self._dt
+
+    self.stats.internal_dt = time() * 1000 - step_start
+    self.stats.simulation_clock = self.clock
+    self.stats.time_resolution = self.time_resolution
+    if trace_start:
+      tracer.add('World.step', 'world', trace_start, perf_counter_ns() - trace_start)
+
+  def advance(self, frame_time: float) -> int:
+    """
+    Run as many fixed steps as the elapsed frame time allows, carrying the remainder to the next frame.
+
+    At most `max_catch_up` steps run per call. If the simulation falls further behind than that, the
+    backlog is dropped instead of growing every frame, and the dropped time is counted in the stats.
+
+    Args:
+      frame_time (float): Wall-clock time since the last call, in milliseconds.
+
+    Returns:
+      int: The number of steps run.
+    """
+    fixed_dt = self.fixed_dt if self.fixed_dt else DEFAULT_FIXED_DT
+    self._accumulator += frame_time
+
+    steps = 0
+    while self._accumulator >= fixed_dt and steps < self.max_catch_up:
+      self.step(fixed_dt)
+      self._accumulator -= fixed_dt
+      steps += 1
+
+    if self._accumulator >= fixed_dt:
+      self.stats.dropped_time += self._accumulator
+      self._accumulator = 0.0
+
+    return steps
+
+  def _run_systems(self):
+    timings = self.stats.system_timings
+    flush_start = perf_counter_ns() if timings is not None else 0
+    self.flush_commands()
+    flush_time = perf_counter_ns() - flush_start if timings is not None else 0
+    self.stats.population = len(self.entities_map.keys())
+    # The clock is scaled by the time resolution, system schedules are in milliseconds. Rounding drops the error
+    # accumulated by the scaled clock, so a schedule that is a multiple of the step lands on the expected tick.
+    clock_ms = round(self._clock / self.time_resolution, 6)
+    due: List[System] = []
+    for system in self.systems:
+      system._elapsed += self._dt
+      if system.due(self.tick, clock_ms):
+        system.dt, system._elapsed = system._elapsed, 0.0
+        due.append(system)
+
+    if self.scheduler is not None:
+      flush_time += self.scheduler.run(self, due)
+    elif timings is None and not tracer.enabled:
+      for system in due:
+        system.update(self.query(*system.component_types))
+        self.flush_commands()
+    else:
+      for system in due:
+        start = perf_counter_ns()
+        system.update(self.query(*system.component_types))
+        end = perf_counter_ns()
+        self.flush_commands()
+        flush_time += perf_counter_ns() - end
+        if timings is not None:
+          timings.record(system.__class__.__name__, (end - start) / 1e6)
+        tracer.add(system.__class__.__name__, 'system', start, end - start)
+
+    if timings is not None:
+      timings.record(COMMANDS_TIMING, flush_time / 1e6)
+    self.tick += 1
   
   def add(self, entity: Entity) -> None:
+    previous = self.entities_map.get(entity.id)
+    if previous is not None and previous is not entity:
+      self._unindex(previous)
+      self.stats.count_type(previous.type, -1)
+    if previous is not entity:
+      self.stats.count_type(entity.type, 1)
+
     self.entities_map[entity.id] = entity
+    self._structure_changed()
+    entity._world = self
+    for component_type_name in entity._components:
+      self.index_component(entity, component_type_name)
+
+    if entity.remove:
+      self.commands.despawn(entity)
 
   def remove(self, entity: Entity) -> None:
     self.entities_map.pop(entity.id)
+    self._unindex(entity)
+    self.stats.count_type(entity.type, -1)
+    self._structure_changed()
 
-  def entities(self) -> List[Entity]:
-    return list(self.entities_map.values())
+  def despawn(self, entity: Entity) -> None:
+    """
+    Remove an entity from the world and count it in the stats. Entities that are no longer in the world are ignored.
+
+    Args:
+      entity (Entity): The entity to remove.
+    """
+    if self.entities_map.get(entity.id) is not entity:
+      return
+
+    self.log.info(f"Entity {entity.id} removed.")
+    self.remove(entity)
+    self.stats.removed_count += 1
+
+  def flush_commands(self) -> int:
+    """
+    Apply the deferred structural mutations recorded in the world's own command buffer.
+
+    Returns:
+      int: The number of commands applied.
+    """
+    if not self._commands:
+      return 0
+    return self._commands.flush(self)
+
+  @property
+  def commands(self) -> CommandBuffer:
+    bound = getattr(self._bound_commands, 'buffer', None)
+    return bound if bound is not None else self._commands
+
+  def bind_commands(self, commands: CommandBuffer | None) -> None:
+    """
+    Route the commands recorded on the current thread to another buffer, so systems running concurrently
+    do not share one. The caller is responsible for flushing it.
+
+    Args:
+      commands (CommandBuffer or None): The buffer to record into, or None to use the world's own buffer again.
+    """
+    self._bound_commands.buffer = commands
+
+  def _structure_changed(self) -> None:
+    self.version += 1
+    self._query_cache.clear()
+
+  def _unindex(self, entity: Entity) -> None:
+    for component_type_name in entity._components:
+      self.unindex_component(entity, component_type_name)
+    entity._world = None
+
+  @property
+  def movement_backend(self) -> str:
+    return MOVEMENT_BACKEND_NUMPY if self.movement_store is not None else MOVEMENT_BACKEND_OBJECT
+
+  def entities(self) -> Sequence[Entity]:
+    """
+    Get the entities in the world.
+
+    The sequence is cached and only rebuilt after entities are added or removed, so it is cheap to call
+    every frame. It must not be mutated.
+
+    Returns:
+      Sequence[Entity]: The entities, in insertion order.
+    """
+    if self._entities_cache_version != self.version:
+      self._entities_cache = tuple(self.entities_map.values())
+      self._entities_cache_version = self.version
+    return self._entities_cache
+
+  def index_component(self, entity: Entity, component_type_name: str) -> None:
+    """
+    Register that an entity holds a component type. Called by `Entity.add_component` for entities in this world.
+
+    Args:
+      entity (Entity): The entity holding the component.
+      component_type_name (str): The component type name.
+    """
+    members = self._component_index.setdefault(component_type_name, {})
+    if members.get(entity.id) is not entity:
+      members[entity.id] = entity
+      self._query_cache.clear()
+
+    if component_type_name == MovementComponent.__name__:
+      if self.movement_store is not None:
+        self.movement_store.attach(entity)
+      self.spatial_index.insert(entity)
+
+  def unindex_component(self, entity: Entity, component_type_name: str) -> None:
+    """
+    Register that an entity no longer holds a component type. Called by `Entity.remove_component` before the
+    component is detached.
+
+    Args:
+      entity (Entity): The entity holding the component.
+      component_type_name (str): The component type name.
+    """
+    members = self._component_index.get(component_type_name)
+    if members and members.get(entity.id) is entity:
+      del members[entity.id]
+      self._query_cache.clear()
+
+    if component_type_name == MovementComponent.__name__:
+      self.spatial_index.remove(entity)
+      if self.movement_store is not None:
+        self.movement_store.detach(entity)
+
+  def query(self, *component_types: type | str) -> Sequence[Entity]:
+    """
+    Get the entities holding all the given component types, without visiting the others.
+    Results are cached until an entity or a component membership changes.
+
+    Args:
+      *component_types (type or str): The component types, or their names. With none, all entities are returned.
+
+    Returns:
+      Sequence[Entity]: The matching entities. Must not be mutated.
+    """
+    if not component_types:
+      return self.entities()
+
+    key = tuple(component_key(c) for c in component_types)
+    result = self._query_cache.get(key)
+    if result is None:
+      members = [self._component_index.get(name, {}) for name in key]
+      smallest = min(members, key=len)
+      result = tuple(e for entity_id, e in smallest.items() if all(entity_id in m for m in members))
+      self._query_cache[key] = result
+
+    return result
+
+  def within(self, position: Vector, radius: float, predicate: Callable[[Entity], bool] | None = None) -> List[Entity]:
+    """
+    Get the entities within a radius of a position, using the spatial index.
+
+    Args:
+      position (Vector): The center of the query.
+      radius (float): The query radius.
+      predicate (Callable[[Entity], bool]): Only return the entities it accepts, if given.
+
+    Returns:
+      List[Entity]: The entities whose distance to `position` is at most `radius`.
+    """
+    candidates = self.spatial_index.candidates(position, radius)
+    if predicate is not None:
+      candidates = [e for e in candidates if predicate(e)]
+    return within_radius(position, candidates, radius)
+
+  def nearest(self,
+              position: Vector,
+              predicate: Callable[[Entity], bool] | None = None,
+              k: int = 1,
+              max_radius: float | None = None) -> List[Entity]:
+    """
+    Get the entities nearest to a position, using the spatial index.
+
+    Without `max_radius`, the search radius starts at one cell of the index and doubles until `k` entities
+    are found within it, or until it covers every indexed entity.
+
+    Args:
+      position (Vector): The center of the query.
+      predicate (Callable[[Entity], bool]): Only return the entities it accepts, if given.
+      k (int): The number of entities to get.
+      max_radius (float): Ignore the entities farther than this, if given.
+
+    Returns:
+      List[Entity]: At most `k` entities, nearest first. Ties are broken by id.
+    """
+    if k < 1:
+      raise ValueError(f"k must be positive, got {k}")
+
+    if max_radius is not None:
+      return k_nearest(position, self.within(position, max_radius, predicate), k)
+
+    radius = self.spatial_index.cell_size
+    while True:
+      candidates = self.spatial_index.candidates(position, radius)
+      if len(candidates) >= len(self.spatial_index):
+        return k_nearest(position, candidates, k, predicate)
+
+      # Entities outside the radius are farther than any inside: k found inside are the k nearest.
+      found = within_radius(position, candidates if predicate is None else [e for e in candidates if predicate(e)], radius)
+      if len(found) >= k:
+        return k_nearest(position, found, k)
+      radius *= 2
   
   def any_near(self, entity: Entity) -> Entity | None:
-    for other_entity in self.entities():
-      distance = entity.distance(other_entity)
-      if 0 < distance <= entity.properties.get('sensor_radius', 7.0):
+    sensor_radius = entity.properties.get('sensor_radius', 7.0)
+    limit = sensor_radius * sensor_radius
+    for other_entity in self.spatial_index.candidates(entity.movement.position, sensor_radius):
+      if 0 < entity_distance_squared(entity, other_entity) <= limit:
         return other_entity
     return None
 
   def add_system(self, system: System):
     self.systems.append(system)
 
+  def fork(self) -> World:
+    """
+    Copy the world, sharing nothing with the original, to try an alternative from this point on.
+
+    The copy goes through a snapshot, see `creatures.core.world.snapshot`. Both worlds still draw from the
+    process-wide random generator, so stepping them in turn interleaves their random numbers. To run
+    several branches side by side, each with its own generator, use `run_branches()`.
+
+    Returns:
+      World: The copy.
+    """
+    return snapshot.loads(snapshot.dumps(self))
+
+  def shutdown(self) -> None:
+    """
+    Stop the worker threads of the scheduler and of the systems that have any. They are started again if
+    the world runs after this.
+    """
+    if self.scheduler is not None:
+      self.scheduler.shutdown()
+    for system in self.systems:
+      shutdown = getattr(system, 'shutdown', None)
+      if shutdown is not None:
+        shutdown()
+
   @property
   def width(self):
     return self._width
@@ -140,6 +521,27 @@ class World(object):
   def clock(self):
     return self._clock
 
+  def __getstate__(self) -> Dict[str, Any]:
+    """
+    Get the state to pickle. Caches are left out, as are index entries of transient components, which
+    entities do not pickle.
+
+    Returns:
+      dict: The world attributes.
+    """
+    state = self.__dict__.copy()
+    del state['_bound_commands']
+    state.update(_entities_cache=(), _entities_cache_version=-1, _query_cache={})
+    state['_component_index'] = {
+      name: members for name, members in self._component_index.items()
+      if not members or not next(iter(members.values()))._components[name].transient
+    }
+    return state
+
+  def __setstate__(self, state: Dict[str, Any]) -> None:
+    self.__dict__.update(state)
+    self._bound_commands = threading.local()
+
   def __str__(self) -> str:
     """
     Get a string representation of the world.
@@ -231,17 +633,25 @@ class WorldStats(Stats):
   Attributes:
     population (int): The population of entities in the world.
     removed_count (int): The count of removed entities.
+    population_by_type (Dict[str, int]): The population per entity type, kept current on add/remove.
     _internal_dt (float): Internal time step for simulations.
     _external_dt (float): External time step for simulations.
     simulation_clock (float): The simulation clock time.
     frame_count (int): The count of frames.
     frame_time_acc (float): Accumulated time for frames.
+    dropped_time (float): Simulation time skipped because fixed steps could not catch up with wall-clock time.
+    system_timings (SystemTimings | None): Rolling timings of each system, or None when they are disabled.
 
   Methods:
     get_dict(): Get a dictionary representation of the statistics.
+    to_dict(): Get the statistics as plain numbers.
+    count_type(entity_type, delta): Update the population counter of an entity type.
+    population_of(entity_type): Get the current population of an entity type.
+    aggregate(stats): Combine the statistics of several worlds simulated side by side.
   """
-  def __init__(self):
+  def __init__(self, system_timings: bool = True):
     self.population: int = 0
+    self.population_by_type: Dict[str, int] = {}
     self.removed_count: int = 0
     self._internal_dt: float = 0.0
     self._external_dt: float = 0.0
@@ -250,6 +660,8 @@ class WorldStats(Stats):
     self.frame_count: int = 0
     self.frame_time_acc: float = 0
     self.time_resolution: float = 0.0
+    self.dropped_time: float = 0.0
+    self.system_timings: SystemTimings | None = SystemTimings() if system_timings else None
 
   def get_dict(self) -> Dict[str, Any]:
     """
@@ -258,8 +670,10 @@ class WorldStats(Stats):
     Returns:
       dict: A dictionary containing the statistics data.
     """
+    population_by_type = {f"population_{t.lower()}": str(n) for t, n in self.population_by_type.items()}
     return {
       'population': str(self.population),
+      **population_by_type,
       'removed_count': str(self.removed_count),
       'avg_frame_rate': f"{self.avg_frame_rate:.1f}Hz",
       'avg_frame_time': f"{self.avg_frame_time:.2f}ms",
@@ -268,8 +682,86 @@ class WorldStats(Stats):
       'external_dt': f"{self.external_dt:.2f}ms",
       'frame_count': f"{self.frame_count}",
       'time_resolution': f"{self.time_resolution}",
+      'dropped_time': f"{self.dropped_time:.2f}ms",
+      **(self.system_timings.get_dict() if self.system_timings is not None else {}),
     }
 
+  def to_dict(self) -> Dict[str, Any]:
+    """
+    Get the statistics as plain numbers, for machine-readable output. `get_dict()` is meant for display.
+
+    Returns:
+      dict: A dictionary containing the statistics data. Times are in milliseconds.
+    """
+    return {
+      'population': self.population,
+      'population_by_type': dict(self.population_by_type),
+      'removed_count': self.removed_count,
+      'avg_frame_rate': self.avg_frame_rate,
+      'avg_frame_time': self.avg_frame_time,
+      'simulation_clock': self.simulation_clock,
+      'internal_dt': self.internal_dt,
+      'external_dt': self.external_dt,
+      'frame_count': self.frame_count,
+      'time_resolution': self.time_resolution,
+      'dropped_time': self.dropped_time,
+      'system_timings': self.system_timings.summary() if self.system_timings is not None else None,
+    }
+
+  @classmethod
+  def aggregate(cls, stats: Iterable[WorldStats]) -> WorldStats:
+    """
+    Combine the statistics of several worlds simulated side by side, such as the shards of one world.
+
+    Populations and removals are summed. Clocks, times and frame counts come from the slowest world,
+    since the combined simulation advances at its pace. System timings are pooled, so percentiles cover the runs of every world.
+
+    Args:
+      stats (Iterable[WorldStats]): The statistics of each world.
+
+    Returns:
+      WorldStats: The combined statistics.
+    """
+    stats = list(stats)
+    timings = [other.system_timings for other in stats if other.system_timings is not None]
+    result = cls()
+    result.system_timings = SystemTimings.merge(timings) if timings else None
+    for other in stats:
+      result.population += other.population
+      result.removed_count += other.removed_count
+      for entity_type, count in other.population_by_type.items():
+        result.count_type(entity_type, count)
+      result.simulation_clock = max(result.simulation_clock, other.simulation_clock)
+      result.time_resolution = other.time_resolution
+      result._internal_dt = max(result._internal_dt, other._internal_dt)
+      result._external_dt = max(result._external_dt, other._external_dt)
+      result.frame_count = max(result.frame_count, other.frame_count)
+      result.frame_time_acc = max(result.frame_time_acc, other.frame_time_acc)
+      result.dropped_time = max(result.dropped_time, other.dropped_time)
+    return result
+
+  def count_type(self, entity_type: str, delta: int) -> None:
+    """
+    Update the population counter of an entity type.
+
+    Args:
+      entity_type (str): The entity type.
+      delta (int): The change in population.
+    """
+    self.population_by_type[entity_type] = self.population_by_type.get(entity_type, 0) + delta
+
+  def population_of(self, entity_type: str) -> int:
+    """
+    Get the current population of an entity type, in O(1).
+
+    Args:
+      entity_type (str): The entity type.
+
+    Returns:
+      int: The number of entities of that type in the world.
+    """
+    return self.population_by_type.get(entity_type, 0)
+
   @property
   def internal_dt(self):
     return self._internal_dt
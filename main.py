@@ -1,11 +1,21 @@
+import os
 import sys
-from time import time
+import argparse
+import json
+from statistics import mean, median
+from time import perf_counter, time
 import logging
-from typing import Dict, Callable, Self
+from typing import Any, Dict, Callable, List, Self, Tuple
+
+from creatures.app.batch import write_csv
 
 from creatures.app.io import Loader, ParseException
+from creatures.app.replay import DeltaLogException, ReplayWorld
 from creatures.app.render_system import RenderSystem
-from creatures.core.world import World
+from creatures.app.shard import ShardedWorld
+from creatures.core.util import (DEFAULT_SAMPLE_INTERVAL, DEFAULT_TRACE_CAPACITY, PROFILE_FORMATS, DeterministicProfiler,
+                                 Profiler, SamplingProfiler, SystemTimings, percentile, tracer)
+from creatures.core.world import World, WorldStats, snapshot
 from creatures.app.creatures.creature import Creature
 
 MODE_SIMULATION = 'simulation'
@@ -14,7 +24,7 @@ MODE_BENCHMARK = 'benchmark'
 DEFAULT_FILENAME = 'scenarios/blue_creatures.yml'
 DEFAULT_FRAME_NUMBER = 'infinite'
 DEFAULT_MODE = MODE_SIMULATION
-BENCHMARK_FRAME_NUMBER = 10000
+DEFAULT_BENCHMARK_FRAMES = 10000
 
 
 class Application(object):
@@ -23,47 +33,193 @@ class Application(object):
     None: lambda w, a: None,
   }
 
-  def __init__(self, filename: str, options: {}):
+  def __init__(self, filename: str, options: {}, profiler: Profiler | None = None):
     super().__init__()
     self.log = logging.getLogger(Application.__name__)
     self.options = options
+    self.profiler: Profiler | None = profiler
     self.filename: str = filename
     self.ui_type: str = 'gui_pygame' if not self.options.get('no_ui', False) else None
 
     self.world: World | None = None
+    self._initial_snapshot: bytes | None = None
+    self._initial_mtime: float | None = None
 
     self.is_running = True
     self.dt = 0.0000001
     self.ui = None
 
   def load(self, random_seed=None):
+    random_seed = random_seed if random_seed is not None else self.options.get('seed')
+    if self.shards:
+      return
+    if self.replay:
+      try:
+        self.world = ReplayWorld(self.replay)
+      except (OSError, DeltaLogException) as e:
+        print(e)
+        exit(1)
+      return
+
     try:
       frame = Loader(self.filename, random_seed=random_seed).load()
       self.world: World = frame.world
+      if self.options.get('fixed_dt'):
+        self.world.fixed_dt = self.options['fixed_dt']
+      if self.options.get('no_timings'):
+        self.world.stats.system_timings = None
     except ParseException as e:
       print(e)
       exit(1)
 
+    # Keep the freshly loaded world around, so a reset does not parse the scenario and run its generators again.
+    # Only the UI can reset.
+    if self.ui_type and not self.is_benchmark:
+      self._initial_mtime = self._scenario_mtime()
+      self._initial_snapshot = snapshot.dumps(self.world)
+
   def run(self):
-    if self.is_benchmark:
-      self.benchmark_loop()
+    if self.shards and not self.is_benchmark:
+      self.sharded_loop()
+      return
+    if self.shards:
+      self.benchmark()
+      return
+
+    try:
+      if self.is_benchmark:
+        self.benchmark()
+      else:
+        self.infinite_loop()
+    finally:
+      self.world.shutdown()
+      self.write_trace()
+      self.write_profile()
+
+  def benchmark(self):
+    repetitions = []
+    timings = None
+    for repetition in range(self.options.get('repeat', 1)):
+      if repetition and not self.shards:
+        random_seed = self.world.random_seed
+        self.world.shutdown()
+        self.load(random_seed=random_seed)
+      if self.shards:
+        result, timings = self.sharded_benchmark_loop()
+      else:
+        result = self.benchmark_loop()
+        timings = self.world.stats.system_timings
+      repetitions.append({'repetition': repetition + 1, **result})
+      print(f"Run {repetition + 1}: {result['frames']} frames in {result['wall_seconds']:.3f}s "
+            f"({result['frames_per_second']:.1f} frames/s), frame time median {result['median_frame_ms']:.3f}ms, "
+            f"p95 {result['p95_frame_ms']:.3f}ms, max {result['max_frame_ms']:.3f}ms, population {result['population']}")
+
+    if timings is not None:
       print()
-      print(self.world.stats.get_dict())
-    else:
-      self.infinite_loop()
+      print(timings)
+    self.write_benchmark(repetitions)
 
-  def benchmark_loop(self):
-    start = time()
+  def benchmark_loop(self) -> Dict[str, Any]:
+    frames, sim_time = self.benchmark_frames, self.options.get('sim_time')
     self.is_running = True
+    for _ in range(self.options.get('warmup', 0)):
+      self._benchmark_step()
+    if self.world.stats.system_timings is not None:
+      # Only time the measured frames, all of them.
+      self.world.stats.system_timings = SystemTimings(frames) if frames else SystemTimings()
+    # The clock is scaled by the time resolution, --sim-time is in milliseconds.
+    sim_clock = sim_time * self.world.time_resolution if sim_time else None
+    end_clock = self.world.clock + sim_clock if sim_time else None
+
     print('Benchmarking...')
-    for frame in range(BENCHMARK_FRAME_NUMBER):
-      progress = 100 * frame / BENCHMARK_FRAME_NUMBER
-      if progress and progress % 10 == 0:
+    frame_times: List[float] = []
+    progress = 0
+    start = perf_counter()
+    while (frames is None or len(frame_times) < frames) and (end_clock is None or self.world.clock < end_clock):
+      if self.profiler:
+        self.profiler.frame(self.world.tick)
+      frame_start = perf_counter()
+      self._benchmark_step()
+      frame_times.append((perf_counter() - frame_start) * 1000)
+
+      done = max(len(frame_times) / frames if frames else 0, 1 - (end_clock - self.world.clock) / sim_clock if sim_time else 0)
+      while progress < int(done * 10):
+        progress += 1
         print('-', end='', flush=True)
-      self.world.update()
+    wall_seconds = perf_counter() - start
     self.is_running = False
     print()
+    return benchmark_result(frame_times, wall_seconds, self.world.stats)
+
+  def _benchmark_step(self):
+    if self.world.fixed_dt:
+      self.world.step()
+    else:
+      self.world.update()
+
+  def sharded_loop(self):
+    columns, rows = self.shards
+    start = time()
+    with ShardedWorld(self.filename, columns, rows, random_seed=self.options.get('seed')) as world:
+      while True:
+        world.step(self.options.get('fixed_dt'))
+        if not world.stats.population_of(Creature.__name__):
+          break
+      stats = world.stats
+      timings = world.system_timings()
     print(f"{time() - start}s")
+    print(stats.get_dict())
+    if timings is not None:
+      print()
+      print(timings)
+
+  def sharded_benchmark_loop(self) -> Tuple[Dict[str, Any], SystemTimings | None]:
+    columns, rows = self.shards
+    frames, sim_time = self.benchmark_frames, self.options.get('sim_time')
+    fixed_dt = self.options.get('fixed_dt')
+    with ShardedWorld(self.filename, columns, rows, random_seed=self.options.get('seed')) as world:
+      for _ in range(self.options.get('warmup', 0)):
+        world.step(fixed_dt)
+      end_clock = world.stats.simulation_clock + sim_time * world.time_resolution if sim_time else None
+      frame_times: List[float] = []
+      start = perf_counter()
+      while (frames is None or len(frame_times) < frames) and (end_clock is None or world.stats.simulation_clock < end_clock):
+        frame_start = perf_counter()
+        world.step(fixed_dt)
+        frame_times.append((perf_counter() - frame_start) * 1000)
+      wall_seconds = perf_counter() - start
+      stats = world.stats
+      timings = world.system_timings()
+    result = benchmark_result(frame_times, wall_seconds, stats)
+    result['systems'] = timings.summary() if timings is not None else {}
+    return result, timings
+
+  def write_benchmark(self, repetitions: List[Dict[str, Any]]):
+    if self.options.get('json'):
+      report = {
+        'scenario': self.filename,
+        'seed': self.options.get('seed') if self.shards else self.world.random_seed,
+        'fixed_dt': self.options.get('fixed_dt') if self.shards else self.world.fixed_dt,
+        'frames': self.benchmark_frames,
+        'sim_time': self.options.get('sim_time'),
+        'warmup': self.options.get('warmup', 0),
+        'shards': list(self.shards) if self.shards else None,
+        'repetitions': repetitions,
+        'summary': summarize_benchmark(repetitions),
+      }
+      with open(self.options['json'], 'w') as fd:
+        json.dump(report, fd, indent=2)
+    if self.options.get('csv'):
+      rows = [
+        {
+          'scenario': self.filename,
+          **{k: v for k, v in r.items() if k != 'systems'},
+          **{f"{name}_{key}_ms": value for name, values in r['systems'].items() for key, value in values.items() if key != 'runs'},
+        }
+        for r in repetitions
+      ]
+      with open(self.options['csv'], 'w', newline='') as fd:
+        write_csv(rows, fd)
 
   def infinite_loop(self):
     logging.basicConfig(
@@ -75,11 +231,20 @@ class Application(object):
     dt = 0.000001
     while self.is_running:
       loop_start = time_ms()
-      self.world.update(dt)
+      if self.profiler:
+        self.profiler.frame(self.world.tick)
+      if not self.world.fixed_dt:
+        self.world.update(dt)
+      elif self.ui:
+        self.world.advance(dt)
+      else:
+        self.world.step()
       if self.ui:
         self.ui.update(None)
 
-      if not self.ui and not list(filter(lambda e: e.type == Creature.__name__, self.world.entities())):
+      if not self.ui and not self.world.stats.population_of(Creature.__name__):
+        self.is_running = False
+      if not self.ui and self.replay and self.world.finished:
         self.is_running = False
       dt = time_ms() - loop_start
     end = time_ms()
@@ -90,7 +255,40 @@ class Application(object):
       self.ui.quit()
 
   def reset(self):
-    self.load(random_seed=self.world.random_seed)
+    if self.replay:
+      self.world.seek(0)
+      return
+
+    self.world.shutdown()
+    if self._initial_snapshot is not None and self._scenario_mtime() == self._initial_mtime:
+      self.world = snapshot.loads(self._initial_snapshot)
+    else:
+      self.log.info(f"{self.filename} changed, loading it again.")
+      self.load(random_seed=self.world.random_seed)
+
+    if self.ui:
+      self.ui.set_world(self.world)
+
+  def write_trace(self):
+    if not self.trace or not tracer.recorded:
+      return
+    spans = tracer.write(self.trace)
+    print(f"Wrote {spans} spans to {self.trace}")
+
+  def write_profile(self):
+    if not self.profiler:
+      return
+    self.profiler.close()
+    self.profiler.write(self.options['profile'], self.options.get('profile_format'))
+    print()
+    print(self.profiler.report(self.world))
+    print(f"Wrote the profile to {self.options['profile']}")
+
+  def _scenario_mtime(self) -> float | None:
+    try:
+      return os.path.getmtime(self.filename)
+    except OSError:
+      return None
 
   def quit(self):
     self.is_running = False
@@ -99,20 +297,175 @@ class Application(object):
   def is_benchmark(self) -> bool:
     return self.options.get('is_benchmark', False)
 
+  @property
+  def benchmark_frames(self) -> int | None:
+    frames = self.options.get('frames')
+    if frames is None and not self.options.get('sim_time'):
+      return DEFAULT_BENCHMARK_FRAMES
+    return frames
+
+  @property
+  def trace(self) -> str | None:
+    return self.options.get('trace')
+
+  @property
+  def replay(self) -> str | None:
+    return self.options.get('replay')
+
+  @property
+  def shards(self) -> Tuple[int, int] | None:
+    return self.options.get('shards')
+
+
+def benchmark_result(frame_times: List[float], wall_seconds: float, stats: WorldStats) -> Dict[str, Any]:
+  ordered = sorted(frame_times)
+  return {
+    'frames': len(ordered),
+    'wall_seconds': wall_seconds,
+    'frames_per_second': len(ordered) / wall_seconds if wall_seconds > 0 else 0.0,
+    'mean_frame_ms': mean(ordered) if ordered else 0.0,
+    'median_frame_ms': median(ordered) if ordered else 0.0,
+    'p95_frame_ms': percentile(ordered, 95),
+    'p99_frame_ms': percentile(ordered, 99),
+    'max_frame_ms': ordered[-1] if ordered else 0.0,
+    'simulation_clock': stats.simulation_clock,
+    'population': stats.population,
+    'removed_count': stats.removed_count,
+    'systems': stats.system_timings.summary() if stats.system_timings is not None else {},
+  }
+
+
+def summarize_benchmark(repetitions: List[Dict[str, Any]]) -> Dict[str, float]:
+  # The median of each number over the repetitions, and the best throughput.
+  keys = [k for k, v in repetitions[0].items() if isinstance(v, (int, float)) and k != 'repetition']
+  summary = {k: median(r[k] for r in repetitions) for k in keys}
+  summary['best_frames_per_second'] = max(r['frames_per_second'] for r in repetitions)
+  return summary
+
+
+def shard_layout(value: str) -> Tuple[int, int]:
+  try:
+    columns, rows = (int(n) for n in value.lower().split('x'))
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"expected COLUMNSxROWS, such as 2x2, got '{value}'")
+  if columns < 1 or rows < 1:
+    raise argparse.ArgumentTypeError(f"need at least one column and one row, got '{value}'")
+  return columns, rows
+
+
+def frame_range(value: str) -> Tuple[int, int | None]:
+  try:
+    first, _, last = value.partition(':')
+    first, last = int(first or 0), int(last) if last else None
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"expected FIRST:LAST, such as 100:600 or 100:, got '{value}'")
+  if first < 0 or (last is not None and last < first):
+    raise argparse.ArgumentTypeError(f"expected 0 <= FIRST <= LAST, got '{value}'")
+  return first, last
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description='Run a creatures scenario.')
+  parser.add_argument('filename', nargs='?', default=DEFAULT_FILENAME, help='Scenario YAML file.')
+  parser.add_argument('-b', '--benchmark', action='store_true',
+                      help='Run frames headless as fast as possible, and print frame times and system timings.')
+  parser.add_argument('--frames', type=int, default=None, metavar='N',
+                      help=f"Frames timed per benchmark run (default is {DEFAULT_BENCHMARK_FRAMES}, or no limit with --sim-time).")
+  parser.add_argument('--sim-time', type=float, default=None, metavar='MS',
+                      help='End each benchmark run once the simulation clock advanced by MS milliseconds, or after --frames, '
+                           'whichever comes first.')
+  parser.add_argument('--warmup', type=int, default=0, metavar='N',
+                      help='Frames run before timing each benchmark run (default is 0).')
+  parser.add_argument('--repeat', type=int, default=1, metavar='N',
+                      help='Benchmark runs, each on a freshly loaded world (default is 1).')
+  parser.add_argument('--seed', type=int, default=None, help="Random seed, overriding the scenario's.")
+  parser.add_argument('--json', default=None, metavar='FILE',
+                      help='Write the benchmark results to FILE as JSON: the settings, the raw numbers of every run, '
+                           'and their medians.')
+  parser.add_argument('--csv', default=None, metavar='FILE', help='Write the benchmark results to FILE as CSV, one row per run.')
+  parser.add_argument('--no-ui', action='store_true', help='Run headless until no creatures are left.')
+  parser.add_argument('--fixed-dt', type=float, default=None, metavar='MS',
+                      help='Simulate in fixed steps of MS milliseconds, overriding the scenario. '
+                           'Headless runs then step as fast as possible instead of following the wall clock.')
+  parser.add_argument('--shards', type=shard_layout, default=None, metavar='COLSxROWS',
+                      help='Split the world into COLSxROWS tiles simulated by separate processes. Runs headless, '
+                           'in fixed steps, until no creatures are left (or as long as a benchmark run with -b).')
+  parser.add_argument('--no-timings', action='store_true',
+                      help='Do not time each system. Removes the per-system timings from the stats.')
+  parser.add_argument('--trace', default=None, metavar='FILE',
+                      help='Record spans of world updates, systems, loading and rendering, and write them to FILE as '
+                           'Chrome trace-event JSON (open it in https://ui.perfetto.dev) on exit, or when T is pressed.')
+  parser.add_argument('--trace-capacity', type=int, default=DEFAULT_TRACE_CAPACITY, metavar='SPANS',
+                      help=f"Number of most recent spans kept for --trace (default is {DEFAULT_TRACE_CAPACITY}).")
+  parser.add_argument('--replay', default=None, metavar='FILE',
+                      help='Play back a delta log written by the DeltaLogSystem instead of running the scenario.')
+  parser.add_argument('--profile', default=None, metavar='FILE',
+                      help='Profile the run and write the profile to FILE on exit, then print the functions taking '
+                           'the most time and the cumulative time of each system.')
+  parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default=None,
+                      help="Format of the --profile file: pstats (python -m pstats, snakeviz) or callgrind "
+                           "(KCachegrind). Defaults to callgrind for 'callgrind.out.*' and '*.callgrind' files, "
+                           "pstats otherwise.")
+  parser.add_argument('--profile-frames', type=frame_range, default=None, metavar='FIRST:LAST',
+                      help='Only profile ticks FIRST to LAST, both included, instead of the whole run (loading '
+                           'included). Leave LAST out to profile until the end.')
+  parser.add_argument('--profile-sampling', action='store_true',
+                      help='Profile by sampling the call stacks of every thread instead of with cProfile. Cheaper '
+                           'on long runs and sees worker threads, but times are estimates.')
+  parser.add_argument('--sample-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL, metavar='MS',
+                      help=f"Time between samples with --profile-sampling (default is {DEFAULT_SAMPLE_INTERVAL}ms).")
+  args = parser.parse_args(argv)
+  if (args.frames is not None and args.frames < 1) or (args.sim_time is not None and args.sim_time <= 0):
+    parser.error('--frames and --sim-time must be positive')
+  if args.warmup < 0 or args.repeat < 1:
+    parser.error('--warmup must not be negative, and --repeat must be at least 1')
+  if (args.json or args.csv) and not args.benchmark:
+    parser.error('--json and --csv write benchmark results, and need -b')
+  if args.sample_interval <= 0:
+    parser.error(f"--sample-interval must be positive, got {args.sample_interval}")
+  if args.profile and args.shards:
+    parser.error('--profile does not profile the shard processes, and cannot be used with --shards')
+  if args.trace and args.shards:
+    parser.error('--trace does not record the shard processes, and cannot be used with --shards')
+  return args
+
 
 def main():
   log = logging.getLogger()
-  filename = DEFAULT_FILENAME
-  if len(sys.argv) > 1:
-    filename = sys.argv[1]
+  args = parse_args(sys.argv[1:])
 
   options = {
-    'is_benchmark': len(sys.argv) > 2 and '-b' in sys.argv,
-    'no_ui': len(sys.argv) > 2 and '--no-ui' in sys.argv
+    'is_benchmark': args.benchmark,
+    'no_ui': args.no_ui,
+    'fixed_dt': args.fixed_dt,
+    'shards': args.shards,
+    'replay': args.replay,
+    'no_timings': args.no_timings,
+    'trace': args.trace,
+    'profile': args.profile,
+    'profile_format': args.profile_format,
+    'frames': args.frames,
+    'sim_time': args.sim_time,
+    'warmup': args.warmup,
+    'repeat': args.repeat,
+    'seed': args.seed,
+    'json': args.json,
+    'csv': args.csv,
   }
+  if args.trace:
+    tracer.start(args.trace_capacity)
+
+  profiler = None
+  if args.profile:
+    if args.profile_sampling:
+      profiler = SamplingProfiler(args.profile_frames, args.sample_interval)
+    else:
+      profiler = DeterministicProfiler(args.profile_frames)
+    if args.profile_frames is None:
+      profiler.start()
 
   try:
-    app = Application(filename, options)
+    app = Application(args.filename, options, profiler)
     app.load()
     app.run()
     sys.exit(0)
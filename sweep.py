@@ -0,0 +1,47 @@
+import sys
+import argparse
+import logging
+from time import time
+from typing import List
+
+import yaml
+
+from creatures.app.batch import Sweep, SweepException, summarize, format_table, write_csv
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description='Run every combination of scenario parameters headless, in parallel.')
+  parser.add_argument('spec', help='Sweep specification YAML file.')
+  parser.add_argument('-w', '--workers', type=int, default=None, help='Number of worker processes. Defaults to one per CPU.')
+  parser.add_argument('--csv', default=None, metavar='FILE', help='Also write the aggregated table to a CSV file.')
+  parser.add_argument('--runs-csv', default=None, metavar='FILE', help='Write every individual run to a CSV file.')
+  return parser.parse_args(argv)
+
+
+def main():
+  logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+  args = parse_args(sys.argv[1:])
+
+  try:
+    with open(args.spec) as fd:
+      sweep = Sweep(yaml.safe_load(fd))
+  except (OSError, SweepException) as e:
+    print(e)
+    exit(1)
+
+  start = time()
+  results = sweep.run(workers=args.workers, progress=sys.stderr)
+  rows = summarize(sweep, results)
+  print(format_table(rows))
+  print(f"{len(results)} runs in {time() - start:.2f}s", file=sys.stderr)
+
+  if args.csv:
+    with open(args.csv, 'w', newline='') as output:
+      write_csv(rows, output)
+  if args.runs_csv:
+    with open(args.runs_csv, 'w', newline='') as output:
+      write_csv(results, output)
+
+
+if __name__ == '__main__':
+  main()